@@ -0,0 +1,78 @@
+"""Import-time benchmark of normlap.
+
+Each case runs in a fresh interpreter: numpy is imported first, then the time of importing the normlap module on top of it is
+measured, and the heavy optional dependencies left in sys.modules are listed. The "score" case also scores a small pair, the
+work of a short-lived batch worker. Run from the repository root:
+
+    python benchmarks/bench_import.py [--repeat 5] [--budget 0.25]
+
+The exit status is 1 if a case fails, loads scipy or networkx, or if its median import time exceeds the budget in seconds.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("scipy", "networkx", "pandas", "matplotlib")
+CASES = {
+    "normlap": "import normlap",
+    "Pipeline": "from normlap.Pipeline import Pipeline",
+    "Batch": "from normlap.Batch import Batch",
+    "Cli": "from normlap.Cli import Cli",
+    "Loader": "from normlap.Loader import Loader",
+    "Model": "from normlap.Model import Model",
+}
+SCORE = """
+pipe = Pipeline([(1, 2), (2, 3), (3, 5)], [(2, 3), (4, 5), (1, 2), (2, 4)])
+pipe.get_benchmarks(dict(iters_start=100, iter_spacing=100), dict(iters_start=100, iter_spacing=100))
+pipe.show_results(printOn=False)
+"""
+PROBE = """
+import sys, time, json
+import numpy
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+{work}
+print(json.dumps({{"seconds": elapsed, "heavy": sorted(m for m in sys.modules if m.split(".")[0] in {heavy!r})}}))
+"""
+
+
+def probe(statement, work=""):
+    """probe Run one import in a fresh interpreter, return its time in seconds and the heavy modules loaded."""
+    code = PROBE.format(statement=statement, work=work, heavy=HEAVY)
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"seconds": float("nan"), "heavy": [], "error": proc.stderr.strip().splitlines()[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per case, by default 5")
+    parser.add_argument("--budget", type=float, default=0.25, help="maximum median import time per case in seconds, by default 0.25")
+    args = parser.parse_args(argv)
+
+    cases = [(name, statement, "") for name, statement in CASES.items()]
+    cases.append(("score", CASES["Pipeline"], SCORE))
+    failed = []
+    print("%-10s %10s %10s  %s" % ("case", "median ms", "max ms", "heavy modules"))
+    for name, statement, work in cases:
+        runs = [probe(statement, work) for _ in range(args.repeat)]
+        seconds = [run["seconds"] for run in runs]
+        heavy = sorted({module.split(".")[0] for run in runs for module in run["heavy"]})
+        errors = sorted({run["error"] for run in runs if "error" in run})
+        median = statistics.median(seconds)
+        print("%-10s %10.1f %10.1f  %s" % (name, 1000 * median, 1000 * max(seconds), "; ".join(errors) or ", ".join(heavy) or "-"))
+        if errors or heavy or not median <= args.budget:
+            failed.append(name)
+    if failed:
+        print("failed: %s" % ", ".join(failed))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
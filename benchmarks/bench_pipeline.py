@@ -0,0 +1,161 @@
+"""asv benchmarks of the fitting, probability, sampling and scoring paths.
+
+Every benchmark runs on the seeded synthetic pools of generators.py, from 10^3 to 10^6 links, and comes in pairs: time_* for the
+wall time and track_*_peak for the peak memory in MB allocated by the measured call alone, traced with tracemalloc.
+
+    pip install asv && pip install -e .
+    asv run --python=same --quick --bench "Fit|Probability" -a repeat=1
+"""
+import tracemalloc
+import numpy as np
+from normlap.Graph import Graph
+from normlap.Pipeline import Pipeline
+from normlap.RandomNetwork import RandomNetwork
+from normlap.RandomSubnetwork import RandomSubnetwork
+from .generators import GENERATORS, make_pair
+
+SIZES = [10**3, 10**4, 10**5, 10**6]
+# a fixed number of picard sweeps, so the fits of different versions do the same work
+SWEEPS = 100
+# converged alphas for the probabilities, the samplers and the end-to-end scores
+SETTINGS = dict(iters_start=100, iter_spacing=100, max_iterations=300, solver="anderson")
+
+
+def traced_peak(func, *args, **kwargs):
+    """traced_peak The peak memory in MB allocated while calling func."""
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2**20
+
+
+class PairBenchmark:
+    params = (list(GENERATORS), SIZES)
+    param_names = ["pool", "n_edges"]
+    timeout = 1200
+
+    def setup(self, kind, n_edges):
+        edges1, edges2, pool, self.n_nodes = make_pair(kind, n_edges)
+        self.edges = (edges1, edges2, pool)
+        self.graph1 = Graph.from_edgelist(edges1, n_nodes=self.n_nodes)
+        self.graph2 = Graph.from_edgelist(edges2, n_nodes=self.n_nodes)
+        self.pool = Graph.from_edgelist(pool, n_nodes=self.n_nodes)
+
+
+class FittedBenchmark(PairBenchmark):
+
+    def setup(self, kind, n_edges):
+        super().setup(kind, n_edges)
+        _, _, _, alphas = RandomNetwork.optimize_neg(self.graph1, self.graph2, return_alphas=True, **SETTINGS)
+        self.neg_alphas = self.graph1.alphas_array(alphas)
+        _, _, _, alphas = RandomSubnetwork.optimize_pos(self.graph1, self.graph2, return_alphas=True, **SETTINGS)
+        self.pos_alphas = self.graph1.alphas_array(alphas)
+        self.union = Graph.union(self.graph1, self.graph2)
+        self.pos_probs = RandomSubnetwork.cal_probability(self.union, self.graph1, self.pos_alphas)
+        self.neg_probs = RandomSubnetwork.cal_probability(self.graph2, self.graph1, self.neg_alphas)
+
+
+class Fit(PairBenchmark):
+    """Alpha fitting, SWEEPS sweeps of the negative and the positive model, the latter also on the classes of pool_classes."""
+
+    def fit_neg(self):
+        RandomNetwork.optimize_neg(self.graph1, self.graph2, iters_start=SWEEPS, max_iterations=SWEEPS)
+
+    def fit_pos(self):
+        RandomSubnetwork.optimize_pos(self.graph1, self.graph2, iters_start=SWEEPS, max_iterations=SWEEPS)
+
+    def fit_pos_compressed(self):
+        RandomSubnetwork.optimize_pos(self.graph1, self.graph2, iters_start=SWEEPS, max_iterations=SWEEPS, compress=True)
+
+    def time_fit_neg(self, kind, n_edges):
+        self.fit_neg()
+
+    def track_fit_neg_peak(self, kind, n_edges):
+        return traced_peak(self.fit_neg)
+    track_fit_neg_peak.unit = "MB"
+
+    def time_fit_pos(self, kind, n_edges):
+        self.fit_pos()
+
+    def track_fit_pos_peak(self, kind, n_edges):
+        return traced_peak(self.fit_pos)
+    track_fit_pos_peak.unit = "MB"
+
+    def time_fit_pos_compressed(self, kind, n_edges):
+        self.fit_pos_compressed()
+
+    def track_fit_pos_compressed_peak(self, kind, n_edges):
+        return traced_peak(self.fit_pos_compressed)
+    track_fit_pos_compressed_peak.unit = "MB"
+
+
+class Probability(FittedBenchmark):
+    """Connection probabilities of the links from fitted alphas."""
+
+    def time_neg_probability(self, kind, n_edges):
+        RandomSubnetwork.cal_probability(self.graph2, self.graph1, self.neg_alphas)
+
+    def track_neg_probability_peak(self, kind, n_edges):
+        return traced_peak(RandomSubnetwork.cal_probability, self.graph2, self.graph1, self.neg_alphas)
+    track_neg_probability_peak.unit = "MB"
+
+    def time_pos_probability(self, kind, n_edges):
+        RandomSubnetwork.cal_probability(self.union, self.graph1, self.pos_alphas)
+
+    def track_pos_probability_peak(self, kind, n_edges):
+        return traced_peak(RandomSubnetwork.cal_probability, self.union, self.graph1, self.pos_alphas)
+    track_pos_probability_peak.unit = "MB"
+
+
+class Sampling(FittedBenchmark):
+    """Instances of both benchmarks and simulated overlaps."""
+
+    def simulate_overlap(self):
+        np.concatenate([mask.sum(axis=1) for mask in RandomSubnetwork.construct_sample_masks(self.neg_probs, 100, rng=0)])
+
+    def time_neg_instance(self, kind, n_edges):
+        RandomNetwork.sample_random_graph(self.graph1, self.neg_alphas, rng=0)
+
+    def track_neg_instance_peak(self, kind, n_edges):
+        return traced_peak(RandomNetwork.sample_random_graph, self.graph1, self.neg_alphas, rng=0)
+    track_neg_instance_peak.unit = "MB"
+
+    def time_pos_instance(self, kind, n_edges):
+        RandomSubnetwork.construct_sample_graph(self.union, self.pos_probs, rng=0)
+
+    def track_pos_instance_peak(self, kind, n_edges):
+        return traced_peak(RandomSubnetwork.construct_sample_graph, self.union, self.pos_probs, rng=0)
+    track_pos_instance_peak.unit = "MB"
+
+    def time_simulate_overlap(self, kind, n_edges):
+        self.simulate_overlap()
+
+    def track_simulate_overlap_peak(self, kind, n_edges):
+        return traced_peak(self.simulate_overlap)
+    track_simulate_overlap_peak.unit = "MB"
+
+
+class EndToEnd(PairBenchmark):
+    """Pipeline from integer arrays to show_results, both benchmarks fitted with SETTINGS."""
+
+    def score(self):
+        pipe = Pipeline(*self.edges, id2node=list(range(self.n_nodes)), seed=0)
+        pipe.get_benchmarks(SETTINGS, SETTINGS)
+        pipe.show_results(printOn=False)
+
+    def time_show_results(self, kind, n_edges):
+        self.score()
+
+    def track_show_results_peak(self, kind, n_edges):
+        return traced_peak(self.score)
+    track_show_results_peak.unit = "MB"
+
+
+class Import:
+    """Import time of the pipeline in a fresh interpreter, see also bench_import.py."""
+
+    def timeraw_import_pipeline(self):
+        return "from normlap.Pipeline import Pipeline", "import numpy"
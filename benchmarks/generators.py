@@ -0,0 +1,89 @@
+"""Seeded synthetic networks for the benchmarks.
+
+Every generator returns an (E, 2) int64 array of distinct links u < v without self-interactions on the node ids 0..n_nodes-1,
+and the same arguments always give the same network.
+"""
+import numpy as np
+
+
+def distinct_links(u, v, n_nodes, n_edges):
+    """distinct_links Keep the first n_edges distinct links u != v, in the order they were drawn."""
+    lo, hi = np.minimum(u, v), np.maximum(u, v)
+    keep = lo != hi
+    code = lo[keep] * n_nodes + hi[keep]
+    _, first = np.unique(code, return_index=True)
+    code = code[np.sort(first)][:n_edges]
+    return np.stack(np.divmod(code, n_nodes), axis=1)
+
+
+def draw_links(n_edges, n_nodes, draw, seed):
+    """draw_links Draw node pairs with draw(rng, size) until n_edges distinct links are found."""
+    rng = np.random.default_rng(seed)
+    size = n_edges
+    while True:
+        u, v = draw(rng, int(size * 1.2) + 16)
+        links = distinct_links(u, v, n_nodes, n_edges)
+        if len(links) == n_edges:
+            return links
+        size *= 2
+
+
+def erdos_renyi(n_edges, mean_degree=10, seed=0):
+    """erdos_renyi Uniformly random links among 2*n_edges/mean_degree nodes."""
+    n_nodes = max(2, 2 * n_edges // mean_degree)
+    return draw_links(n_edges, n_nodes, lambda rng, size: rng.integers(0, n_nodes, (2, size)), seed)
+
+
+def chung_lu(weights, n_edges, seed):
+    """chung_lu Links drawn with a probability proportional to the product of the weights of their nodes."""
+    cdf = np.cumsum(weights / weights.sum())
+    cdf[-1] = 1.0
+    n_nodes = len(weights)
+    return draw_links(n_edges, n_nodes, lambda rng, size: np.minimum(np.searchsorted(cdf, rng.random((2, size))), n_nodes - 1), seed)
+
+
+def power_law(n_edges, mean_degree=10, gamma=2.5, seed=0):
+    """power_law Configuration-model-like network with a power-law degree distribution of exponent gamma."""
+    n_nodes = max(2, 2 * n_edges // mean_degree)
+    weights = (1 + np.arange(n_nodes)) ** (-1 / (gamma - 1))
+    return chung_lu(weights, n_edges, seed)
+
+
+def ppi_pool(n_edges, mean_degree=10, gamma=2.5, bait_fraction=0.2, seed=0):
+    """ppi_pool Bipartite-like pool of bait-prey links, as measured by pull-down or two-hybrid screens.
+
+    A few baits with heavy-tailed degrees are linked to many preys, links among preys are rare (5%).
+    """
+    n_nodes = max(4, 2 * n_edges // mean_degree)
+    n_baits = max(2, int(n_nodes * bait_fraction))
+    bait_weights = (1 + np.arange(n_baits)) ** (-1 / (gamma - 1))
+    prey_weights = (1 + np.arange(n_nodes - n_baits)) ** (-1 / (gamma - 1))
+    bait_cdf, prey_cdf = np.cumsum(bait_weights / bait_weights.sum()), np.cumsum(prey_weights / prey_weights.sum())
+
+    def draw(rng, size):
+        u = np.minimum(np.searchsorted(bait_cdf, rng.random(size)), n_baits - 1)
+        v = n_baits + np.minimum(np.searchsorted(prey_cdf, rng.random(size)), n_nodes - n_baits - 1)
+        prey_prey = rng.random(size) < 0.05
+        u[prey_prey] = n_baits + np.minimum(np.searchsorted(prey_cdf, rng.random(prey_prey.sum())), n_nodes - n_baits - 1)
+        return u, v
+
+    return draw_links(n_edges, n_nodes, draw, seed)
+
+
+GENERATORS = {"er": erdos_renyi, "powerlaw": power_law, "ppi": ppi_pool}
+
+
+def make_pair(kind, n_edges, seed=0, keep=0.6):
+    """make_pair Two overlapping networks measured on a synthetic pool of n_edges links.
+
+    Each network keeps every link of the pool independently with probability keep, so they share about keep**2 of the pool.
+
+    Returns
+    -------
+    np.ndarray, np.ndarray, np.ndarray, int
+        edges1, edges2, pool, n_nodes
+    """
+    pool = GENERATORS[kind](n_edges, seed=seed)
+    rng = np.random.default_rng([seed, 1])
+    n_nodes = int(pool.max()) + 1
+    return pool[rng.random(len(pool)) < keep], pool[rng.random(len(pool)) < keep], pool, n_nodes
@@ -0,0 +1,234 @@
+from .Graph import Graph
+from collections import OrderedDict
+import hashlib
+import os
+import numpy as np
+
+
+class AlphaStore:
+    """ Content-addressed store of fitted alphas, shared by all pipelines that fit the same model.
+
+    The negative alphas only depend on the degree sequence of the reference network and are stored per degree, the positive alphas
+    depend on the reference network and the pool and are stored per node. Entries live in an in-memory LRU tier and, if path is
+    given, in an on-disk tier of .npz files that can be shared between processes.
+    """
+
+    def __init__(self, maxsize: int=256, path: str=None) -> None:
+        """__init__ initialize the store
+
+        Parameters
+        ----------
+        maxsize : int, optional
+            The maximum number of entries kept in memory, by default 256.
+        path : str, optional
+            The directory of the on-disk tier, by default None, meaning entries are only kept in memory.
+        """
+        self.maxsize = maxsize
+        self.path = path
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+
+    @staticmethod
+    def hash_key(*parts):
+        """hash_key Hash arrays and settings into a hex key.
+
+        Parameters
+        ----------
+        parts :
+            np.ndarray or objects with a stable repr.
+
+        Returns
+        -------
+        str
+            The sha1 hex digest of the parts.
+        """
+        h = hashlib.sha1()
+        for part in parts:
+            if isinstance(part, np.ndarray):
+                h.update(str(part.dtype).encode())
+                h.update(str(part.shape).encode())
+                h.update(np.ascontiguousarray(part).tobytes())
+            else:
+                h.update(repr(part).encode())
+            h.update(b"|")
+        return h.hexdigest()
+
+    @staticmethod
+    def degree_key(degrees, *settings):
+        """degree_key Key of the negative alphas, the sorted degree sequence and the solver settings.
+
+        Parameters
+        ----------
+        degrees : dict or np.ndarray
+            The node degrees of the reference network without self-interactions.
+        settings :
+            The solver settings that determine the alphas.
+
+        Returns
+        -------
+        str
+            The key.
+        """
+        values = np.fromiter(degrees.values(), dtype=np.int64) if isinstance(degrees, dict) else np.asarray(degrees, dtype=np.int64)
+        return AlphaStore.hash_key("neg", np.sort(values), *settings)
+
+    @staticmethod
+    def edges_digest(elist):
+        """edges_digest Hash of an edge list that does not depend on the order of the links or of the nodes in a link.
+
+        Integer edge lists are hashed through the canonical links of their Graph, so an edge list and its Graph give the same digest.
+
+        Parameters
+        ----------
+        elist : list(tuple) or Graph
+            The edge list, or a Graph.
+
+        Returns
+        -------
+        str
+            The digest.
+        """
+        if not isinstance(elist, Graph):
+            links = np.asarray(elist).reshape(-1, 2)
+            if len(links) and (links.dtype.kind not in "iu" or links.min() < 0):
+                # node labels other than ids, e.g. strings, have no Graph
+                return AlphaStore.hash_key(sorted(set(tuple(sorted(link)) for link in elist)))
+            elist = Graph.from_edgelist(links)
+        # the sorted unique int32 ends of the links, src <= dst, hashed as raw bytes
+        return hashlib.blake2b(elist.src.tobytes() + elist.dst.tobytes(), digest_size=20).hexdigest()
+
+    @staticmethod
+    def pool_key(G1elist, G0elist, *settings):
+        """pool_key Key of the positive alphas, the reference network, the pool and the solver settings.
+
+        Parameters
+        ----------
+        G1elist : list(tuple) or str
+            The reference network in edge list format, or its edges_digest.
+        G0elist : list(tuple) or str
+            The pool in edge list format, or its edges_digest.
+        settings :
+            The solver settings that determine the alphas.
+
+        Returns
+        -------
+        str
+            The key.
+        """
+        digests = [e if isinstance(e, str) else AlphaStore.edges_digest(e) for e in (G1elist, G0elist)]
+        return AlphaStore.hash_key("pos", *digests, *settings)
+
+    def get(self, key):
+        """get Look up an entry, first in memory and then on disk.
+
+        Parameters
+        ----------
+        key : str
+            The key of the entry.
+
+        Returns
+        -------
+        dict or None
+            The stored arrays, None if the key is missing.
+        """
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return self.memory[key]
+        if self.path is not None:
+            fname = os.path.join(self.path, key + ".npz")
+            if os.path.exists(fname):
+                with np.load(fname, allow_pickle=False) as data:
+                    value = {name: data[name] for name in data.files}
+                self.put(key, value, disk=False)
+                self.hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    def put(self, key, value: dict, disk: bool=True):
+        """put Store an entry.
+
+        Parameters
+        ----------
+        key : str
+            The key of the entry.
+        value : dict
+            The arrays of the entry.
+        disk : bool, optional
+            Also write the entry to the on-disk tier if there is one, by default True.
+        """
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.maxsize:
+            self.memory.popitem(last=False)
+        # arrays of python objects cannot be loaded without pickle, keep them in memory only
+        if disk and self.path is not None and all(np.asarray(v).dtype != object for v in value.values()):
+            fname = os.path.join(self.path, key + ".npz")
+            tmp = fname + ".%d.tmp.npz" % os.getpid()
+            np.savez(tmp, **value)
+            os.replace(tmp, fname)  # atomic, concurrent writers of the same key write the same content
+
+    @staticmethod
+    def pack_degree_alphas(alphas, degrees):
+        """pack_degree_alphas Convert the per-node negative alphas to per-degree arrays.
+
+        Parameters
+        ----------
+        alphas : dict
+            The alphas of each node.
+        degrees : dict
+            The degree of each node.
+
+        Returns
+        -------
+        dict
+            {"degrees": the distinct degrees, "alphas": the alpha of each degree}.
+        """
+        table = {degrees[node]: alphas[node] for node in alphas}
+        class_degrees = np.array(sorted(table), dtype=np.int64)
+        return {"degrees": class_degrees, "alphas": np.array([table[d] for d in class_degrees.tolist()], dtype=float)}
+
+    @staticmethod
+    def unpack_degree_alphas(value, degrees):
+        """unpack_degree_alphas Expand per-degree alphas to the nodes of a network.
+
+        Parameters
+        ----------
+        value : dict
+            The output of pack_degree_alphas.
+        degrees : dict
+            The degree of each node.
+
+        Returns
+        -------
+        dict
+            The alphas of each node.
+        """
+        table = dict(zip(value["degrees"].tolist(), value["alphas"]))
+        return {node: table[degree] for node, degree in degrees.items()}
+
+    @staticmethod
+    def pack_node_alphas(alphas):
+        """pack_node_alphas Convert the per-node alphas to arrays.
+
+        Returns
+        -------
+        dict
+            {"nodes": the nodes, "alphas": the alpha of each node}.
+        """
+        return {"nodes": np.array(list(alphas.keys())), "alphas": np.array(list(alphas.values()), dtype=float)}
+
+    @staticmethod
+    def unpack_node_alphas(value):
+        """unpack_node_alphas Convert the output of pack_node_alphas back to a dictionary.
+
+        Returns
+        -------
+        dict
+            The alphas of each node.
+        """
+        return dict(zip(value["nodes"].tolist(), value["alphas"]))
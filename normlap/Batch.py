@@ -0,0 +1,191 @@
+from .Pipeline import Pipeline
+from .AlphaStore import AlphaStore
+from .Loader import Loader
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from collections import deque
+import traceback
+import numpy as np
+
+
+class Batch:
+    """ Score many network pairs with Pipeline, optionally over a process pool.
+    """
+
+    # one AlphaStore per process, keyed by (maxsize, path)
+    stores = {}
+
+    LABELS = ["Observed overlap","Neg_mean","Neg_sigma","Neg_p","Pos_mean","Pos_sigma","Pos_p","Normlap","Normlap_sigma"]
+
+    @staticmethod
+    def task_seed(seed, i):
+        """task_seed Spawn the seed of task i from the seed of the batch, independent of the worker that runs it.
+
+        Parameters
+        ----------
+        seed : int or None
+            The seed of the batch. If None, the tasks are not seeded.
+        i : int
+            The index of the task.
+
+        Returns
+        -------
+        np.random.SeedSequence or None
+            The seed of the task, the child i of SeedSequence(seed), so the streams of the tasks are independent.
+        """
+        if seed is None:
+            return None
+        return np.random.SeedSequence(seed, spawn_key=(i,))
+
+    @staticmethod
+    def get_store(store_size, store_path):
+        """get_store Return the AlphaStore of the current process, None if store_size is 0.
+        """
+        if not store_size:
+            return None
+        if (store_size, store_path) not in Batch.stores:
+            Batch.stores[(store_size, store_path)] = AlphaStore(maxsize=store_size, path=store_path)
+        return Batch.stores[(store_size, store_path)]
+
+    @staticmethod
+    def score_pair(i, pair, seed=None, pos_kwargs=None, neg_kwargs=None, store=None, read_kwargs=None):
+        """score_pair Score one pair of networks, errors are captured in the returned row.
+
+        Parameters
+        ----------
+        i : int
+            The index of the pair.
+        pair : tuple
+            (elist1, elist2) or (elist1, elist2, poollist). The networks may also be given as edge file paths,
+            (path1, path2) or (path1, path2, pool_path), which are read with Loader.load_pipeline in the worker.
+        seed : np.random.SeedSequence, optional
+            The seed of the task, given to the Pipeline of the pair, by default None.
+        pos_kwargs : dict, optional
+            Keyword arguments of Pipeline.get_pos_benchmark, by default None.
+        neg_kwargs : dict, optional
+            Keyword arguments of Pipeline.get_neg_benchmark, by default None.
+        store : AlphaStore, optional
+            Store of fitted alphas shared between pairs, by default None.
+        read_kwargs : dict, optional
+            Keyword arguments of Loader.read_edges for the pairs of paths, e.g. sep or columns, by default None.
+
+        Returns
+        -------
+        dict
+            {"Pair": i, the labels of Pipeline.show_results, "Error": None or the traceback of the failure}.
+        """
+        row = {"Pair": i}
+        try:
+            if isinstance(pair[0], str):
+                pipe = Loader.load_pipeline(*pair, store=store, seed=seed, **(read_kwargs or {}))
+            else:
+                pipe = Pipeline(*pair, store=store, seed=seed)
+            pipe.get_pos_benchmark(**(pos_kwargs or {}))
+            pipe.get_neg_benchmark(**(neg_kwargs or {}))
+            labels, res = pipe.show_results(printOn=False)
+            row.update(zip(labels, res))
+            row["Error"] = None
+        except Exception:
+            row.update((label, np.nan) for label in Batch.LABELS)
+            row["Error"] = traceback.format_exc()
+        return row
+
+    @staticmethod
+    def score_chunk(tasks, pos_kwargs=None, neg_kwargs=None, store_size=0, store_path=None, read_kwargs=None):
+        """score_chunk Score a chunk of (i, pair, seed) tasks in one worker call.
+
+        Returns
+        -------
+        list(dict)
+            The rows of the tasks, see score_pair.
+        """
+        store = Batch.get_store(store_size, store_path)
+        return [Batch.score_pair(i, pair, seed, pos_kwargs, neg_kwargs, store, read_kwargs) for i, pair, seed in tasks]
+
+    @staticmethod
+    def iter_chunks(pairs, chunksize, seed):
+        """iter_chunks Group the pairs into chunks of (i, pair, seed) tasks.
+        """
+        chunk = []
+        for i, pair in enumerate(pairs):
+            chunk.append((i, pair, Batch.task_seed(seed, i)))
+            if len(chunk) == chunksize:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def score_pairs(pairs, n_jobs: int=1, chunksize: int=1, ordered: bool=True, stream: bool=False, seed: int=None,
+                    pos_kwargs: dict=None, neg_kwargs: dict=None, max_pending: int=None, store_size: int=256, store_path: str=None,
+                    read_kwargs: dict=None):
+        """score_pairs Score many network pairs, fanning out over a process pool.
+
+        Parameters
+        ----------
+        pairs : iterable
+            Pairs of networks, each (elist1, elist2) or (elist1, elist2, poollist), or the edge file paths of the networks,
+            see score_pair. May be a generator.
+        n_jobs : int, optional
+            The number of worker processes, by default 1, meaning the pairs are scored in the current process.
+        chunksize : int, optional
+            The number of pairs sent to a worker at once, by default 1.
+        ordered : bool, optional
+            If True, rows are returned in the order of pairs; else, as soon as they are finished, by default True.
+        stream : bool, optional
+            If True, return a generator of rows; else, a list of rows, by default False.
+        seed : int, optional
+            Seed of the batch. Task i is seeded from (seed, i), so the results do not depend on n_jobs or chunksize. By default None.
+        pos_kwargs : dict, optional
+            Keyword arguments of Pipeline.get_pos_benchmark, by default None.
+        neg_kwargs : dict, optional
+            Keyword arguments of Pipeline.get_neg_benchmark, by default None.
+        max_pending : int, optional
+            The maximum number of chunks submitted but not yet collected, by default 2*n_jobs. Bounds the memory held by pending pairs.
+        store_size : int, optional
+            The number of fitted alphas kept in the in-memory AlphaStore of each process, by default 256. 0 disables the store.
+        store_path : str, optional
+            The directory of the on-disk tier of the AlphaStore shared by all processes, by default None.
+        read_kwargs : dict, optional
+            Keyword arguments of Loader.read_edges for the pairs given as paths, by default None.
+
+        Returns
+        -------
+        list(dict) or generator
+            One row per pair with the key "Pair" (the index of the pair), the labels of Pipeline.show_results,
+            and "Error" (None, or the traceback if scoring the pair failed). pandas.DataFrame(rows) gives a table.
+        """
+        rows = Batch.iter_rows(pairs, n_jobs, chunksize, ordered, seed, pos_kwargs, neg_kwargs, max_pending, store_size, store_path,
+                               read_kwargs)
+        return rows if stream else list(rows)
+
+    @staticmethod
+    def iter_rows(pairs, n_jobs, chunksize, ordered, seed, pos_kwargs, neg_kwargs, max_pending, store_size=256, store_path=None,
+                  read_kwargs=None):
+        """iter_rows Generate the rows of score_pairs.
+        """
+        chunks = Batch.iter_chunks(pairs, max(1, chunksize), seed)
+        if n_jobs == 1:
+            for chunk in chunks:
+                yield from Batch.score_chunk(chunk, pos_kwargs, neg_kwargs, store_size, store_path, read_kwargs)
+            return
+        max_pending = max_pending or 2 * n_jobs
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(Batch.score_chunk, chunk, pos_kwargs, neg_kwargs, store_size, store_path,
+                                               read_kwargs))
+                while len(pending) >= max_pending:
+                    yield from Batch.collect(pending, ordered)
+            while pending:
+                yield from Batch.collect(pending, ordered)
+
+    @staticmethod
+    def collect(pending, ordered):
+        """collect Wait for one chunk, the oldest if ordered else the first finished, and return its rows.
+        """
+        if ordered:
+            return pending.popleft().result()
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        future = next(iter(done))
+        pending.remove(future)
+        return future.result()
@@ -0,0 +1,175 @@
+from .Batch import Batch
+import argparse
+import json
+import math
+import os
+import sys
+
+
+class Cli:
+    """ The normlap command: score pairs of edge files and write one show_results row per pair.
+
+        normlap network1.tsv network2.tsv --pool pool.tsv          (or python -m normlap.Cli ...)
+        normlap --manifest pairs.tsv --workers 8 --seed 1 --format json --output results.jsonl
+
+    A manifest has one pair per line, path1 and path2 and optionally the pool path, separated by tabs. Relative paths are relative
+    to the manifest. The rows are written and flushed as soon as each pair is scored.
+    """
+
+    COLUMNS = ["Pair", "Network1", "Network2", "Pool"] + Batch.LABELS + ["Error"]
+
+    @staticmethod
+    def parser():
+        """parser The argument parser of the command.
+        """
+        parser = argparse.ArgumentParser(prog="normlap", description="Normalize the overlap between pairs of networks given as edge files.")
+        parser.add_argument("network1", nargs="?", help="edge file of network1, gzip compressed if it ends with .gz")
+        parser.add_argument("network2", nargs="?", help="edge file of network2")
+        parser.add_argument("--pool", help="edge file of the pool, by default the union of the two networks")
+        parser.add_argument("--manifest", help="file with one pair per line: path1, path2 and optionally the pool path, tab separated")
+
+        read = parser.add_argument_group("edge files")
+        read.add_argument("--sep", default="auto", help='column separator, "whitespace" for any whitespace, by default "," for .csv files and any whitespace otherwise')
+        read.add_argument("--columns", default="0,1", help="the two columns of the nodes of a link, by default 0,1")
+        read.add_argument("--comment", default="#", help="lines starting with it are skipped, by default #")
+        read.add_argument("--skiprows", type=int, default=0, help="number of header lines, by default 0")
+
+        pos = parser.add_argument_group("positive benchmark", "see Pipeline.get_pos_benchmark")
+        pos.add_argument("--pos-iters-start", type=int, default=1000)
+        pos.add_argument("--pos-change-limit", type=float, default=1)
+        pos.add_argument("--pos-iter-spacing", type=int, default=1000)
+        pos.add_argument("--pos-max-iterations", type=int, default=20000)
+        pos.add_argument("--pos-mean-rtol", type=float, default=None, help="change limit relative to the mean, added to --pos-change-limit")
+        pos.add_argument("--pos-residual-atol", type=float, default=None, help="also stop when every expected degree is within atol + rtol*degree")
+        pos.add_argument("--pos-residual-rtol", type=float, default=None, help="see --pos-residual-atol")
+        pos.add_argument("--pos-compress", action="store_true", help="fit one alpha per class of nodes with the same degree and pool neighbors")
+        neg = parser.add_argument_group("negative benchmark", "see Pipeline.get_neg_benchmark")
+        neg.add_argument("--neg-iters-start", type=int, default=100)
+        neg.add_argument("--neg-change-limit", type=float, default=1)
+        neg.add_argument("--neg-iter-spacing", type=int, default=1000)
+        neg.add_argument("--neg-max-iterations", type=int, default=5000)
+        neg.add_argument("--neg-mean-rtol", type=float, default=None, help="change limit relative to the mean, added to --neg-change-limit")
+        neg.add_argument("--neg-residual-atol", type=float, default=None, help="also stop when every expected degree is within atol + rtol*degree")
+        neg.add_argument("--neg-residual-rtol", type=float, default=None, help="see --neg-residual-atol")
+        parser.add_argument("--solver", choices=["picard", "anderson", "newton"], default="picard", help="solver of both benchmarks")
+
+        run = parser.add_argument_group("execution")
+        run.add_argument("--workers", type=int, default=1, help="number of worker processes, by default 1")
+        run.add_argument("--seed", type=int, default=None, help="seed of the batch, pair i is seeded from (seed, i)")
+        run.add_argument("--store-size", type=int, default=256, help="fitted alphas kept in memory per process, 0 disables, by default 256")
+        run.add_argument("--store-path", default=None, help="directory of the on-disk alpha store shared by the workers")
+
+        out = parser.add_argument_group("output")
+        out.add_argument("--format", choices=["tsv", "json"], default="tsv", help="TSV with a header, or one JSON object per line")
+        out.add_argument("--output", default="-", help="output file, by default - meaning the standard output")
+        out.add_argument("--unordered", action="store_true", help="write the rows as the pairs finish instead of in input order")
+        return parser
+
+    @staticmethod
+    def read_manifest(path: str):
+        """read_manifest Read the pairs of a manifest file.
+
+        Returns
+        -------
+        list(tuple)
+            (path1, path2, pool_path) of each pair, pool_path is None if not given.
+        """
+        root = os.path.dirname(path)
+        pairs = []
+        with open(path) as f:
+            for n, line in enumerate(f, 1):
+                fields = [field.strip() for field in line.rstrip("\r\n").split("\t")]
+                if not fields[0] or fields[0].startswith("#"):
+                    continue
+                if len(fields) not in (2, 3):
+                    raise ValueError("%s line %d: expected path1, path2 and optionally the pool path, got %d fields" % (path, n, len(fields)))
+                paths = [os.path.join(root, field) if field else None for field in fields]
+                pairs.append(tuple(paths) if len(paths) == 3 else (paths[0], paths[1], None))
+        return pairs
+
+    @staticmethod
+    def format_row(row: dict, fmt: str):
+        """format_row Format a row of Batch.score_pairs as a TSV line or a JSON line.
+
+        NaN values are written as nan in TSV and null in JSON. In TSV only the last line of the error, the exception, is kept.
+        """
+        if fmt == "json":
+            values = {col: None if isinstance(row[col], float) and math.isnan(row[col]) else row[col] for col in Cli.COLUMNS}
+            return json.dumps(values, default=lambda value: value.item())
+        values = []
+        for col in Cli.COLUMNS:
+            value = row[col]
+            if value is None:
+                value = ""
+            elif col == "Error":
+                value = value.strip().splitlines()[-1]
+            values.append(str(value).replace("\t", " "))
+        return "\t".join(values)
+
+    @staticmethod
+    def main(argv: list=None):
+        """main Run the command.
+
+        Parameters
+        ----------
+        argv : list, optional
+            The arguments, by default None, meaning sys.argv[1:].
+
+        Returns
+        -------
+        int
+            The exit status: 0 if all the pairs were scored, 1 if any pair failed.
+        """
+        parser = Cli.parser()
+        args = parser.parse_args(argv)
+        if args.manifest is not None:
+            if args.network1 is not None or args.pool is not None:
+                parser.error("--manifest cannot be combined with network files or --pool")
+            pairs = Cli.read_manifest(args.manifest)
+        elif args.network2 is None:
+            parser.error("give network1 and network2, or --manifest")
+        else:
+            pairs = [(args.network1, args.network2, args.pool)]
+        try:
+            columns = tuple(int(col) for col in args.columns.split(","))
+        except ValueError:
+            columns = ()
+        if len(columns) != 2:
+            parser.error("--columns should be two column indices, e.g. 0,1")
+
+        read_kwargs = dict(sep=None if args.sep == "whitespace" else args.sep, columns=columns, comment=args.comment, skiprows=args.skiprows)
+        pos_kwargs = dict(iters_start=args.pos_iters_start, pos_change_limit=args.pos_change_limit, iter_spacing=args.pos_iter_spacing,
+                          max_iterations=args.pos_max_iterations, solver=args.solver, mean_rtol=args.pos_mean_rtol,
+                          residual_atol=args.pos_residual_atol, residual_rtol=args.pos_residual_rtol, compress=args.pos_compress)
+        neg_kwargs = dict(iters_start=args.neg_iters_start, neg_change_limit=args.neg_change_limit, iter_spacing=args.neg_iter_spacing,
+                          max_iterations=args.neg_max_iterations, solver=args.solver, mean_rtol=args.neg_mean_rtol,
+                          residual_atol=args.neg_residual_atol, residual_rtol=args.neg_residual_rtol)
+        rows = Batch.score_pairs(pairs, n_jobs=args.workers, ordered=not args.unordered, stream=True, seed=args.seed,
+                                 pos_kwargs=pos_kwargs, neg_kwargs=neg_kwargs, store_size=args.store_size, store_path=args.store_path,
+                                 read_kwargs=read_kwargs)
+
+        out = sys.stdout if args.output == "-" else open(args.output, "w")
+        failed = 0
+        try:
+            if args.format == "tsv":
+                out.write("\t".join(Cli.COLUMNS) + "\n")
+            for row in rows:
+                row["Network1"], row["Network2"], row["Pool"] = pairs[row["Pair"]]
+                if row["Error"] is not None:
+                    failed += 1
+                    sys.stderr.write("pair %d (%s, %s) failed:\n%s" % (row["Pair"], row["Network1"], row["Network2"], row["Error"]))
+                out.write(Cli.format_row(row, args.format) + "\n")
+                out.flush()
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        return 1 if failed else 0
+
+
+def main():
+    """main The console entry point."""
+    sys.exit(Cli.main())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import numpy as np
+
+
+class Convergence:
+    """ Stopping rule of optimize_pos and optimize_neg, checked every iter_spacing sweeps.
+
+    The fit stops at the first check where either test passes:
+        residual: every node has |E[k]-k| <= residual_atol + residual_rtol*k, the degrees are matched whatever the size of the network
+        mean: |mean - mean_prev| < change_limit + mean_rtol*|mean|, the benchmark mean stopped moving
+    and the status tells which one, "residual" before "mean" if both pass. A solver that stopped itself at its residual tol, see
+    IterationState, also gives "residual". A fit stopped by max_iterations has the status "max_iterations". The residual test is
+    off unless residual_atol or residual_rtol is given, it costs one extra update per check.
+    """
+
+    STATUSES = ("residual", "mean", "max_iterations")
+
+    def __init__(self, change_limit: float=1, mean_rtol: float=None, residual_atol: float=None, residual_rtol: float=None) -> None:
+        """__init__ initialize the stopping rule
+
+        Parameters
+        ----------
+        change_limit : float, optional
+            The absolute tolerance on the change of the benchmark mean between two checks, by default 1.
+        mean_rtol : float, optional
+            The tolerance on the change of the benchmark mean relative to the mean, by default None, meaning 0.
+        residual_atol : float, optional
+            The absolute tolerance on the expected-degree residual of every node, by default None, meaning 0.
+        residual_rtol : float, optional
+            The tolerance on the expected-degree residual relative to the degree of every node, by default None, meaning 0.
+        """
+        self.change_limit = change_limit
+        self.mean_rtol = mean_rtol or 0
+        self.residual_test = residual_atol is not None or residual_rtol is not None
+        self.residual_atol = residual_atol or 0
+        self.residual_rtol = residual_rtol or 0
+
+    def residual_met(self, residuals, degree_value):
+        """residual_met Check the residual test.
+
+        Parameters
+        ----------
+        residuals : np.ndarray
+            The expected-degree residual E[k]-k of every iterated alpha, see IterationState.residuals.
+        degree_value : np.ndarray
+            The reference degrees of the iterated alphas.
+
+        Returns
+        -------
+        bool
+            True if the test is on and every residual is within the tolerance.
+        """
+        return self.residual_test and bool(np.all(np.abs(residuals) <= self.residual_atol + self.residual_rtol * degree_value))
+
+    def mean_met(self, mean, mean_prev):
+        """mean_met Check the mean test, never met at the first check.
+        """
+        return mean_prev is not None and abs(mean - mean_prev) < self.change_limit + self.mean_rtol * abs(mean)
+
+    def check(self, residuals, degree_value, mean, mean_prev=None, converged=False):
+        """check Check both tests at a check of the fit.
+
+        Parameters
+        ----------
+        residuals : np.ndarray or None
+            The expected-degree residuals, only needed by the residual test.
+        degree_value : np.ndarray
+            The reference degrees of the iterated alphas.
+        mean : float
+            The benchmark mean at this check.
+        mean_prev : float, optional
+            The benchmark mean at the previous check, by default None, meaning this is the first check.
+        converged : bool, optional
+            Whether the solver stopped at its residual tol, by default False.
+
+        Returns
+        -------
+        str or None
+            "residual" or "mean" if the fit has converged, else None.
+        """
+        if converged or self.residual_met(residuals, degree_value):
+            return "residual"
+        if self.mean_met(mean, mean_prev):
+            return "mean"
+        return None
@@ -1,5 +1,5 @@
 from collections import defaultdict
-import networkx as nx
+import numpy as np
 
 class Formatter:
     
@@ -27,23 +27,48 @@ class Formatter:
         edgelist: Output network in edgelist format like [("A","B"),("B","C")]
 
         '''
-        edgelist = []
-        for nodeArr in N.keys():
-            for neighbor in N[nodeArr]:
-                if (nodeArr,neighbor) not in edgelist and (neighbor,nodeArr) not in edgelist:
-                    edgelist.append(tuple(sorted((nodeArr,neighbor))))
+        edgelist = {tuple(sorted((nodeArr,neighbor))) for nodeArr in N.keys() for neighbor in N[nodeArr]}
         return sorted(edgelist)
     
     @staticmethod
-    def neighborhood_to_adjacency(N):
+    def edgelist_to_csr(edgelist, nodelist):
         '''
-        neighborhood_to_adjacency(N)
+        edgelist_to_csr(edgelist,nodelist)
+
+        Build the symmetric adjacency matrix of a network as a scipy.sparse CSR matrix, in O(E) time and memory.
+
+        Parameters
+        ----------
+        edgelist: Input network in edgelist formation.
+        nodelist: The nodes of the rows and columns, must contain all nodes of edgelist.
+
+        Returns
+        -------
+        A: scipy.sparse.csr_matrix with A[i,j] = 1 if nodelist[i] and nodelist[j] are connected, self-interactions on the diagonal.
+        '''
+        import scipy.sparse  # only the adjacency conversions need scipy
+
+        node2idx = {node: i for i, node in enumerate(nodelist)}
+        links = {tuple(sorted((node2idx[node1],node2idx[node2]))) for node1,node2 in edgelist}
+        pairs = np.array(sorted(links), dtype=np.int64).reshape(-1, 2)
+        offdiag = pairs[pairs[:, 0] != pairs[:, 1]]
+        rows = np.concatenate([pairs[:, 0], offdiag[:, 1]])
+        cols = np.concatenate([pairs[:, 1], offdiag[:, 0]])
+        A = scipy.sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(nodelist), len(nodelist)))
+        A.sort_indices()
+        return A
+
+    @staticmethod
+    def neighborhood_to_adjacency(N, sparse: bool=False):
+        '''
+        neighborhood_to_adjacency(N,sparse=False)
 
         Convert network in neighborhood format to adjacency matrix format.
 
         Parameters
         ----------
         N: Input network in neighborhood formation. For example, N = {"A": {"B", "C"},"B":{"A"},"C":{"A"}}
+        sparse: If True, return a scipy.sparse CSR matrix instead of a dense N*N array.
 
         Returns
         -------
@@ -51,29 +76,27 @@ class Formatter:
         A: Output network in adjacency matrix function.
         '''
         nodelist = sorted(N.keys())
-        edgelist = Formatter.neighborhood_to_edgelist(N)
-        G = nx.from_edgelist(edgelist)
-        A = nx.to_numpy_matrix(G,nodelist=nodelist)
-        return nodelist,A
+        edgelist = ((nodeArr,neighbor) for nodeArr in N.keys() for neighbor in N[nodeArr])
+        A = Formatter.edgelist_to_csr(edgelist,nodelist)
+        return nodelist, A if sparse else A.toarray()
 
     @staticmethod
-    def edgelist_to_adjacency(edgelist):
+    def edgelist_to_adjacency(edgelist, sparse: bool=False):
         '''
-        edgelist_to_adjacency(edgelist)
+        edgelist_to_adjacency(edgelist,sparse=False)
 
         Convert network in edgelist format to adjacency matrix format.
 
         Parameters
         ----------
         N: Input network in edgelist formation.
+        sparse: If True, return a scipy.sparse CSR matrix instead of a dense N*N array.
 
         Returns
         -------
         nodelist: sorted nodelist corresponds to the adjacency matrix.
         A: Output network in adjacency matrix function.
         '''
-        N = Formatter.edgelist_to_neighborhood(edgelist)
-        nodelist = sorted(N.keys())
-        G = nx.from_edgelist(edgelist)
-        A = nx.to_numpy_matrix(G,nodelist=nodelist)
-        return nodelist,A
\ No newline at end of file
+        nodelist = sorted({node for link in edgelist for node in link})
+        A = Formatter.edgelist_to_csr(edgelist,nodelist)
+        return nodelist, A if sparse else A.toarray()
@@ -0,0 +1,173 @@
+from .Helper import Helper
+import numpy as np
+
+
+class Graph:
+    """ Compact undirected network on the integer node ids 0..n_nodes-1, e.g. the ids given by Helper.covert2id.
+
+    Every link is stored once as (src[e], dst[e]) with src[e] <= dst[e] in two int32 arrays, sorted and without duplicates.
+    The adjacency without self-interactions is kept in CSR form: the neighbors of node i are indices[indptr[i]:indptr[i+1]]
+    and degrees[i] is their number. self_nodes are the nodes with a self-interaction. No python object is kept per link.
+    """
+
+    __slots__ = ("n_nodes", "src", "dst", "indptr", "indices", "degrees", "self_nodes")
+
+    def __init__(self, src, dst, n_nodes: int=None) -> None:
+        """__init__ initialize the network from the two ends of its links
+
+        Parameters
+        ----------
+        src : array_like
+            The first node id of each link.
+        dst : array_like
+            The second node id of each link. The order of the two ends, the order of the links and duplicated links do not matter.
+        n_nodes : int, optional
+            The number of node ids, by default None, meaning the largest node id plus one.
+        """
+        src = np.asarray(src, dtype=np.int64).reshape(-1)
+        dst = np.asarray(dst, dtype=np.int64).reshape(-1)
+        if len(src) != len(dst):
+            raise ValueError("src and dst should have the same length, got %d and %d" % (len(src), len(dst)))
+        lo, hi = np.minimum(src, dst), np.maximum(src, dst)
+        n = int(hi.max()) + 1 if len(hi) else 0
+        if n_nodes is None:
+            n_nodes = n
+        elif n_nodes < n:
+            raise ValueError("n_nodes should be larger than the largest node id %d, got %d" % (n - 1, n_nodes))
+        if len(lo) and lo.min() < 0:
+            raise ValueError("node ids should be non-negative")
+        # sort and remove duplicated links through a single int64 code per link
+        lo, hi = np.divmod(Helper.sorted_unique(lo * max(n_nodes, 1) + hi), max(n_nodes, 1))
+        self.n_nodes = n_nodes
+        self.src = lo.astype(np.int32)
+        self.dst = hi.astype(np.int32)
+        loop = lo == hi
+        self.self_nodes = self.src[loop]
+        rows = np.concatenate([lo[~loop], hi[~loop]])
+        cols = np.concatenate([hi[~loop], lo[~loop]])
+        order = np.lexsort((cols, rows))
+        self.indices = cols[order].astype(np.int32)
+        self.degrees = np.bincount(rows, minlength=n_nodes).astype(np.int32)
+        self.indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+        np.cumsum(self.degrees, out=self.indptr[1:])
+
+    @staticmethod
+    def from_edgelist(elist, n_nodes: int=None):
+        """from_edgelist Build the network from an edge list of integer node ids.
+
+        Parameters
+        ----------
+        elist : list(tuple) or np.ndarray
+            The links, e.g. [(0, 1), (1, 2)], or an (E, 2) array.
+        n_nodes : int, optional
+            The number of node ids, by default None, meaning the largest node id plus one.
+
+        Returns
+        -------
+        Graph
+            The network.
+        """
+        links = np.asarray(elist, dtype=np.int64).reshape(-1, 2)
+        return Graph(links[:, 0], links[:, 1], n_nodes=n_nodes)
+
+    @staticmethod
+    def union(G1, G2):
+        """union The network with the links of both networks, e.g. the default pool of two networks.
+
+        Returns
+        -------
+        Graph
+            The union of G1 and G2.
+        """
+        return Graph(np.concatenate([G1.src, G2.src]), np.concatenate([G1.dst, G2.dst]), n_nodes=max(G1.n_nodes, G2.n_nodes))
+
+    @staticmethod
+    def count_overlap(G1, G2):
+        """count_overlap Count the links in both networks, the observed overlap of Pipeline.
+
+        The links are undirected, (u, v) in one network and (v, u) in the other are the same link.
+
+        Returns
+        -------
+        int
+            The number of links of G1 that are also links of G2.
+        """
+        n = max(G1.n_nodes, G2.n_nodes, 1)
+        code1 = G1.src.astype(np.int64) * n + G1.dst
+        code2 = G2.src.astype(np.int64) * n + G2.dst
+        return int(np.isin(code1, code2, assume_unique=True).sum())
+
+    @property
+    def n_edges(self):
+        """n_edges The number of links, including self-interactions."""
+        return len(self.src)
+
+    @property
+    def nbytes(self):
+        """nbytes The memory used by the arrays of the network."""
+        return sum(getattr(self, name).nbytes for name in ("src", "dst", "indptr", "indices", "degrees", "self_nodes"))
+
+    def nodes(self):
+        """nodes The nodes with at least one link besides self-interactions, the nodes of Helper.dict_remove_self(neighborhood).
+
+        Returns
+        -------
+        np.ndarray
+            The sorted node ids.
+        """
+        return np.flatnonzero(self.degrees)
+
+    def edgelist(self):
+        """edgelist Convert the network to edge list format.
+
+        Returns
+        -------
+        list(tuple)
+            The links as (src, dst) tuples of python ints.
+        """
+        return list(zip(self.src.tolist(), self.dst.tolist()))
+
+    def subgraph(self, mask):
+        """subgraph The network with the links selected by mask.
+
+        Parameters
+        ----------
+        mask : np.ndarray
+            Boolean array following the order of the links.
+
+        Returns
+        -------
+        Graph
+            The network with the selected links and the same node ids.
+        """
+        return Graph(self.src[mask], self.dst[mask], n_nodes=self.n_nodes)
+
+    def alphas_array(self, alphas, n_nodes: int=None):
+        """alphas_array Convert alphas to an array indexed by node id, NaN for the nodes without alpha.
+
+        Parameters
+        ----------
+        alphas : dict or np.ndarray
+            The alphas of each node id, or an array already indexed by node id.
+        n_nodes : int, optional
+            The length of the array, by default None, meaning the number of node ids of the network.
+
+        Returns
+        -------
+        np.ndarray
+            The alpha of each node id.
+        """
+        n_nodes = self.n_nodes if n_nodes is None else n_nodes
+        values = np.full(n_nodes, np.nan)
+        if isinstance(alphas, dict):
+            keys = np.fromiter(alphas.keys(), dtype=np.int64, count=len(alphas))
+            vals = np.fromiter(alphas.values(), dtype=float, count=len(alphas))
+            keep = keys < n_nodes
+            values[keys[keep]] = vals[keep]
+        else:
+            alphas = np.asarray(alphas, dtype=float)
+            values[:min(n_nodes, len(alphas))] = alphas[:n_nodes]
+        return values
+
+    def __repr__(self) -> str:
+        return "Graph(n_nodes=%d, n_edges=%d)" % (self.n_nodes, self.n_edges)
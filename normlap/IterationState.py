@@ -0,0 +1,136 @@
+from .Solver import Solver
+import numpy as np
+
+
+class IterationState:
+    """ Warm-started, resumable state of the alpha iterations.
+
+    The state keeps the current alphas and the number of sweeps done so far, advance(iters) continues from where the previous call
+    stopped, including the Anderson history. With a tol, the sweeps stop as soon as the residual is below it and converged is set.
+    Every snapshot is a new object, so snapshots taken at different checks never alias each other or the state.
+    """
+
+    def __init__(self, update, degree_value, alphas_value, nodelist, inverse=None, solver: str="picard", jacobian=None,
+                 tol: float=None) -> None:
+        """__init__ initialize the state
+
+        Parameters
+        ----------
+        update : function
+            The fixed-point update of the alphas, see Solver.solve.
+        degree_value : np.ndarray
+            The reference degrees of the iterated alphas.
+        alphas_value : np.ndarray
+            The initial alphas.
+        nodelist : list
+            The nodes of the network.
+        inverse : np.ndarray, optional
+            The index of the iterated alpha of each node in nodelist, by default None, meaning one alpha per node.
+        solver : str, optional
+            "picard", "anderson" or "newton", by default "picard".
+        jacobian : function, optional
+            The Jacobian of the expected degrees, required by the newton solver, by default None.
+        tol : float, optional
+            Stop advancing once the maximum absolute expected-degree residual is below tol, by default None, meaning never.
+        """
+        self.update = update
+        self.degree_value = degree_value
+        self.alphas_value = np.array(alphas_value, dtype=float)
+        self.nodelist = nodelist
+        self.inverse = inverse
+        self.solver = solver
+        self.jacobian = jacobian
+        self.tol = tol
+        self.sweeps = 0
+        self.converged = False
+        self.history = {}
+
+    def advance(self, iters: int):
+        """advance Run iters more sweeps from the current alphas, fewer if the residual gets below tol.
+
+        All the solvers continue the iterations of the previous call, advance(a) then advance(b) gives the same alphas as
+        advance(a+b). Once converged, advance does no sweep.
+
+        Parameters
+        ----------
+        iters : int
+            The number of sweeps.
+
+        Returns
+        -------
+        IterationState
+            The state itself.
+        """
+        if self.solver == "picard" and self.tol is None:
+            for _ in range(iters):
+                self.alphas_value = self.update(self.alphas_value)
+            done = iters
+        else:
+            self.alphas_value, done, _ = Solver.solve(self.update, self.degree_value, self.alphas_value, solver=self.solver,
+                                                      tol=self.tol, max_iters=iters, jacobian=self.jacobian, history=self.history)
+            self.converged = done < iters
+        self.sweeps += done
+        return self
+
+    def restore(self, alphas_value, sweeps: int, converged: bool=False):
+        """restore Jump to previously computed alphas, e.g. from an AlphaStore. The Anderson history starts again from them.
+
+        Parameters
+        ----------
+        alphas_value : np.ndarray
+            The iterated alphas.
+        sweeps : int
+            The number of sweeps that led to alphas_value.
+        converged : bool, optional
+            Whether the residual of alphas_value is below tol, by default False.
+
+        Returns
+        -------
+        IterationState
+            The state itself.
+        """
+        self.alphas_value = np.array(alphas_value, dtype=float)
+        self.sweeps = sweeps
+        self.converged = converged
+        self.history = {}
+        return self
+
+    def values(self):
+        """values The current alphas of the nodes following nodelist.
+
+        Returns
+        -------
+        np.ndarray
+            The alpha of each node.
+        """
+        return self.alphas_value if self.inverse is None else self.alphas_value[self.inverse]
+
+    def snapshot(self):
+        """snapshot Copy the current alphas of the nodes.
+
+        Returns
+        -------
+        dict
+            A new dictionary with the alpha of each node.
+        """
+        return dict(zip(self.nodelist, self.values()))
+
+    def residuals(self):
+        """residuals The expected-degree residual of the current alphas, it costs one update.
+
+        Returns
+        -------
+        np.ndarray
+            E[k]-k of every iterated alpha.
+        """
+        return Solver.residual(self.alphas_value, self.update(self.alphas_value), self.degree_value)
+
+    def residual(self):
+        """residual The maximum absolute expected-degree residual of the current alphas, it costs one update.
+
+        Returns
+        -------
+        float
+            The maximum of |E[k]-k| over the iterated alphas.
+        """
+        return np.abs(self.residuals()).max(initial=0)
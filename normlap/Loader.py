@@ -0,0 +1,128 @@
+from .Pipeline import Pipeline
+from itertools import islice
+import gc
+import gzip
+import numpy as np
+
+
+class Loader:
+    """ Read large edge files into integer edge arrays.
+
+    The files are read in chunks of lines and the node names are interned into integer ids in the same pass, so no python tuple
+    is kept per link: the memory is the node dictionary, one chunk of lines and the int32 edge arrays.
+    """
+
+    @staticmethod
+    def open_text(path: str):
+        """open_text Open a text file for reading, gzip compressed if path ends with .gz.
+        """
+        if path.endswith(".gz"):
+            return gzip.open(path, "rt")
+        return open(path)
+
+    @staticmethod
+    def guess_sep(path: str):
+        """guess_sep The column separator of a file, "," for .csv(.gz), else None, meaning any whitespace.
+        """
+        return "," if path[:-3 if path.endswith(".gz") else None].endswith(".csv") else None
+
+    @staticmethod
+    def read_edges(path: str, node2id: dict=None, sep: str="auto", columns: tuple=(0, 1), comment: str="#", skiprows: int=0,
+                   chunksize: int=2**20):
+        """read_edges Read the links of an edge file as an integer array.
+
+        Parameters
+        ----------
+        path : str
+            The TSV/CSV edge file, gzip compressed if it ends with .gz.
+        node2id : dict, optional
+            The ids of the nodes already interned, e.g. from another file of the same comparison, by default None.
+            New nodes are added to it in place and get the next free ids.
+        sep : str, optional
+            The column separator, by default "auto", see guess_sep. None splits on any whitespace.
+        columns : tuple, optional
+            The columns of the two nodes of a link, by default (0, 1).
+        comment : str, optional
+            Lines starting with comment are skipped, by default "#". Empty lines and lines without both columns are always skipped.
+        skiprows : int, optional
+            The number of header lines to skip, by default 0.
+        chunksize : int, optional
+            The number of lines parsed at once, by default 2**20.
+
+        Returns
+        -------
+        np.ndarray, dict
+            The (E, 2) int32 array of the node ids of each link, node2id.
+        """
+        node2id = {} if node2id is None else node2id
+        sep = Loader.guess_sep(path) if sep == "auto" else sep
+        col1, col2 = columns
+        # the parsed lines only live for one chunk, the cyclic garbage collector would only slow down their allocation
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            chunks = Loader.read_chunks(path, node2id, sep, col1, col2, comment, skiprows, chunksize)
+        finally:
+            if gc_enabled:
+                gc.enable()
+        if not chunks:
+            return np.zeros((0, 2), dtype=np.int32), node2id
+        return np.concatenate(chunks), node2id
+
+    @staticmethod
+    def read_chunks(path, node2id, sep, col1, col2, comment, skiprows, chunksize):
+        """read_chunks Parse the file chunk by chunk, see read_edges.
+
+        Returns
+        -------
+        list(np.ndarray)
+            The (e, 2) int32 array of the node ids of the links of each chunk.
+        """
+        chunks = []
+        width = max(col1, col2)
+        with Loader.open_text(path) as f:
+            for _ in islice(f, skiprows):
+                pass
+            while True:
+                lines = list(islice(f, chunksize))
+                if not lines:
+                    break
+                rows = [line.rstrip("\r\n").split(sep) for line in lines]
+                # blank lines split into [] with sep None and [""] otherwise, rows without both columns are skipped too
+                names = [row[c].strip() for row in rows if len(row) > width and row[0] and not (comment and row[0].startswith(comment))
+                         for c in (col1, col2)]
+                intern = node2id.setdefault
+                ids = np.fromiter((intern(name, len(node2id)) for name in names), dtype=np.int32, count=len(names))
+                chunks.append(ids.reshape(-1, 2))
+        return chunks
+
+    @staticmethod
+    def load_pipeline(path1: str, path2: str, pool_path: str=None, sep: str="auto", columns: tuple=(0, 1), comment: str="#",
+                      skiprows: int=0, chunksize: int=2**20, **kwargs):
+        """load_pipeline Read two networks, and optionally the pool, with shared node ids and create the Pipeline from the arrays.
+
+        Parameters
+        ----------
+        path1 : str
+            The edge file of network1.
+        path2 : str
+            The edge file of network2.
+        pool_path : str, optional
+            The edge file of the pool, by default None, meaning the pool is the union of the two networks.
+        sep, columns, comment, skiprows, chunksize :
+            See read_edges.
+        kwargs :
+            The keyword arguments of Pipeline, e.g. store or n_jobs.
+
+        Returns
+        -------
+        Pipeline
+            The pipeline, its id2node maps the integer ids back to the node names.
+        """
+        node2id = {}
+        options = dict(node2id=node2id, sep=sep, columns=columns, comment=comment, skiprows=skiprows, chunksize=chunksize)
+        edges1, _ = Loader.read_edges(path1, **options)
+        edges2, _ = Loader.read_edges(path2, **options)
+        pool = Loader.read_edges(pool_path, **options)[0] if pool_path is not None else None
+        id2node = list(node2id.keys())  # dictionaries keep the insertion order, which is the id order
+        return Pipeline(edges1, edges2, pool, id2node=id2node, **kwargs)
@@ -0,0 +1,145 @@
+from .Pipeline import Pipeline
+from .Graph import Graph
+import json
+import os
+import struct
+import zipfile
+import numpy as np
+
+
+class Model:
+    """ Save the fitted alphas of a Pipeline to one .npz file and load them back without refitting.
+
+    The file holds the node of each id, the links of both networks and of the pool, one alpha array per fitted model indexed by node id,
+    and a JSON "meta" entry with the settings and convergence metadata. The arrays are stored uncompressed, so load_arrays can
+    memory-map them read-only and many processes can share one model file.
+    """
+
+    VERSION = 1
+
+    @staticmethod
+    def save(pipe: Pipeline, path: str):
+        """save Save the fitted alphas of a pipeline.
+
+        Parameters
+        ----------
+        pipe : Pipeline
+            The pipeline. All the alphas in its alphas_cache are saved, i.e. both benchmarks and both directions once fitted.
+        path : str
+            The file, usually ending with .npz. It is replaced atomically.
+        """
+        n_nodes = len(pipe.id2node)
+        id2node = np.array([pipe.id2node[i] for i in range(n_nodes)])
+        if id2node.dtype.kind not in "iuU":
+            raise ValueError("the nodes should be all str or all int to be saved, got %s" % id2node.dtype)
+        pool = pipe.poolgraph if "poolgraph" in pipe.__dict__ else Graph.from_edgelist(pipe.poollist, n_nodes=n_nodes)
+        arrays = {"id2node": id2node}
+        for name, graph in (("edges1", pipe.graph1), ("edges2", pipe.graph2), ("pool", pool)):
+            arrays[name] = np.stack([graph.src, graph.dst], axis=1)
+        entries = []
+        for i, (key, entry) in enumerate(pipe.alphas_cache.items()):
+            kind, idx, settings = key
+            arrays["alphas%d" % i] = pipe.graph1.alphas_array(entry["alphas"], n_nodes)
+            entries.append({"kind": kind, "idx": idx, "settings": settings, "cur_iter": entry.get("cur_iter"),
+                            "status": entry.get("status")})
+        meta = {"version": Model.VERSION, "obs": pipe.obs, "pos_iter": pipe.pos_iter, "neg_iter": pipe.neg_iter,
+                "pos_settings": pipe.pos_settings, "neg_settings": pipe.neg_settings, "entries": entries}
+        arrays["meta"] = np.array(json.dumps(meta, default=lambda value: value.item()))
+        tmp = path + ".%d.tmp" % os.getpid()
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load_arrays(path: str, mmap_mode: str="r"):
+        """load_arrays Load the arrays of a model file, memory-mapped.
+
+        Parameters
+        ----------
+        path : str
+            The file written by save.
+        mmap_mode : str, optional
+            The mode of np.memmap, by default "r", meaning read-only. None reads the arrays into memory.
+
+        Returns
+        -------
+        dict
+            The arrays of the file.
+        """
+        if mmap_mode is None:
+            with np.load(path, allow_pickle=False) as data:
+                return {name: data[name] for name in data.files}
+        arrays = {}
+        with zipfile.ZipFile(path) as zf, open(path, "rb") as f:
+            for info in zf.infolist():
+                if info.compress_type != zipfile.ZIP_STORED:
+                    raise ValueError("%s is compressed and cannot be memory-mapped, load it with mmap_mode=None" % info.filename)
+                # skip the local file header of the member, then the .npy header
+                f.seek(info.header_offset + 26)
+                name_length, extra_length = struct.unpack("<HH", f.read(4))
+                f.seek(info.header_offset + 30 + name_length + extra_length)
+                version = np.lib.format.read_magic(f)
+                read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+                shape, fortran_order, dtype = read_header(f)
+                name = info.filename[:-len(".npy")]
+                if dtype.hasobject:
+                    raise ValueError("%s holds python objects and cannot be memory-mapped" % name)
+                if int(np.prod(shape)) == 0:
+                    arrays[name] = np.zeros(shape, dtype=dtype)
+                else:
+                    arrays[name] = np.memmap(path, dtype=dtype, mode=mmap_mode, offset=f.tell(), shape=shape,
+                                             order="F" if fortran_order else "C")
+        return arrays
+
+    @staticmethod
+    def as_tuple(value):
+        """as_tuple Convert the lists of a JSON value back to tuples, e.g. the settings in the keys of alphas_cache.
+        """
+        return tuple(Model.as_tuple(v) for v in value) if isinstance(value, list) else value
+
+    @staticmethod
+    def load(path: str, mmap_mode: str="r", **kwargs):
+        """load Create a Pipeline from a model file with all the saved alphas, nothing is refitted.
+
+        The benchmarks of the last get_pos_benchmark and get_neg_benchmark calls are recomputed from the saved alphas, so show_results,
+        the instance samplers and the overlap simulations can be called directly.
+
+        Parameters
+        ----------
+        path : str
+            The file written by save.
+        mmap_mode : str, optional
+            See load_arrays, by default "r".
+        kwargs :
+            The keyword arguments of Pipeline, e.g. store or n_jobs.
+
+        Returns
+        -------
+        Pipeline
+            The pipeline, created from integer arrays with id2node.
+        """
+        arrays = Model.load_arrays(path, mmap_mode)
+        meta = json.loads(str(arrays["meta"][()]))
+        if meta["version"] > Model.VERSION:
+            raise ValueError("%s has model version %d, this version of normlap reads up to %d" % (path, meta["version"], Model.VERSION))
+        id2node = arrays["id2node"].tolist()
+        n_nodes = len(id2node)
+        graphs = [Graph(arrays[name][:, 0], arrays[name][:, 1], n_nodes=n_nodes) for name in ("edges1", "edges2", "pool")]
+        pipe = Pipeline(*graphs, id2node=id2node, **kwargs)
+        pipe.obs = meta["obs"]
+        pipe.pos_iter, pipe.neg_iter = meta["pos_iter"], meta["neg_iter"]
+        for i, entry in enumerate(meta["entries"]):
+            values = arrays["alphas%d" % i]
+            nodes = np.flatnonzero(~np.isnan(values))
+            alphas = dict(zip(nodes.tolist(), np.asarray(values[nodes]).tolist()))
+            kind, idx, settings = entry["kind"], entry["idx"], Model.as_tuple(entry["settings"])
+            if settings[0] == "benchmark":
+                pipe.alphas_cache[(kind, idx, settings)] = {"alphas": alphas, "cur_iter": entry["cur_iter"],
+                                                             "status": entry.get("status")}
+            else:
+                pipe.alphas_cache[(kind, idx, settings)] = pipe.pos_entry(idx, alphas) if kind=="pos" else pipe.neg_entry(idx, alphas)
+        if meta["pos_settings"] is not None:
+            pipe.get_pos_benchmark(**meta["pos_settings"])
+        if meta["neg_settings"] is not None:
+            pipe.get_neg_benchmark(**meta["neg_settings"])
+        return pipe
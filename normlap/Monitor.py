@@ -0,0 +1,100 @@
+import json
+import math
+
+
+class Monitor:
+    """ Record the convergence metrics reported by the alpha solvers, e.g. to tune the stopping parameters from production runs.
+
+    A Monitor is a callback: pass it as callback to Solver.solve, RandomNetwork.optimize_neg, RandomSubnetwork.optimize_pos, the
+    optimize_alpha_with_stop functions or Pipeline. Every report is a dict with the keys of FIELDS:
+        kind: the reporting function, e.g. "optimize_pos"
+        sweeps: the number of sweeps done
+        residual: the maximum absolute expected-degree residual E[k]-k of the alphas
+        max_rel_change: the maximum relative change of the alphas since the previous report
+        mean, mean_delta: the benchmark mean and its change since the previous check, only reported by optimize_pos and optimize_neg
+        wall_time: the seconds since the fit started
+    Unknown values are None. Pipeline adds the key "idx", the direction of the fit.
+
+    Only every every-th report is kept. When more than maxlen records are kept, every other record is dropped and every is doubled,
+    so the memory stays bounded and the records still cover the whole run evenly.
+    """
+
+    FIELDS = ["kind", "sweeps", "residual", "max_rel_change", "mean", "mean_delta", "wall_time"]
+
+    def __init__(self, every: int=1, maxlen: int=10000) -> None:
+        """__init__ initialize an empty recorder
+
+        Parameters
+        ----------
+        every : int, optional
+            Keep one report out of every, by default 1, meaning all the reports.
+        maxlen : int, optional
+            The maximum number of records kept, by default 10000.
+        """
+        if every < 1 or maxlen < 2:
+            raise ValueError("every should be at least 1 and maxlen at least 2, got %d and %d" % (every, maxlen))
+        self.every = every
+        self.maxlen = maxlen
+        self.calls = 0
+        self.records = []
+
+    def __call__(self, metrics: dict):
+        """__call__ Receive one report, see the class docstring.
+        """
+        keep = self.calls % self.every == 0
+        self.calls += 1
+        if not keep:
+            return
+        self.records.append(dict(metrics))
+        if len(self.records) > self.maxlen:
+            # the kept records are the reports 0, every, 2*every, ..., keeping every other one keeps the multiples of 2*every
+            self.records = self.records[::2]
+            self.every *= 2
+
+    def clear(self):
+        """clear Drop all the records, every is kept.
+        """
+        self.calls = 0
+        self.records = []
+
+    def columns(self):
+        """columns The records as columns, pandas.DataFrame(monitor.columns()) gives a table.
+
+        Returns
+        -------
+        dict
+            The list of the values of each key, None where a record has no value.
+        """
+        keys = list(Monitor.FIELDS)
+        keys += sorted({key for record in self.records for key in record} - set(keys))
+        return {key: [record.get(key) for record in self.records] for key in keys}
+
+    def to_json(self, path: str=None):
+        """to_json Export the records to JSON, NaN and infinite values are written as null.
+
+        Parameters
+        ----------
+        path : str, optional
+            The file to write, by default None, meaning only the JSON text is returned.
+
+        Returns
+        -------
+        str
+            {"every": the current cadence, "calls": the number of reports received, "records": the list of the kept records}.
+        """
+        records = [{key: Monitor.json_value(value) for key, value in record.items()} for record in self.records]
+        text = json.dumps({"every": self.every, "calls": self.calls, "records": records})
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
+
+    @staticmethod
+    def json_value(value):
+        """json_value Convert numpy scalars to python values and non-finite floats to None.
+        """
+        if hasattr(value, "item"):
+            value = value.item()
+        if isinstance(value, float) and not math.isfinite(value):
+            return None
+        return value
@@ -1,10 +1,11 @@
 
-from Helper import Helper
-from Formatter import Formatter
-from RandomNetwork import RandomNetwork
-from RandomSubnetwork import RandomSubnetwork
+from .Helper import Helper
+from .Formatter import Formatter
+from .RandomNetwork import RandomNetwork
+from .RandomSubnetwork import RandomSubnetwork
+from .AlphaStore import AlphaStore
+from .Graph import Graph
 import numpy as np
-import scipy
 
 # @TODO: add function to generate random network based on the optimized alpha
 
@@ -13,46 +14,354 @@ class Pipeline:
     This pipeline uses the default criterion for updating alphas as follows:
     1. The alphas for positive benchmark stop updating when the difference between the current and previous pos mean is less than 1.
     2. The alphas for negative benchmark stop updating when the difference between the current and previous neg mean is less than 1.
+    Relative change limits and tolerances on the expected-degree residual can be added, see Convergence; the status of each fit is
+    kept in status_pos1, status_pos2, status_neg1 and status_neg2.
     """
+
+    # optional settings of get_pos_benchmark and get_neg_benchmark and their defaults, left out of the settings when at the default
+    OPTIONAL_SETTINGS = {"mean_rtol": None, "residual_atol": None, "residual_rtol": None, "compress": False}
     
-    def __init__(self,elist1:list, elist2:list, poollist: list=None) -> None:
+    def __init__(self,elist1:list, elist2:list, poollist: list=None, store: AlphaStore=None, n_jobs: int=1, executor=None,
+                 id2node: list=None, seed=None, callback=None) -> None:
         """__init__ initialize the pipeline
 
         Parameters
         ----------
         elist1 : list
-            network1 in edge list format.
+            network1 in edge list format. If id2node is given, an (E, 2) array of node ids or a Graph.
         elist2 : list
-            network2 in edge list format.
+            network2 in edge list format. If id2node is given, an (E, 2) array of node ids or a Graph.
         poollist : list, optional
             The pool of generating the instance, by default None, meaning the pool is the union of the two network.
+            If id2node is given, an (E, 2) array of node ids or a Graph.
+        store : AlphaStore, optional
+            Store of fitted alphas shared between pipelines, by default None, meaning the alphas are only cached in this pipeline.
+            With parallel fits, the workers look up and save the alphas in a copy of the store, only its on-disk tier is shared.
+        n_jobs : int, optional
+            The number of worker processes running the directional fits of the benchmarks concurrently, by default 1, meaning serially.
+        executor : concurrent.futures.Executor, optional
+            An executor running the directional fits, by default None. If given, it is used instead of n_jobs and is not shut down
+            by the pipeline, so it can be shared by many pipelines.
+        id2node : list, optional
+            The node of each integer id, e.g. from Loader.read_edges, by default None. If given, the networks are integer arrays
+            that are kept as Graphs, and the edge lists and neighborhoods are only built when a method needs them.
+        seed : int, np.random.SeedSequence or np.random.Generator, optional
+            The seed of the instance samplers, by default None, meaning unseeded draws, see Helper.get_rng. The samplers draw from one
+            generator in sequence, so the same seed gives the same instances; give each task its own SeedSequence, e.g. spawned
+            from the seed of a batch, for independent streams across processes.
+        callback : function, optional
+            Called with the metrics of every check of the benchmark fits, e.g. a Monitor, by default None. The metrics also have the
+            key "kind", "optimize_pos" or "optimize_neg", and the key "idx" of the direction. Fits with a callback run serially,
+            and fits found in alphas_cache or the store are not reported again.
         """
-        # if the pool is not given
-        if poollist == None:
-            self.poollist = list(set(elist1).union(elist2))
-        else:
-            self.poollist = poollist
-
         self.pos_iter = 1000
         self.neg_iter = 1000
 
-        # convert node to node_ids
-        self.id2node, self.node2id = Helper.covert2id(self.poollist)
-        self.elist1 = [(self.node2id[node1],self.node2id[node2]) for node1,node2 in elist1]
-        self.elist2 = [(self.node2id[node1],self.node2id[node2]) for node1,node2 in elist2]
-        self.poollist = [(self.node2id[node1],self.node2id[node2]) for node1,node2 in self.poollist]
-
-        # convert to neighborhood
-        self.a1dict = Formatter.edgelist_to_neighborhood(self.elist1)
-        self.a2dict = Formatter.edgelist_to_neighborhood(self.elist2)
-
-        # observed overlap
-        self.obs = Helper.count_overlap(self.elist1, self.elist2)
+        if id2node is not None:
+            self.id2node = id2node
+            n_nodes = len(id2node)
+            self.graph1 = elist1 if isinstance(elist1, Graph) else Graph.from_edgelist(elist1, n_nodes=n_nodes)
+            self.graph2 = elist2 if isinstance(elist2, Graph) else Graph.from_edgelist(elist2, n_nodes=n_nodes)
+            if poollist is None:
+                self.poolgraph = Graph.union(self.graph1, self.graph2)
+            else:
+                self.poolgraph = poollist if isinstance(poollist, Graph) else Graph.from_edgelist(poollist, n_nodes=n_nodes)
+            # observed overlap of the undirected links
+            self.obs = Graph.count_overlap(self.graph1, self.graph2)
+        else:
+            # if the pool is not given
+            if poollist == None:
+                self.poollist = list(set(elist1).union(elist2))
+            else:
+                self.poollist = poollist
+
+            # convert node to node_ids
+            self.id2node, self.node2id = Helper.covert2id(self.poollist)
+            self.elist1 = [(self.node2id[node1],self.node2id[node2]) for node1,node2 in elist1]
+            self.elist2 = [(self.node2id[node1],self.node2id[node2]) for node1,node2 in elist2]
+            self.poollist = [(self.node2id[node1],self.node2id[node2]) for node1,node2 in self.poollist]
+
+            # compact integer-indexed networks used by the benchmark fits
+            self.graph1 = Graph.from_edgelist(self.elist1, n_nodes=len(self.id2node))
+            self.graph2 = Graph.from_edgelist(self.elist2, n_nodes=len(self.id2node))
+
+            # convert to neighborhood
+            self.a1dict = Formatter.edgelist_to_neighborhood(self.elist1)
+            self.a2dict = Formatter.edgelist_to_neighborhood(self.elist2)
+            # without self-interactions, computed once and shared by all fits
+            self.a1dict_noself, self.selfNodes1 = Helper.split_self(self.a1dict)
+            self.a2dict_noself, self.selfNodes2 = Helper.split_self(self.a2dict)
+
+            # observed overlap, of undirected links as in the id2node mode: (u, v) and (v, u) are the same link
+            self.obs = Graph.count_overlap(self.graph1, self.graph2)
 
         self.pos_mean = None
         self.neg_mean = None
-    
-    def get_pos_instance(self, idx: int=0):
+        # the settings of the last get_pos_benchmark and get_neg_benchmark calls
+        self.pos_settings = None
+        self.neg_settings = None
+
+        # fitted alphas and derived probability tables, keyed by (benchmark kind, idx, solver settings)
+        self.alphas_cache = {}
+        self.pooldict = None
+        self.store = store
+        # alphas behind the current benchmarks, keyed by (benchmark kind, idx)
+        self.benchmark_alphas = {}
+        self.pos_idx = None
+        self.neg_idx = None
+        self.n_jobs = n_jobs
+        self.executor = executor
+        # generator of the instance samplers, None draws from a new unseeded generator at every call
+        self.rng = None if seed is None else np.random.default_rng(seed)
+        # reports the convergence of the benchmark fits, kept out of the settings so it never enters the cache keys
+        self.callback = callback
+
+    def __getattr__(self, name):
+        """__getattr__ Build the edge lists and neighborhoods on first use, for pipelines created from integer arrays with id2node.
+        """
+        if name.startswith("__") or "poolgraph" not in self.__dict__:
+            raise AttributeError(name)
+        if name in ("elist1", "elist2", "poollist"):
+            value = {"elist1": self.graph1, "elist2": self.graph2, "poollist": self.poolgraph}[name].edgelist()
+        elif name in ("a1dict", "a2dict"):
+            value = Formatter.edgelist_to_neighborhood(self.elist1 if name=="a1dict" else self.elist2)
+        elif name in ("a1dict_noself", "selfNodes1"):
+            self.a1dict_noself, self.selfNodes1 = Helper.split_self(self.a1dict)
+            return getattr(self, name)
+        elif name in ("a2dict_noself", "selfNodes2"):
+            self.a2dict_noself, self.selfNodes2 = Helper.split_self(self.a2dict)
+            return getattr(self, name)
+        elif name == "node2id":
+            value = {node: i for i, node in enumerate(self.id2node)}
+        else:
+            raise AttributeError(name)
+        setattr(self, name, value)
+        return value
+
+    def clear_cache(self):
+        """clear_cache Drop all the fitted alphas stored in alphas_cache.
+        """
+        self.alphas_cache = {}
+
+    def fit_pos_alphas(self, idx: int=0):
+        """fit_pos_alphas Fit the alphas of the positive benchmark for instance generation, the result is cached.
+
+        Parameters
+        ----------
+        idx : int, optional
+            The index of the reference network, by default 0.
+
+        Returns
+        -------
+        dict
+            {"alphas": the fitted alphas, "P": the connection probability of the links in the pool,
+             "edges": the links of P, "probs": the probabilities of P as an array following edges}.
+        """
+        idx = 0 if idx==0 else 1
+        key = ("pos", idx, ("iters", self.pos_iter, "picard"))
+        if key not in self.alphas_cache:
+            aelist = self.poollist
+            if self.pooldict is None:
+                self.pooldict = Helper.dict_remove_self(Formatter.edgelist_to_neighborhood(aelist))
+            a1dict, elist = (self.a1dict_noself, self.elist1) if idx==0 else (self.a2dict_noself, self.elist2)
+            value, store_key = None, None
+            if self.store is not None:
+                store_key = AlphaStore.pool_key(elist, aelist, *key[2])
+                value = self.store.get(store_key)
+            if value is not None:
+                alphas = AlphaStore.unpack_node_alphas(value)
+            else:
+                alphas,_ = RandomSubnetwork.optimize_alpha(self.pooldict,a1dict,iters=self.pos_iter,probeNode=None)
+                if self.store is not None:
+                    self.store.put(store_key, AlphaStore.pack_node_alphas(alphas))
+            self.alphas_cache[key] = self.pos_entry(idx, alphas)
+        return self.alphas_cache[key]
+
+    def pos_entry(self, idx: int, alphas: dict):
+        """pos_entry Build the alphas_cache entry of fit_pos_alphas from the fitted alphas.
+
+        Parameters
+        ----------
+        idx : int
+            The index of the reference network.
+        alphas : dict
+            The fitted alphas.
+
+        Returns
+        -------
+        dict
+            See fit_pos_alphas.
+        """
+        elist = self.elist1 if idx==0 else self.elist2
+        P = RandomSubnetwork.cal_probability(self.poollist,elist,alphas=alphas)
+        return {"alphas": alphas, "P": P, "edges": list(P.keys()), "probs": np.array(list(P.values()), dtype=float)}
+
+    def fit_neg_alphas(self, idx: int=0):
+        """fit_neg_alphas Fit the alphas of the negative benchmark for instance generation, the result is cached.
+
+        Parameters
+        ----------
+        idx : int, optional
+            The index of the reference network, by default 0.
+
+        Returns
+        -------
+        dict
+            {"alphas": the fitted alphas, "selfNodes": the nodes with self-interactions in the reference network}.
+        """
+        idx = 0 if idx==0 else 1
+        key = ("neg", idx, ("iters", self.neg_iter, "picard"))
+        if key not in self.alphas_cache:
+            a1dict = self.a1dict_noself if idx==0 else self.a2dict_noself
+            value, store_key = None, None
+            if self.store is not None:
+                degrees = Helper.cal_node_degree(a1dict)
+                store_key = AlphaStore.degree_key(degrees, *key[2])
+                value = self.store.get(store_key)
+            if value is not None:
+                alphas = AlphaStore.unpack_degree_alphas(value, degrees)
+            else:
+                alphas = RandomNetwork.optimize_alpha(a1dict,iters=self.neg_iter)
+                if self.store is not None:
+                    self.store.put(store_key, AlphaStore.pack_degree_alphas(alphas, degrees))
+            self.alphas_cache[key] = self.neg_entry(idx, alphas)
+        return self.alphas_cache[key]
+
+    def neg_entry(self, idx: int, alphas: dict):
+        """neg_entry Build the alphas_cache entry of fit_neg_alphas from the fitted alphas.
+
+        Parameters
+        ----------
+        idx : int
+            The index of the reference network.
+        alphas : dict
+            The fitted alphas.
+
+        Returns
+        -------
+        dict
+            See fit_neg_alphas.
+        """
+        return {"alphas": alphas, "selfNodes": self.selfNodes1 if idx==0 else self.selfNodes2}
+
+    def optimize_benchmark(self, kind: str, idx: int, **settings):
+        """optimize_benchmark Run optimize_pos or optimize_neg for one direction, reusing the alphas in alphas_cache fitted with the same settings.
+
+        Parameters
+        ----------
+        kind : str
+            "pos" or "neg".
+        idx : int
+            0 randomizes network1 and compares with network2, else randomizes network2 and compares with network1.
+        settings :
+            The keyword arguments of RandomSubnetwork.optimize_pos or RandomNetwork.optimize_neg.
+
+        Returns
+        -------
+        float, float, int, str
+            mean, sigma, cur_iter, status, see Convergence. The status is None for alphas loaded from a model saved without it.
+        """
+        a1elist, a2elist = (self.graph1, self.graph2) if idx==0 else (self.graph2, self.graph1)
+        key = (kind, idx, ("benchmark",) + tuple(sorted(settings.items())))
+        if key in self.alphas_cache:
+            entry = self.alphas_cache[key]
+            cal = RandomSubnetwork.cal_pos if kind=="pos" else RandomNetwork.cal_neg
+            mean, sigma = cal(a1elist, a2elist, alphas=entry["alphas"])
+            self.benchmark_alphas[(kind, idx)] = entry["alphas"]
+            return mean, sigma, entry["cur_iter"], entry.get("status")
+        optimize = RandomSubnetwork.optimize_pos if kind=="pos" else RandomNetwork.optimize_neg
+        callback = None if self.callback is None else lambda metrics: self.callback(dict(metrics, idx=idx))
+        mean, sigma, cur_iter, alphas, status = optimize(a1elist, a2elist, return_alphas=True, return_status=True, store=self.store,
+                                                         callback=callback, **settings)
+        self.alphas_cache[key] = {"alphas": alphas, "cur_iter": cur_iter, "status": status}
+        self.benchmark_alphas[(kind, idx)] = alphas
+        return mean, sigma, cur_iter, status
+
+    def fit_benchmarks(self, tasks: list):
+        """fit_benchmarks Run the directional fits missing in alphas_cache concurrently, if the pipeline has an executor or n_jobs > 1.
+
+        The fits are deterministic, so optimize_benchmark then returns the same results as the serial path from alphas_cache.
+        With a callback, the fits run serially in optimize_benchmark, so every check is reported in this process.
+
+        Parameters
+        ----------
+        tasks : list(tuple)
+            (kind, idx, settings) of each fit, see optimize_benchmark.
+        """
+        todo = [(kind, idx, settings) for kind, idx, settings in tasks
+                if (kind, idx, ("benchmark",) + tuple(sorted(settings.items()))) not in self.alphas_cache]
+        if len(todo) < 2 or (self.executor is None and self.n_jobs <= 1) or self.callback is not None:
+            return
+        from concurrent.futures import ProcessPoolExecutor  # only the parallel fits need the process pool
+
+        executor = self.executor if self.executor is not None else ProcessPoolExecutor(max_workers=min(self.n_jobs, len(todo)))
+        try:
+            futures = []
+            for kind, idx, settings in todo:
+                a1elist, a2elist = (self.graph1, self.graph2) if idx==0 else (self.graph2, self.graph1)
+                optimize = RandomSubnetwork.optimize_pos if kind=="pos" else RandomNetwork.optimize_neg
+                futures.append(executor.submit(optimize, a1elist, a2elist, return_alphas=True, return_status=True, store=self.store, **settings))
+            for (kind, idx, settings), future in zip(todo, futures):
+                _, _, cur_iter, alphas, status = future.result()
+                key = (kind, idx, ("benchmark",) + tuple(sorted(settings.items())))
+                self.alphas_cache[key] = {"alphas": alphas, "cur_iter": cur_iter, "status": status}
+        finally:
+            if self.executor is None:
+                executor.shutdown()
+
+    @staticmethod
+    def benchmark_settings(arguments: dict):
+        """benchmark_settings The settings of a benchmark fit, the arguments of get_pos_benchmark or get_neg_benchmark.
+
+        The OPTIONAL_SETTINGS left at their defaults are dropped, so the settings, the keys of alphas_cache and the saved models stay
+        the same as without them.
+
+        Parameters
+        ----------
+        arguments : dict
+            The arguments by name.
+
+        Returns
+        -------
+        dict
+            The keyword arguments of RandomSubnetwork.optimize_pos or RandomNetwork.optimize_neg.
+        """
+        return {name: value for name, value in arguments.items()
+                if name not in Pipeline.OPTIONAL_SETTINGS or value != Pipeline.OPTIONAL_SETTINGS[name]}
+
+    def get_benchmarks(self, pos_kwargs: dict=None, neg_kwargs: dict=None):
+        """get_benchmarks Generate the positive and negative benchmarks, running the four directional fits concurrently.
+
+        Parameters
+        ----------
+        pos_kwargs : dict, optional
+            Keyword arguments of get_pos_benchmark, by default None.
+        neg_kwargs : dict, optional
+            Keyword arguments of get_neg_benchmark, by default None.
+
+        Returns
+        -------
+        float, float, float, float
+            pos_mean, pos_sigma, neg_mean, neg_sigma
+        """
+        import inspect
+
+        pos_settings = inspect.signature(self.get_pos_benchmark).bind(**(pos_kwargs or {}))
+        neg_settings = inspect.signature(self.get_neg_benchmark).bind(**(neg_kwargs or {}))
+        pos_settings.apply_defaults()
+        neg_settings.apply_defaults()
+        pos_settings, neg_settings = Pipeline.benchmark_settings(pos_settings.arguments), Pipeline.benchmark_settings(neg_settings.arguments)
+        self.fit_benchmarks([("pos", 0, pos_settings), ("pos", 1, pos_settings), ("neg", 0, neg_settings), ("neg", 1, neg_settings)])
+        self.get_pos_benchmark(**pos_settings)
+        self.get_neg_benchmark(**neg_settings)
+        return self.pos_mean, self.pos_sigma, self.neg_mean, self.neg_sigma
+
+    def get_rng(self, rng=None):
+        """get_rng The generator of a sampler call: rng if given, else the generator of the pipeline, see Helper.get_rng.
+        """
+        return Helper.get_rng(self.rng if rng is None else rng)
+
+    def get_pos_instance(self, idx: int=0, rng=None):
         """get_pos_instance Generate an instance of positive benchmark.
 
         Parameters
@@ -62,6 +371,8 @@ class Pipeline:
         idx : int, optional
             The index of the reference network, by default 0, meaning the instance has the same degree sequence with network1; 
             else, the instance has the same degree sequecne with network2.
+        rng : int, np.random.SeedSequence or np.random.Generator, optional
+            The seed or generator of this instance, by default None, meaning the generator of the pipeline.
 
         Returns
         -------
@@ -70,19 +381,12 @@ class Pipeline:
         """
         
         ## positive benchmark
-        aelist = self.poollist
-        adict = Formatter.edgelist_to_neighborhood(aelist)
-        if idx==0:
-            alphas,_ = RandomSubnetwork.optimize_alpha(adict,self.a1dict,iters=self.pos_iter,probeNode=0)
-            P = RandomSubnetwork.cal_probability(aelist,self.elist1,alphas=alphas)
-        else:
-            alphas,_ = RandomSubnetwork.optimize_alpha(adict,self.a2dict,iters=self.pos_iter,probeNode=0)
-            P = RandomSubnetwork.cal_probability(aelist,self.elist2,alphas=alphas)
-        Gpos = RandomSubnetwork.construct_sample_network(P)
+        P = self.fit_pos_alphas(idx)["P"]
+        Gpos = RandomSubnetwork.construct_sample_network(P, rng=self.get_rng(rng))
         Gpos = [(self.id2node[node1],self.id2node[node2])for node1,node2 in Gpos]
         return Gpos
 
-    def get_neg_instance(self, idx: int=0):
+    def get_neg_instance(self, idx: int=0, sampler: str="stream", rng=None):
         """get_neg_instance Generate an instance of negative benchmark.
 
         Parameters
@@ -90,6 +394,11 @@ class Pipeline:
         idx : int, optional
             The index of the reference network, by default 0, meaning the instance has the same degree sequence with network1; 
             else, the instance has the same degree sequecne with network2.
+        sampler : str, optional
+            "stream" samples the links class by class without the N*N probability matrix, "dense" builds the matrices with
+            RandomNetwork.cal_Pij and RandomNetwork.construct_random_network, by default "stream".
+        rng : int, np.random.SeedSequence or np.random.Generator, optional
+            The seed or generator of this instance, by default None, meaning the generator of the pipeline.
 
         Returns
         -------
@@ -98,19 +407,111 @@ class Pipeline:
         """
 
         ## negative benchmark
-        if idx==0:
-            alphas_zero = RandomNetwork.optimize_alpha(self.a1dict,iters=self.neg_iter)
-            selfNodes = Helper.find_selfNodes(self.a1dict)
+        entry = self.fit_neg_alphas(idx)
+        alphas_zero, selfNodes = entry["alphas"], entry["selfNodes"]
+        rng = self.get_rng(rng)
+        if sampler == "stream":
+            Gneg = RandomNetwork.sample_random_network(alphas_zero,selfNodes,rng=rng)
+        elif sampler == "dense":
             Pij,nodelist = RandomNetwork.cal_Pij(alphas_zero,selfNodes)
+            Gneg = RandomNetwork.construct_random_network(Pij,nodelist,selfNodes,rng=rng)
         else:
-            alphas_zero = RandomNetwork.optimize_alpha(self.a2dict,iters=self.neg_iter)
-            selfNodes = Helper.find_selfNodes(self.a2dict)
-            Pij,nodelist = RandomNetwork.cal_Pij(alphas_zero,selfNodes)
-        Gneg = RandomNetwork.construct_random_network(Pij,nodelist,selfNodes)
+            raise ValueError("sampler should be 'stream' or 'dense', got %r" % sampler)
         Gneg = [(self.id2node[node1],self.id2node[node2])for node1,node2 in Gneg]
         return Gneg
 
-    def get_pos_benchmark(self, iters_start:int=1000, pos_change_limit=1, iter_spacing:int=1000, max_iterations:int=20000):
+    def sample_pos_instances(self, idx: int=0, k: int=1, as_mask: bool=False, rng=None):
+        """sample_pos_instances Generate k instances of positive benchmark with one vectorized draw.
+
+        Parameters
+        ----------
+        idx : int, optional
+            The index of the reference network, by default 0, see get_pos_instance.
+        k : int, optional
+            The number of instances, by default 1.
+        as_mask : bool, optional
+            If True, return the pool links and a (k, len(links)) boolean mask; else, return a generator of instances in edge list format, by default False.
+        rng : int, np.random.SeedSequence or np.random.Generator, optional
+            The seed or generator of the instances, by default None, meaning the generator of the pipeline.
+
+        Returns
+        -------
+        list(tuple), np.ndarray or generator
+            links, mask if as_mask is True, else a generator yielding k instances of the positive benchmark in edge list format.
+        """
+        entry = self.fit_pos_alphas(idx)
+        edges = [(self.id2node[node1],self.id2node[node2]) for node1,node2 in entry["edges"]]
+        return self.sample_instances(edges, entry["probs"], k, as_mask, self.get_rng(rng))
+
+    def sample_neg_instances(self, idx: int=0, k: int=1, as_mask: bool=False, edges: list=None, rng=None):
+        """sample_neg_instances Generate k instances of negative benchmark with one vectorized draw.
+
+        Parameters
+        ----------
+        idx : int, optional
+            The index of the reference network, by default 0, see get_neg_instance.
+        k : int, optional
+            The number of instances, by default 1.
+        as_mask : bool, optional
+            If True, return the candidate links and a (k, len(links)) boolean mask; else, return a generator of instances in edge list format, by default False.
+        edges : list, optional
+            The candidate links in edge list format, links outside edges are not drawn. By default None, meaning all node pairs of the
+            reference network, which takes O(N*N) memory; the generator then draws each instance with RandomNetwork.sample_random_network instead.
+        rng : int, np.random.SeedSequence or np.random.Generator, optional
+            The seed or generator of the instances, by default None, meaning the generator of the pipeline.
+
+        Returns
+        -------
+        list(tuple), np.ndarray or generator
+            links, mask if as_mask is True, else a generator yielding k instances of the negative benchmark in edge list format.
+        """
+        entry = self.fit_neg_alphas(idx)
+        alphas, selfNodes = entry["alphas"], entry["selfNodes"]
+        rng = self.get_rng(rng)
+        if edges is None:
+            if not as_mask:
+                return ([(self.id2node[node1],self.id2node[node2]) for node1,node2 in RandomNetwork.sample_random_network(alphas,selfNodes,rng=rng)]
+                        for _ in range(k))
+            nodelist = sorted(alphas.keys())
+            elist = [(nodelist[i],nodelist[j]) for i in range(len(nodelist)) for j in range(i+1,len(nodelist))]
+            elist += [(node,node) for node in selfNodes]
+        else:
+            elist = [tuple(sorted((self.node2id[node1],self.node2id[node2]))) for node1,node2 in edges]
+        # self-interactions are kept with probability 1 if they exist in the reference network
+        probs, _, _ = RandomSubnetwork.cal_link_probability(elist,[(node,node) for node in selfNodes],alphas)
+        elist = [(self.id2node[node1],self.id2node[node2]) for node1,node2 in elist]
+        return self.sample_instances(elist, probs, k, as_mask, rng)
+
+    @staticmethod
+    def sample_instances(edges: list, probs, k: int, as_mask: bool, rng=None):
+        """sample_instances Draw k instances from the links and their probabilities.
+
+        Parameters
+        ----------
+        edges : list
+            The candidate links in edge list format.
+        probs : np.ndarray
+            The connection probability of each link in edges.
+        k : int
+            The number of instances.
+        as_mask : bool
+            If True, return the boolean mask instead of a generator.
+        rng : np.random.Generator, optional
+            The generator of the draws, by default None, meaning an unseeded generator, see Helper.get_rng.
+
+        Returns
+        -------
+        list(tuple), np.ndarray or generator
+            edges, mask if as_mask is True, else a generator yielding k instances in edge list format.
+        """
+        masks = RandomSubnetwork.construct_sample_masks(probs, k, rng=rng)
+        if as_mask:
+            mask = np.concatenate(list(masks)) if k > 0 else np.zeros((0, len(edges)), dtype=bool)
+            return edges, mask
+        return ([edges[e] for e in np.flatnonzero(row)] for block in masks for row in block)
+
+    def get_pos_benchmark(self, iters_start:int=1000, pos_change_limit=1, iter_spacing:int=1000, max_iterations:int=20000, solver:str="picard",
+                          mean_rtol: float=None, residual_atol: float=None, residual_rtol: float=None, compress: bool=False):
         """get_pos_benchmark Generate the positive benchmark.
 
         Parameters
@@ -123,6 +524,19 @@ class Pipeline:
             The spacing between two iterations, by default 1000.
         max_iterations : int, optional
             The maximum number of iterations, by default 20000.
+        solver : str, optional
+            The solver for updating alphas, "picard", "anderson" or "newton", by default "picard".
+        mean_rtol : float, optional
+            The change limit relative to the mean, added to pos_change_limit, by default None, meaning 0.
+        residual_atol : float, optional
+            Also stop when the expected-degree residual of every node is within residual_atol + residual_rtol*degree, by default
+            None. If both residual tolerances are None, the residual is not checked. See Convergence.
+        residual_rtol : float, optional
+            See residual_atol, by default None.
+        compress : bool, optional
+            Fit one alpha per class of nodes with the same degree and the same pool neighbors, see RandomSubnetwork.pool_classes,
+            by default False. The fits are faster on pools with many such nodes, e.g. preys linked to the same baits, and give the
+            same alphas up to rounding with the picard solver.
 
         Returns
         -------
@@ -131,23 +545,27 @@ class Pipeline:
         pos_sigma : float
             The standard deviation of the positive benchmark.
         """
-        self.pos1_mean, self.pos1_sigma, self.cur_iter_pos1 = RandomSubnetwork.optimize_pos(
-            self.elist1, self.elist2, iters_start=iters_start, pos_change_limit=pos_change_limit, iter_spacing=iter_spacing, max_iterations=max_iterations)
-        self.pos2_mean, self.pos2_sigma, self.cur_iter_pos2 = RandomSubnetwork.optimize_pos(
-            self.elist2, self.elist1, iters_start=iters_start, pos_change_limit=pos_change_limit, iter_spacing=iter_spacing, max_iterations=max_iterations)
+        settings = Pipeline.benchmark_settings(dict(iters_start=iters_start, pos_change_limit=pos_change_limit, iter_spacing=iter_spacing,
+                                                    max_iterations=max_iterations, solver=solver, mean_rtol=mean_rtol,
+                                                    residual_atol=residual_atol, residual_rtol=residual_rtol, compress=compress))
+        self.fit_benchmarks([("pos", 0, settings), ("pos", 1, settings)])
+        self.pos_settings = settings
+        self.pos1_mean, self.pos1_sigma, self.cur_iter_pos1, self.status_pos1 = self.optimize_benchmark("pos", 0, **settings)
+        self.pos2_mean, self.pos2_sigma, self.cur_iter_pos2, self.status_pos2 = self.optimize_benchmark("pos", 1, **settings)
 
         # select the positive benchmark that is closer to the observed overlap
         z1 = abs((self.obs - self.pos1_mean) / self.pos1_sigma)
         z2 = abs((self.obs - self.pos2_mean) / self.pos2_sigma)
 
         if z1 < z2:
-            self.pos_mean, self.pos_sigma = self.pos1_mean, self.pos1_sigma
+            self.pos_mean, self.pos_sigma, self.pos_idx = self.pos1_mean, self.pos1_sigma, 0
         else:
-            self.pos_mean, self.pos_sigma = self.pos2_mean, self.pos2_sigma
+            self.pos_mean, self.pos_sigma, self.pos_idx = self.pos2_mean, self.pos2_sigma, 1
 
         return self.pos_mean, self.pos_sigma
 
-    def get_neg_benchmark(self, iters_start:int=100, neg_change_limit=1, iter_spacing:int=1000, max_iterations:int=5000):
+    def get_neg_benchmark(self, iters_start:int=100, neg_change_limit=1, iter_spacing:int=1000, max_iterations:int=5000, solver:str="picard",
+                          mean_rtol: float=None, residual_atol: float=None, residual_rtol: float=None):
         """get_neg_benchmark Generate the negative benchmark.
 
         Parameters
@@ -160,6 +578,15 @@ class Pipeline:
             The spacing between two iterations, by default 1000.
         max_iterations : int, optional
             The maximum number of iterations, by default 5000.
+        solver : str, optional
+            The solver for updating alphas, "picard", "anderson" or "newton", by default "picard".
+        mean_rtol : float, optional
+            The change limit relative to the mean, added to neg_change_limit, by default None, meaning 0.
+        residual_atol : float, optional
+            Also stop when the expected-degree residual of every node is within residual_atol + residual_rtol*degree, by default
+            None. If both residual tolerances are None, the residual is not checked. See Convergence.
+        residual_rtol : float, optional
+            See residual_atol, by default None.
 
         Returns
         -------
@@ -168,22 +595,100 @@ class Pipeline:
         neg_sigma : float
             The standard deviation of the negative benchmark.
         """
-        self.neg1_mean, self.neg1_sigma, self.cur_iter_neg1 = RandomNetwork.optimize_neg(
-            self.elist1, self.elist2, iters_start=iters_start, neg_change_limit=neg_change_limit, iter_spacing=iter_spacing, max_iterations=max_iterations)
-        self.neg2_mean, self.neg2_sigma, self.cur_iter_neg2 = RandomNetwork.optimize_neg(
-            self.elist2, self.elist1, iters_start=iters_start, neg_change_limit=neg_change_limit, iter_spacing=iter_spacing, max_iterations=max_iterations)
+        settings = Pipeline.benchmark_settings(dict(iters_start=iters_start, neg_change_limit=neg_change_limit, iter_spacing=iter_spacing,
+                                                    max_iterations=max_iterations, solver=solver, mean_rtol=mean_rtol,
+                                                    residual_atol=residual_atol, residual_rtol=residual_rtol))
+        self.fit_benchmarks([("neg", 0, settings), ("neg", 1, settings)])
+        self.neg_settings = settings
+        self.neg1_mean, self.neg1_sigma, self.cur_iter_neg1, self.status_neg1 = self.optimize_benchmark("neg", 0, **settings)
+        self.neg2_mean, self.neg2_sigma, self.cur_iter_neg2, self.status_neg2 = self.optimize_benchmark("neg", 1, **settings)
 
         # select the negative benchmark that is closer to the observed overlap
         z1 = abs((self.obs - self.neg1_mean) / self.neg1_sigma)
         z2 = abs((self.obs - self.neg2_mean) / self.neg2_sigma)
 
         if z1 < z2:
-            self.neg_mean, self.neg_sigma = self.neg1_mean, self.neg1_sigma
+            self.neg_mean, self.neg_sigma, self.neg_idx = self.neg1_mean, self.neg1_sigma, 0
         else:
-            self.neg_mean, self.neg_sigma = self.neg2_mean, self.neg2_sigma
+            self.neg_mean, self.neg_sigma, self.neg_idx = self.neg2_mean, self.neg2_sigma, 1
 
         return self.neg_mean, self.neg_sigma
 
+    def simulate_pos_overlap(self, k: int=1000, idx: int=None, rng=None):
+        """simulate_pos_overlap Simulate the overlap between instances of the positive benchmark and the other network.
+
+        Only the links of the other network can overlap, so only these links are drawn, the cost is O(k*|E2|).
+
+        Parameters
+        ----------
+        k : int, optional
+            The number of simulated instances, by default 1000.
+        idx : int, optional
+            The index of the reference network, by default None, meaning the direction selected by get_pos_benchmark.
+        rng : int, np.random.SeedSequence or np.random.Generator, optional
+            The seed or generator of the simulation, by default None, meaning the generator of the pipeline.
+
+        Returns
+        -------
+        np.ndarray
+            The k simulated overlaps, its mean and standard deviation can be compared with pos_mean and pos_sigma.
+        """
+        return self.simulate_overlap("pos", k, idx, rng)
+
+    def simulate_neg_overlap(self, k: int=1000, idx: int=None, rng=None):
+        """simulate_neg_overlap Simulate the overlap between instances of the negative benchmark and the other network.
+
+        Only the links of the other network can overlap, so only these links are drawn, the cost is O(k*|E2|).
+
+        Parameters
+        ----------
+        k : int, optional
+            The number of simulated instances, by default 1000.
+        idx : int, optional
+            The index of the reference network, by default None, meaning the direction selected by get_neg_benchmark.
+        rng : int, np.random.SeedSequence or np.random.Generator, optional
+            The seed or generator of the simulation, by default None, meaning the generator of the pipeline.
+
+        Returns
+        -------
+        np.ndarray
+            The k simulated overlaps, its mean and standard deviation can be compared with neg_mean and neg_sigma.
+        """
+        return self.simulate_overlap("neg", k, idx, rng)
+
+    def simulate_overlap(self, kind: str, k: int, idx: int=None, rng=None):
+        """simulate_overlap Simulate the overlap of k instances of the positive or negative benchmark with the other network.
+
+        The alphas behind the current benchmark are used; if the benchmark has not been calculated, the alphas for instance generation are used.
+
+        Parameters
+        ----------
+        kind : str
+            "pos" or "neg".
+        k : int
+            The number of simulated instances.
+        idx : int, optional
+            The index of the reference network, by default None, meaning the selected direction of the benchmark or 0.
+        rng : int, np.random.SeedSequence or np.random.Generator, optional
+            The seed or generator of the simulation, by default None, meaning the generator of the pipeline.
+
+        Returns
+        -------
+        np.ndarray
+            The k simulated overlaps.
+        """
+        if idx is None:
+            idx = self.pos_idx if kind=="pos" else self.neg_idx
+        idx = 0 if not idx else 1
+        alphas = self.benchmark_alphas.get((kind, idx))
+        if alphas is None:
+            alphas = (self.fit_pos_alphas(idx) if kind=="pos" else self.fit_neg_alphas(idx))["alphas"]
+        a1elist, a2elist = (self.graph1, self.graph2) if idx==0 else (self.graph2, self.graph1)
+        # the same probabilities as RandomSubnetwork.cal_pos and RandomNetwork.cal_neg, over the undirected links counted by obs
+        probs, _, _ = RandomSubnetwork.cal_link_probability(a2elist, a1elist, alphas)
+        return np.concatenate([mask.sum(axis=1) for mask in RandomSubnetwork.construct_sample_masks(probs, k, rng=self.get_rng(rng))]
+                              + [np.zeros(0, dtype=int)])
+
     def construct_pos_benchmark(self):
         """
         Note that this function is deprecated. Please use get_pos_benchmark instead.
@@ -199,14 +704,9 @@ class Pipeline:
         float,float
             pos_mean,pos_sigma
         """
-        aelist = self.poollist
-        adict = Formatter.edgelist_to_neighborhood(aelist)
-
-        alphas1,_ = RandomSubnetwork.optimize_alpha(adict,self.a1dict,iters=self.pos_iter,probeNode=0)
-        alphas2,_ = RandomSubnetwork.optimize_alpha(adict,self.a2dict,iters=self.pos_iter,probeNode=0)
         # average probability
-        P1 = RandomSubnetwork.cal_probability(aelist,self.elist1,alphas=alphas1)
-        P2 = RandomSubnetwork.cal_probability(aelist,self.elist2,alphas=alphas2)
+        P1 = self.fit_pos_alphas(0)["P"]
+        P2 = self.fit_pos_alphas(1)["P"]
         # variance probability
         Pv1 = {link: P1[link]*(1-P1[link]) for link in P1 }
         Pv2 = {link: P2[link]*(1-P2[link]) for link in P2 }
@@ -232,7 +732,7 @@ class Pipeline:
         """
 
         # neg1
-        alphas1_neg = RandomNetwork.optimize_alpha(self.a1dict,iters=self.neg_iter)
+        alphas1_neg = self.fit_neg_alphas(0)["alphas"]
         # only calculate the links in the comparing network(a2elist). Other links will never overlap with the comparing network.
         P1 = RandomSubnetwork.cal_probability(self.elist2,self.elist1,alphas1_neg) 
         Pv1 = {link: P1[link]*(1-P1[link]) for link in P1 }
@@ -241,7 +741,7 @@ class Pipeline:
         self.neg1_sigma = np.sqrt(sum([Pv1.get(link,0) for link in self.elist2])) + 0.00001 # avoid zero
 
         # neg2
-        alphas2_neg = RandomNetwork.optimize_alpha(self.a2dict,iters=self.neg_iter)
+        alphas2_neg = self.fit_neg_alphas(1)["alphas"]
         # only calculate the links in the comparing network(a1elist). Other links will never overlap with the comparing network.
         P2 = RandomSubnetwork.cal_probability(self.elist1,self.elist2,alphas2_neg) 
         Pv2 = {link: P2[link]*(1-P2[link]) for link in P2 }
@@ -263,19 +763,24 @@ class Pipeline:
         pass
 
     def show_results(self, printOn: bool=True):
-        if not self.pos_mean:
-            print("The get_pos_benchmark function has not been called yet. The results will be calculated based on default parameters.")
+        # a mean of 0 is a fitted benchmark, e.g. of two disjoint networks, only None means not fitted yet
+        if self.pos_mean is None and self.neg_mean is None:
+            if printOn:
+                print("The get_pos_benchmark and get_neg_benchmark functions have not been called yet. The results will be calculated based on default parameters.")
+            self.get_benchmarks()
+        if self.pos_mean is None:
+            if printOn:
+                print("The get_pos_benchmark function has not been called yet. The results will be calculated based on default parameters.")
             self.pos_mean, self.pos_sigma = self.get_pos_benchmark()
-        if not self.neg_mean:
-            print("The get_neg_benchmark function has not been called yet. The results will be calculated based on default parameters.")
+        if self.neg_mean is None:
+            if printOn:
+                print("The get_neg_benchmark function has not been called yet. The results will be calculated based on default parameters.")
             self.neg_mean, self.neg_sigma = self.get_neg_benchmark()
 
-        self.neg_z = (self.obs-self.neg_mean)/self.neg_sigma if self.neg_sigma!=0 else np.nan
-        self.neg_p = scipy.stats.norm.sf(self.neg_z)
-        self.pos_z = (self.obs-self.pos_mean)/self.pos_sigma if self.pos_sigma!=0 else np.nan
-        self.pos_p = 1 - scipy.stats.norm.sf(self.pos_z)
-        self.normlap, self.normlap_sigma = Helper.cal_score(self.obs,self.neg_mean,self.neg_sigma,self.pos_mean,self.pos_sigma)
-        self.normlap, self.normlap_sigma = self.normlap[0], self.normlap_sigma[0]
+        results = Helper.cal_results(self.obs,self.neg_mean,self.neg_sigma,self.pos_mean,self.pos_sigma)[0]
+        self.neg_z, self.neg_p = results["Neg_z"], results["Neg_p"]
+        self.pos_z, self.pos_p = results["Pos_z"], results["Pos_p"]
+        self.normlap, self.normlap_sigma = results["Normlap"], results["Normlap_sigma"]
 
         labels = ["Observed overlap","Neg_mean","Neg_sigma","Neg_p","Pos_mean","Pos_sigma","Pos_p","Normlap","Normlap_sigma"]
         res = [self.obs, self.neg_mean, self.neg_sigma, self.neg_p, self.pos_mean, self.pos_sigma, self.pos_p,self.normlap,self.normlap_sigma]
@@ -1,10 +1,146 @@
+import time
 import numpy as np
-from Formatter import Formatter
-from Helper import Helper
-from RandomSubnetwork import RandomSubnetwork
+from .Formatter import Formatter
+from .Helper import Helper
+from .RandomSubnetwork import RandomSubnetwork
+from .Solver import Solver
+from .AlphaStore import AlphaStore
+from .IterationState import IterationState
+from .Convergence import Convergence
+from .Graph import Graph
 
 
 class RandomNetwork:
+    @staticmethod
+    def degree_classes(degree_value, alphas_value):
+        '''
+        degree_classes(degree_value,alphas_value)
+
+        Group the nodes sharing the same (degree, alpha) pair. The update of alphas only depends on these two values, so nodes in the same class
+        keep identical alphas through the iterations and the cost of one iteration scales with the number of classes instead of the number of nodes.
+
+        Parameters
+        ----------
+        degree_value: Array of node degrees.
+        alphas_value: Array of node alphas following the same order as degree_value.
+
+        Returns
+        -------
+        class_degrees: The degree of each class.
+        class_alphas: The alpha of each class.
+        counts: The number of nodes in each class.
+        inverse: The class index of each node, class_alphas[inverse] recovers the alphas of the nodes.
+        '''
+        keys = np.stack([np.asarray(degree_value, dtype=float), np.asarray(alphas_value, dtype=float)], axis=1)
+        classes, inverse, counts = np.unique(keys, axis=0, return_inverse=True, return_counts=True)
+        return classes[:, 0], classes[:, 1], counts, inverse.reshape(-1)
+
+    @staticmethod
+    def class_update(class_alphas, class_degrees, counts, block_size=2**22):
+        '''
+        class_update(class_alphas,class_degrees,counts,block_size=2**22)
+
+        One fixed-point update of the alphas for all classes:
+            alpha_k = (sum_l n_l*alpha_k/(alpha_k*alpha_l+1) - alpha_k/(alpha_k**2+1)) / degree_k
+        The second term removes the self-pair of node k from the sum.
+
+        Parameters
+        ----------
+        class_alphas: The alpha of each class.
+        class_degrees: The degree of each class.
+        counts: The number of nodes in each class.
+        block_size: The maximum number of pairs evaluated at once, bounds the memory used by the update.
+
+        Returns
+        -------
+        class_alphas: The updated alpha of each class.
+        '''
+        K = len(class_alphas)
+        Sigma = np.empty(K)
+        rows = max(1, block_size // max(K, 1))
+        for start in range(0, K, rows):
+            ai = class_alphas[start:start+rows, None]
+            Sigma[start:start+rows] = (ai / (ai * class_alphas + 1)) @ counts
+        Sigma = Sigma - class_alphas / (class_alphas**2 + 1)
+        return Sigma / class_degrees
+
+    @staticmethod
+    def class_jacobian(class_alphas, counts):
+        '''
+        class_jacobian(class_alphas,counts)
+
+        The Jacobian of the expected class degrees with respect to the log-alphas of the classes, used by the newton solver.
+        The alphas of all nodes in a class move together, and the self-pair of each node is excluded.
+
+        Parameters
+        ----------
+        class_alphas: The alpha of each class.
+        counts: The number of nodes in each class.
+
+        Returns
+        -------
+        J: Dense array, J[k][l] is the derivative of the expected degree of class k with respect to log(alpha_l).
+        '''
+        P = 1 / (1 + np.outer(class_alphas, class_alphas))
+        W = P * (1 - P)
+        J = -(np.diag(W @ counts) + W * counts)
+        J[np.diag_indices_from(J)] += 2 * np.diag(W)
+        return J
+
+    @staticmethod
+    def solve_classes(class_alphas, class_degrees, counts, solver="picard", tol=None, max_iters=100):
+        '''
+        solve_classes(class_alphas,class_degrees,counts,solver="picard",tol=None,max_iters=100)
+
+        Solve the alphas of the degree classes with the given solver, see Solver.solve.
+
+        Parameters
+        ----------
+        class_alphas: The initial alpha of each class.
+        class_degrees: The degree of each class.
+        counts: The number of nodes in each class.
+        solver: "picard", "anderson" or "newton".
+        tol: Stop when the maximum expected-degree residual is below tol. If None, run max_iters iterations.
+        max_iters: The maximum number of iterations.
+
+        Returns
+        -------
+        class_alphas: The solved alpha of each class.
+        cur_iter: The number of iterations performed.
+        residual: The maximum absolute expected-degree residual.
+        '''
+        return Solver.solve(lambda a: RandomNetwork.class_update(a, class_degrees, counts), class_degrees, class_alphas,
+                            solver=solver, tol=tol, max_iters=max_iters,
+                            jacobian=lambda a: RandomNetwork.class_jacobian(a, counts))
+
+    @staticmethod
+    def iterate_alphas(degree_value, alphas_value, iters=100, solver="picard", tol=None):
+        '''
+        iterate_alphas(degree_value,alphas_value,iters=100,solver="picard",tol=None)
+
+        Update the alphas of all nodes for the given iterations, nodes are grouped by degree_classes so that each class is updated only once.
+
+        Parameters
+        ----------
+        degree_value: Array of node degrees.
+        alphas_value: Array of the initial node alphas.
+        iters: The number of iterations for updating alphas.
+        solver: "picard", "anderson" or "newton", see Solver.solve.
+        tol: Stop early when the maximum expected-degree residual is below tol. If None, run all iterations.
+
+        Returns
+        -------
+        alphas_value: Array of the updated node alphas.
+        '''
+        class_degrees, class_alphas, counts, inverse = RandomNetwork.degree_classes(degree_value, alphas_value)
+        if solver == "picard" and tol is None:
+            for _ in range(iters):
+                class_alphas = RandomNetwork.class_update(class_alphas, class_degrees, counts)
+        else:
+            class_alphas, _, _ = RandomNetwork.solve_classes(
+                class_alphas, class_degrees, counts, solver=solver, tol=tol, max_iters=iters)
+        return class_alphas[inverse]
+
     @staticmethod
     def optimize_alpha(G1dict0, iters=100):
         '''
@@ -24,23 +160,17 @@ class RandomNetwork:
         G1dict = Helper.dict_remove_self(G1dict0)  # remove self-interactions
         # reference degree sequence generated from G1
         degrees = Helper.cal_node_degree(G1dict)
-        nodelist = G1dict.keys()
-        alphas_tem = {}.fromkeys(nodelist, 1)
-        alphas = {}.fromkeys(nodelist, 1)
-        alphas_tem_value = np.array(Helper.dict_values(alphas_tem, nodelist))
-        for itering in range(iters):
-            Sigma = np.array([np.sum(ai/((ai*alphas_tem_value)+1)) for ai in alphas_tem_value]
-                             ) - np.array([ai/(ai**2+1) for ai in alphas_tem_value])
-            degree_value = np.array(Helper.dict_values(degrees, nodelist))
-            alphas_tem_value = Sigma/degree_value
-        for i, node in enumerate(nodelist):
-            alphas[node] = alphas_tem_value[i]
+        nodelist = list(G1dict.keys())
+        degree_value = np.array(Helper.dict_values(degrees, nodelist))
+        alphas_value = np.ones(len(nodelist))
+        alphas_value = RandomNetwork.iterate_alphas(degree_value, alphas_value, iters=iters)
+        alphas = dict(zip(nodelist, alphas_value))
         return alphas
 
     @staticmethod
-    def optimize_alpha_with_stop(G1dict0, max_iters=1000, stopping_criterion=-1):
+    def optimize_alpha_with_stop(G1dict0, max_iters=1000, stopping_criterion=-1, probeNode=0, callback=None):
         '''
-        optimize_alpha_with_stop(G1dict0, max_iters=1000, stopping_criterion=-1)
+        optimize_alpha_with_stop(G1dict0, max_iters=1000, stopping_criterion=-1, probeNode=0, callback=None)
 
         Optimize the alpha for nodes in G1dict with stopping criterion.
 
@@ -49,6 +179,8 @@ class RandomNetwork:
         G1dict0: Reference network in neighborhood format that provides the node degree constriants. For example, G1dict = {"A": {"B", "C"},"B":{"A"},"C":{"A"}}
         max_iters: The maximum number of iterations for updating alphas.
         stopping_criterion: The stopping criterion for updating alphas. If the relative difference between the new alpha and the old alpha is smaller than the stopping_criterion, the updating process will stop.
+        probeNode: The index of the probe node. The alpha history will be returned for the probe node, None records no history.
+        callback: Function called with the metrics of every iteration, see Solver.metrics and Monitor. If None, nothing is reported.
 
         Returns
         -------
@@ -59,33 +191,70 @@ class RandomNetwork:
         G1dict = Helper.dict_remove_self(G1dict0)  # remove self-interactions
         # reference degree sequence generated from G1
         degrees = Helper.cal_node_degree(G1dict)
-        nodelist = G1dict.keys()
+        nodelist = list(G1dict.keys())
         alphas_history = []
-        alphas_tem = {}.fromkeys(nodelist, 1)
-        alphas = {}.fromkeys(nodelist, 1)
-        alphas_tem_value = np.array(Helper.dict_values(alphas_tem, nodelist))
+        degree_value = np.array(Helper.dict_values(degrees, nodelist))
+        class_degrees, class_alphas, counts, inverse = RandomNetwork.degree_classes(
+            degree_value, np.ones(len(nodelist)))
+        # the history only follows the class of the probe node, the memory grows with the iterations and not with the network
+        probe = inverse[probeNode] if probeNode is not None and len(nodelist) else None
+        if callback is not None:
+            start, class_alphas_reported = time.perf_counter(), None
         #initialize relative change
-        rel_change = [999]*len(nodelist)
+        rel_change = np.full(len(class_alphas), 999.0)
         for itering in range(max_iters):
             cur_iter = itering
             # if meet the stopping criterion, stop updating alphas
-            if max(rel_change) < stopping_criterion:
+            if rel_change.max(initial=0) < stopping_criterion:
                 break
             # if not meet the stopping criterion, continue updating alphas
-            alphas_tem_prev = alphas_tem_value
-            Sigma = np.array([np.sum(ai/((ai*alphas_tem_value)+1)) for ai in alphas_tem_value]
-                             ) - np.array([ai/(ai**2+1) for ai in alphas_tem_value])
-            degree_value = np.array(Helper.dict_values(degrees, nodelist))
-            alphas_tem_value = Sigma/degree_value
-            alphas_history.append(alphas_tem_value)
+            class_alphas_prev = class_alphas
+            class_alphas = RandomNetwork.class_update(class_alphas, class_degrees, counts)
+            if probe is not None:
+                alphas_history.append([itering, class_alphas[probe]])
+            if callback is not None:
+                # the update gives the residual of the alphas before it
+                residual = np.abs(Solver.residual(class_alphas_prev, class_alphas, class_degrees)).max(initial=0)
+                callback(Solver.metrics("optimize_alpha_with_stop", itering, residual, class_alphas_reported, class_alphas_prev, start))
+                class_alphas_reported = class_alphas_prev
             # calculate the relative change of alphas
-            diff = alphas_tem_value - alphas_tem_prev
-            rel_change = abs(diff/alphas_tem_prev)
+            diff = class_alphas - class_alphas_prev
+            rel_change = abs(diff/class_alphas_prev)
         # update alphas
-        for i, node in enumerate(nodelist):
-            alphas[node] = alphas_tem_value[i]
+        alphas = dict(zip(nodelist, class_alphas[inverse]))
         return alphas, alphas_history, cur_iter
 
+    @staticmethod
+    def optimize_alpha_with_solver(G1dict0, solver="anderson", tol=1e-6, max_iters=1000):
+        '''
+        optimize_alpha_with_solver(G1dict0,solver="anderson",tol=1e-6,max_iters=1000)
+
+        Optimize the alpha for nodes in G1dict until the expected degrees match the reference degrees.
+
+        Parameters
+        ----------
+        G1dict0: Reference network in neighborhood format that provides the node degree constriants.
+        solver: "picard", "anderson" or "newton", see Solver.solve.
+        tol: The stopping criterion on the maximum absolute difference between the expected and the reference degrees.
+        max_iters: The maximum number of iterations for updating alphas.
+
+        Returns
+        -------
+        alphas: A dictionary contains the optimized alphas for each node.
+        cur_iter: The number of iterations when stop updating alphas.
+        residual: The maximum absolute expected-degree residual of the alphas.
+        '''
+        G1dict = Helper.dict_remove_self(G1dict0)  # remove self-interactions
+        degrees = Helper.cal_node_degree(G1dict)
+        nodelist = list(G1dict.keys())
+        degree_value = np.array(Helper.dict_values(degrees, nodelist))
+        class_degrees, class_alphas, counts, inverse = RandomNetwork.degree_classes(
+            degree_value, np.ones(len(nodelist)))
+        class_alphas, cur_iter, residual = RandomNetwork.solve_classes(
+            class_alphas, class_degrees, counts, solver=solver, tol=tol, max_iters=max_iters)
+        alphas = dict(zip(nodelist, class_alphas[inverse]))
+        return alphas, cur_iter, residual
+
     @staticmethod
     def cal_Pij(alphas, selfNodes):
         '''
@@ -115,9 +284,9 @@ class RandomNetwork:
         return Pij, nodelist
 
     @staticmethod
-    def construct_random_network(Pij, nodelist, selfNodes):
+    def construct_random_network(Pij, nodelist, selfNodes, rng=None):
         '''
-        construct_random_network(Pij,nodelist), self-interactions are preserved.
+        construct_random_network(Pij,nodelist,selfNodes,rng=None), self-interactions are preserved.
 
         Construct the random network according to the given probability matrix Pij.
 
@@ -126,6 +295,7 @@ class RandomNetwork:
         Pij: The probability matrix following the order given by nodelist.
         nodelist: Provide the reference of the order of the probability matrix Pij.
         selfNodes: The nodes that have self-interactions in G1(the reference network).
+        rng: The seed or np.random.Generator of the draws, see Helper.get_rng.
 
         Returns
         -------
@@ -133,7 +303,7 @@ class RandomNetwork:
 
         '''
         N = len(Pij)
-        Rij = np.random.random(size=(N, N))
+        Rij = Helper.get_rng(rng).random(size=(N, N))
         Rij = np.triu(Rij)+np.triu(Rij, k=1).T
         Aij = Rij.copy()
         Aij[Pij < Rij] = 0
@@ -147,7 +317,154 @@ class RandomNetwork:
         return Gsample
 
     @staticmethod
-    def alphas_iteration(G1dict0: list, alphas_init: dict = None, iters: int = 100):
+    def triangle_decode(t, n):
+        '''
+        triangle_decode(t,n)
+
+        Decode the indices of the node pairs u<v among n nodes, numbered as t = v*(v-1)/2+u.
+
+        Parameters
+        ----------
+        t: Array of pair indices in [0, n*(n-1)/2).
+        n: Array of the number of nodes, only used to bound v.
+
+        Returns
+        -------
+        u, v: Arrays of the pair members, u<v.
+        '''
+        v = np.floor((1 + np.sqrt(1 + 8 * t.astype(float))) / 2).astype(np.int64)
+        v = np.minimum(v, n - 1)
+        # correct the rounding of the square root
+        v -= (v * (v - 1) // 2 > t)
+        v += ((v + 1) * v // 2 <= t)
+        u = t - v * (v - 1) // 2
+        return u, v
+
+    @staticmethod
+    def stream_random_edges(alphas_value, block_size=2**20, rng=None):
+        '''
+        stream_random_edges(alphas_value,block_size=2**20,rng=None)
+
+        Sample the links of the random network without the probability matrix. Nodes sharing the same alpha form a class, and all pairs
+        between two classes share the same probability p=1/(1+alpha_k*alpha_l). For each pair of classes the number of links is drawn
+        from Binomial(#pairs,p) and the links are placed on uniformly chosen distinct pairs, which is equivalent to drawing every pair
+        independently. Dense blocks (p>=0.5) are enumerated and drawn pair by pair instead.
+
+        Parameters
+        ----------
+        alphas_value: Array of node alphas.
+        block_size: The maximum number of class pairs handled at once.
+        rng: The seed or np.random.Generator of the draws, see Helper.get_rng.
+
+        Yields
+        ------
+        (i, j): Arrays of node indices into alphas_value with i<j, one chunk of sampled links at a time.
+        '''
+        rng = Helper.get_rng(rng)
+        class_alphas, inverse, counts = np.unique(np.asarray(alphas_value, dtype=float), return_inverse=True, return_counts=True)
+        inverse = inverse.reshape(-1)
+        order = np.argsort(inverse, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        counts = counts.astype(np.int64)
+        K = len(class_alphas)
+        rows = max(1, block_size // max(K, 1))
+        for k0 in range(0, K, rows):
+            k, l = np.meshgrid(np.arange(k0, min(K, k0 + rows)), np.arange(K), indexing="ij")
+            k, l = k[k <= l], l[k <= l]
+            M = np.where(k == l, counts[k] * (counts[k] - 1) // 2, counts[k] * counts[l])
+            p = 1 / (1 + class_alphas[k] * class_alphas[l])
+            keep = M > 0
+            k, l, M, p = k[keep], l[keep], M[keep], p[keep]
+
+            # dense blocks: draw every pair
+            dense = p >= 0.5
+            blk = np.repeat(np.flatnonzero(dense), M[dense])
+            t = np.arange(len(blk)) - np.repeat(np.cumsum(M[dense]) - M[dense], M[dense])
+            hit = rng.random(len(blk)) < p[blk]
+            blocks, ts = [blk[hit]], [t[hit]]
+
+            # sparse blocks: draw the number of links, then distinct pairs
+            m = np.zeros(len(M), dtype=np.int64)
+            sparse = np.flatnonzero(~dense)
+            m[sparse] = rng.binomial(M[sparse], p[sparse])
+            offset = np.cumsum(M) - M
+            keys = np.empty(0, dtype=np.int64)
+            deficit = m
+            # redraw the pairs lost to duplicates until every block has m distinct pairs
+            while deficit.sum() > 0:
+                blk = np.repeat(np.arange(len(M)), deficit)
+                t = np.floor(rng.random(len(blk)) * M[blk]).astype(np.int64)
+                t = np.minimum(t, M[blk] - 1)
+                keys = Helper.sorted_unique(np.concatenate([keys, offset[blk] + t]))
+                deficit = m - np.bincount(np.searchsorted(offset, keys, side="right") - 1, minlength=len(M))
+            blk = np.searchsorted(offset, keys, side="right") - 1
+            blocks.append(blk)
+            ts.append(keys - offset[blk])
+
+            blk, t = np.concatenate(blocks), np.concatenate(ts)
+            kb, lb = k[blk], l[blk]
+            same = kb == lb
+            u, v = np.empty(len(t), dtype=np.int64), np.empty(len(t), dtype=np.int64)
+            u[same], v[same] = RandomNetwork.triangle_decode(t[same], counts[kb[same]])
+            u[~same], v[~same] = t[~same] // counts[lb[~same]], t[~same] % counts[lb[~same]]
+            i, j = order[starts[kb] + u], order[starts[lb] + v]
+            yield np.minimum(i, j), np.maximum(i, j)
+
+    @staticmethod
+    def sample_random_network(alphas, selfNodes, block_size=2**20, rng=None):
+        '''
+        sample_random_network(alphas,selfNodes,block_size=2**20,rng=None), self-interactions are preserved.
+
+        Construct the random network from the alphas with stream_random_edges, the memory is O(N+E) instead of the N*N matrices of
+        cal_Pij and construct_random_network.
+
+        Parameters
+        ----------
+        alphas: The optimized alphas for each node(of G1, the reference network).
+        selfNodes: The nodes that have self-interactions in G1(the reference network).
+        block_size: The maximum number of class pairs handled at once.
+        rng: The seed or np.random.Generator of the draws, see Helper.get_rng.
+
+        Returns
+        -------
+        Gsample: random network in edgelist format.
+        '''
+        nodelist = sorted(alphas.keys())
+        alphas_value = np.array(Helper.dict_values(alphas, nodelist))
+        Gsample = set()
+        for i, j in RandomNetwork.stream_random_edges(alphas_value, block_size=block_size, rng=rng):
+            Gsample.update((nodelist[a], nodelist[b]) for a, b in zip(i.tolist(), j.tolist()))
+        Gsample.update((node, node) for node in selfNodes)
+        return list(Gsample)
+
+    @staticmethod
+    def sample_random_graph(G1, alphas, block_size=2**20, rng=None):
+        '''
+        sample_random_graph(G1,alphas,block_size=2**20,rng=None), self-interactions are preserved.
+
+        Construct the random network of a Graph with stream_random_edges, without python objects per link.
+
+        Parameters
+        ----------
+        G1: The reference network as a Graph.
+        alphas: The optimized alphas for each node of G1, dictionary or array indexed by node id.
+        block_size: The maximum number of class pairs handled at once.
+        rng: The seed or np.random.Generator of the draws, see Helper.get_rng.
+
+        Returns
+        -------
+        Gsample: random network as a Graph with the node ids of G1.
+        '''
+        nodes = G1.nodes()
+        alphas_value = G1.alphas_array(alphas)[nodes]
+        src, dst = [G1.self_nodes], [G1.self_nodes]
+        for i, j in RandomNetwork.stream_random_edges(alphas_value, block_size=block_size, rng=rng):
+            src.append(nodes[i])
+            dst.append(nodes[j])
+        return Graph(np.concatenate(src), np.concatenate(dst), n_nodes=G1.n_nodes)
+
+    @staticmethod
+    def alphas_iteration(G1dict0: list, alphas_init: dict = None, iters: int = 100, solver: str = "picard", tol: float = None):
         """alphas_iteration iterate updating alphas for given iterations.
 
         Parameters
@@ -158,6 +475,10 @@ class RandomNetwork:
             _description_, by default None
         iters : int, optional
             _description_, by default 1000
+        solver : str, optional
+            "picard", "anderson" or "newton", see Solver.solve, by default "picard"
+        tol : float, optional
+            Stop early when the maximum expected-degree residual is below tol, by default None
 
         Returns
         -------
@@ -174,19 +495,80 @@ class RandomNetwork:
 
         # initialize alphas
         alphas = {}.fromkeys(
-            nodelist, 1) if alphas_init == None else alphas_init
-        alphas_tem_value = np.array(Helper.dict_values(alphas, nodelist))
-
-        for _ in range(iters):
-            Sigma = np.array([np.sum(ai / ((ai * alphas_tem_value) + 1))
-                              for ai in alphas_tem_value]) - np.array([ai / (ai**2 + 1) for ai in alphas_tem_value])
-            alphas_tem_value = Sigma / degree_value
+            nodelist, 1) if alphas_init == None else dict(alphas_init)
+        alphas_tem_value = np.array(Helper.dict_values(alphas, nodelist), dtype=float)
+        alphas_tem_value = RandomNetwork.iterate_alphas(
+            degree_value, alphas_tem_value, iters=iters, solver=solver, tol=tol)
 
         for i, node in enumerate(nodelist):
             alphas[node] = alphas_tem_value[i]
 
         return alphas
 
+    @staticmethod
+    def iteration_state(G1dict, degrees, solver="picard", tol=None):
+        '''
+        iteration_state(G1dict,degrees,solver="picard",tol=None)
+
+        Create the resumable iteration of the alphas of a network, starting from all alphas equal to 1. The nodes are grouped by degree,
+        so that the state iterates one alpha per degree class.
+
+        Parameters
+        ----------
+        G1dict: Reference network in neighborhood format without self-interactions, or a Graph.
+        degrees: The node degrees of G1dict, not used for a Graph.
+        solver: "picard", "anderson" or "newton", see Solver.solve.
+        tol: Stop advancing once the maximum absolute expected-degree residual is below tol, see IterationState.
+
+        Returns
+        -------
+        state: An IterationState with no sweeps done.
+        '''
+        if isinstance(G1dict, Graph):
+            nodes = G1dict.nodes()
+            nodelist, degree_value = nodes.tolist(), G1dict.degrees[nodes]
+        else:
+            nodelist = list(G1dict.keys())
+            degree_value = np.array(Helper.dict_values(degrees, nodelist))
+        class_degrees, class_alphas, counts, inverse = RandomNetwork.degree_classes(degree_value, np.ones(len(nodelist)))
+        return IterationState(lambda a: RandomNetwork.class_update(a, class_degrees, counts), class_degrees, class_alphas,
+                              nodelist, inverse=inverse, solver=solver, tol=tol,
+                              jacobian=lambda a: RandomNetwork.class_jacobian(a, counts))
+
+    @staticmethod
+    def advance_state(state, iters, degrees, store=None, checkpoint=()):
+        '''
+        advance_state(state,iters,degrees,store=None,checkpoint=())
+
+        Advance the state by iters sweeps, looking up the resulting alphas in the store first.
+
+        Parameters
+        ----------
+        state: The IterationState created by iteration_state.
+        iters: The number of sweeps.
+        degrees: The node degrees of the network, dictionary or array, part of the key.
+        store: An AlphaStore or None.
+        checkpoint: A tuple identifying the iterations that led to the state, part of the key. The number of sweeps is added to it.
+
+        Returns
+        -------
+        state: The advanced state.
+        '''
+        if store is None:
+            return state.advance(iters)
+        sweeps = state.sweeps + iters
+        key = AlphaStore.degree_key(degrees, *checkpoint, sweeps)
+        value = store.get(key)
+        if value is not None:
+            table = dict(zip(value["degrees"].tolist(), value["alphas"]))
+            # the sweeps actually done and the convergence are stored too, a fit with a tol may stop before the checkpoint
+            return state.restore([table[d] for d in state.degree_value.astype(np.int64).tolist()], int(value.get("sweeps", sweeps)),
+                                 bool(value.get("converged", False)))
+        state.advance(iters)
+        store.put(key, {"degrees": state.degree_value.astype(np.int64), "alphas": state.alphas_value.copy(),
+                        "sweeps": np.int64(state.sweeps), "converged": np.bool_(state.converged)})
+        return state
+
     @staticmethod
     def cal_neg(a1elist: list, a2elist: list, alphas: dict):
         """cal_neg calculate the negative benchmark for a given alphas.
@@ -206,62 +588,97 @@ class RandomNetwork:
             neg1_mean, neg1_sigma
         """
         # only calculate the links in the comparing network(a2elist). Other links will never overlap with the comparing network.
-        P1 = RandomSubnetwork.cal_probability(
-            a2elist, a1elist, alphas)
-        Pv1 = {link: P1[link]*(1-P1[link]) for link in P1}
+        _, neg1_mean, neg1_var = RandomSubnetwork.cal_link_probability(a2elist, a1elist, alphas)
         # one side
-        neg1_mean = sum([P1.get(link, 0) for link in a2elist])
-        neg1_sigma = np.sqrt(sum([Pv1.get(link, 0) for link in a2elist]))
+        neg1_sigma = np.sqrt(neg1_var)
         return neg1_mean, neg1_sigma
 
     @staticmethod
-    def optimize_neg(a1elist, a2elist, iters_start=100, neg_change_limit=1, iter_spacing=100, max_iterations=2000):
+    def optimize_neg(a1elist, a2elist, iters_start=100, neg_change_limit=1, iter_spacing=100, max_iterations=2000, solver="picard", return_alphas=False, store=None, callback=None,
+                     mean_rtol=None, residual_atol=None, residual_rtol=None, return_status=False):
         '''
         optimize_neg(a1elist,a2elist,iters_start=1000,neg_change_limit=1,iter_spacing=1000,max_iterations=20000)
 
-        Optimize the neg by stopping iterating alphas at a given criterion.
+        Optimize the neg by stopping iterating alphas at a given criterion, see Convergence.
 
         Parameters
         ----------
         a1elist: network1 represented in the edgelist format. network1 will be randomized and compared with network2.
         a2elist: network2 represented in the edgelist format.
+                 Both networks may also be Graphs, the fitting then works on their arrays.
         iters_start: the minimum iteration of alphas, default = 100
         neg_change_limit: the stopping criterion based on the absolute change of neg between iter_spacing iterations.
         iter_spacing: check the neg change every iter_spacing.
         max_iterations: The maximum iterations.
+        solver: "picard", "anderson" or "newton", the solver used for updating alphas, see Solver.solve.
+        return_alphas: if True, the fitted alphas are returned as well.
+        store: an AlphaStore. The alphas at every check only depend on the degree sequence of network1, so they are looked up in and
+               saved to the store, and networks sharing the degree sequence skip the fitting.
+        callback: function called with the metrics of every check, see Solver.metrics and Monitor. If None, nothing is reported.
+        mean_rtol: the stopping criterion on the change of neg relative to neg, added to neg_change_limit.
+        residual_atol: stop when the expected-degree residual of every node is within residual_atol + residual_rtol*degree.
+                       It is also the tol of the solver, which stops between the checks once the maximum residual is below it;
+                       by default Solver.TOL for the anderson and newton solvers, picard then always runs whole iter_spacing.
+        residual_rtol: see residual_atol. If both are None, the residual is not checked.
+        return_status: if True, the convergence status is returned as well.
 
         Returns
         -------
-        cur_iter: the stopped iteration
+        cur_iter: the number of sweeps done when the iterations stopped
         neg_mean: the neg mean
         neg_sigma: the neg sigma
+        alphas: the fitted alphas of network1, only returned if return_alphas is True.
+        status: "residual", "mean" or "max_iterations", the test that stopped the iterations, only returned if return_status is True.
 
         '''
-        G1dict = Formatter.edgelist_to_neighborhood(a1elist)
-        a0elist = list(set(a1elist).union(a2elist))
+        if isinstance(a1elist, Graph):
+            G1dict = a1elist
+            degrees = a1elist.degrees[a1elist.nodes()]
+        else:
+            G1dict = Formatter.edgelist_to_neighborhood(a1elist)
 
-        G1dict = Helper.dict_remove_self(G1dict)  # remove self-interactions
-        # reference degree sequence generated from G1
-        degrees = Helper.cal_node_degree(G1dict)
+            G1dict = Helper.dict_remove_self(G1dict)  # remove self-interactions
+            # reference degree sequence generated from G1
+            degrees = Helper.cal_node_degree(G1dict)
 
+        convergence = Convergence(neg_change_limit, mean_rtol, residual_atol, residual_rtol)
         # fisrt generate alphas for iters_start iterations
-        alphas_prev = RandomNetwork.alphas_iteration(
-            G1dict, alphas_init=None, iters=iters_start)
-        neg_mean_prev, neg_sigma_prev = RandomNetwork.cal_neg(
-            a1elist, a2elist, alphas=alphas_prev)
-        # check neg for every iter_spacing
-        for i in range(iters_start+iter_spacing, max_iterations+iter_spacing, iter_spacing):
-            alphas = RandomNetwork.alphas_iteration(
-                G1dict, alphas_init=alphas_prev, iters=iters_start)
-            # check the change in neg
-            neg_mean, neg_sigma = RandomNetwork.cal_neg(
-                a1elist, a2elist, alphas=alphas)
-            # check the absolute change in pos
-            if abs(neg_mean - neg_mean_prev) < neg_change_limit:
-                cur_iter = i  # record the stopped iter
-                break  # stop iteration
-            else:
-                alphas_prev = alphas
-                neg_mean_prev = neg_mean
-
-        return neg_mean, neg_sigma, cur_iter
+        # the anderson and newton solvers stop between the checks once the residual is below their tol, picard runs whole spacings
+        tol = residual_atol if residual_atol is not None else (None if solver == "picard" else Solver.TOL)
+        state = RandomNetwork.iteration_state(G1dict, degrees, solver=solver, tol=tol)
+        checkpoint = ("optimize_neg", solver, iters_start, iter_spacing) + ((("tol", tol),) if tol is not None else ())
+        if callback is not None:
+            start = time.perf_counter()
+        RandomNetwork.advance_state(state, iters_start, degrees, store, checkpoint)
+        # index the links of network2 once, every check then only evaluates the probabilities on arrays
+        index = RandomSubnetwork.link_index(a2elist if isinstance(a2elist, Graph) else list(a2elist), a1elist, state.nodelist)
+        _, neg_mean, neg_var = RandomSubnetwork.link_probability(state.values(), *index)
+        cur_iter = state.sweeps
+        # the fit may already be converged after iters_start
+        residuals = state.residuals() if callback is not None or convergence.residual_test else None
+        status = convergence.check(residuals, state.degree_value, neg_mean, converged=state.converged)
+        if callback is not None:
+            callback(Solver.metrics("optimize_neg", state.sweeps, np.abs(residuals).max(initial=0), None, state.alphas_value, start, neg_mean))
+            alphas_prev = state.alphas_value
+        # check neg for every iter_spacing, each check continues the iterations of the previous one
+        while status is None and state.sweeps < max_iterations:
+            neg_mean_prev = neg_mean
+            RandomNetwork.advance_state(state, iter_spacing, degrees, store, checkpoint)
+            _, neg_mean, neg_var = RandomSubnetwork.link_probability(state.values(), *index)
+            cur_iter = state.sweeps  # record the sweeps done so far
+            # check the expected-degree residual and the absolute change in neg
+            residuals = state.residuals() if callback is not None or convergence.residual_test else None
+            status = convergence.check(residuals, state.degree_value, neg_mean, neg_mean_prev, state.converged)
+            if callback is not None:
+                callback(Solver.metrics("optimize_neg", state.sweeps, np.abs(residuals).max(initial=0), alphas_prev, state.alphas_value, start, neg_mean, neg_mean_prev))
+                alphas_prev = state.alphas_value
+        if status is None:
+            status = "max_iterations"
+
+        neg_sigma = np.sqrt(neg_var)
+        result = (neg_mean, neg_sigma, cur_iter)
+        if return_alphas:
+            result += (state.snapshot(),)
+        if return_status:
+            result += (status,)
+        return result
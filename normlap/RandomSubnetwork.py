@@ -1,11 +1,231 @@
-from Helper import Helper
-from Formatter import Formatter
-import random
+from .Helper import Helper
+from .Formatter import Formatter
+from .Solver import Solver
+from .AlphaStore import AlphaStore
+from .IterationState import IterationState
+from .Convergence import Convergence
+from .Graph import Graph
+import time
 import numpy as np
 
 
 class RandomSubnetwork:
 
+    @staticmethod
+    def pool_csr(G0dict, G1dict, degrees):
+        '''
+        pool_csr(G0dict,G1dict,degrees)
+
+        Build the pool as integer-indexed CSR arrays masked to the nodes of G1dict. Both networks should not contain self-interactions.
+
+        Parameters
+        ----------
+        G0dict: Complete network in neighborhood format. For example, N = {"A": {"B", "C"},"B":{"A"},"C":{"A"}}
+                Or a Graph, the arrays are then built without python objects per link and self-interactions are ignored.
+        G1dict: Reference network in neighborhood format that provides the node degree constriants, or a Graph if G0dict is a Graph.
+        degrees: The node degrees of G1dict, not used for a Graph.
+
+        Returns
+        -------
+        nodelist: The nodes of G1dict, node nodelist[i] has index i in the arrays below.
+        indptr: The neighbors of node i are indices[indptr[i]:indptr[i+1]].
+        indices: The pool neighbors of each node that are also in G1dict.
+        degree_value: Array of the node degrees following the order of nodelist.
+        '''
+        if isinstance(G0dict, Graph):
+            nodes = G1dict.nodes()
+            node2idx = np.full(max(G0dict.n_nodes, G1dict.n_nodes), -1, dtype=np.int64)
+            node2idx[nodes] = np.arange(len(nodes))
+            rows = node2idx[np.repeat(np.arange(G0dict.n_nodes), np.diff(G0dict.indptr))]
+            cols = node2idx[G0dict.indices]
+            keep = (rows >= 0) & (cols >= 0)
+            indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(rows[keep], minlength=len(nodes)), out=indptr[1:])
+            return nodes.tolist(), indptr, cols[keep], G1dict.degrees[nodes].astype(float)
+        nodelist = list(G1dict.keys())
+        node2idx = {node: i for i, node in enumerate(nodelist)}
+        neighbors = [[node2idx[j] for j in G0dict.get(i, ()) if j in node2idx] for i in nodelist]
+        indptr = np.zeros(len(nodelist) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(row) for row in neighbors])
+        indices = np.fromiter((j for row in neighbors for j in row), dtype=np.int64, count=indptr[-1])
+        degree_value = np.array(Helper.dict_values(degrees, nodelist), dtype=float)
+        return nodelist, indptr, indices, degree_value
+
+    @staticmethod
+    def pool_classes(csr):
+        '''
+        pool_classes(csr)
+
+        Group the nodes of the CSR pool with the same degree and the same pool neighbors. The update of the alpha of a node only depends
+        on its degree and on the alphas of its neighbors, so the nodes of a class keep identical alphas through the iterations, and the
+        iterations can run on the classes with the neighbors of a class counted by class. Two nodes of a class are never neighbors,
+        each would be its own neighbor, so unlike RandomNetwork.class_update no self-pair has to be removed from the sums.
+
+        Parameters
+        ----------
+        csr: The output of pool_csr.
+
+        Returns
+        -------
+        class_csr: The pool of the classes in the format of pool_csr: the first node of each class, indptr, the neighbor classes of
+                   each class, and the degree of each class.
+        weights: The number of neighbors of a node of the class in each neighbor class, following the indices of class_csr.
+        counts: The number of nodes in each class.
+        inverse: The class index of each node, class_alphas[inverse] recovers the alphas of the nodes.
+        '''
+        nodelist, indptr, indices, degree_value = csr
+        N = len(nodelist)
+        lengths = np.diff(indptr)
+        rows = np.repeat(np.arange(N), lengths)
+        # sort the neighbors of every node, equal neighborhoods are then equal slices of indices
+        indices = indices[np.lexsort((indices, rows))]
+        # two random sums over the neighborhoods give the candidate classes, every node is then compared with the first node of its class
+        rng = np.random.default_rng(0)
+        hashes = [np.bincount(rows, weights=rng.random(N)[indices], minlength=N) for _ in range(2)]
+        order = np.lexsort((hashes[1], hashes[0], lengths, degree_value))
+        keys = np.stack([degree_value[order], lengths[order], hashes[0][order], hashes[1][order]])
+        first = np.ones(N, dtype=bool)
+        first[1:] = np.any(keys[:, 1:] != keys[:, :-1], axis=0)
+        inverse = np.empty(N, dtype=np.int64)
+        inverse[order] = np.cumsum(first) - 1
+        reps = order[first]
+        offset = np.arange(len(indices)) - indptr[rows]
+        mismatch = indices != indices[indptr[reps[inverse[rows]]] + offset]
+        # a node that only shares the hashes of its class gets its own class
+        split = np.flatnonzero(np.bincount(rows[mismatch], minlength=N))
+        inverse[split] = len(reps) + np.arange(len(split))
+        reps = np.concatenate([reps, split])
+        K = len(reps)
+
+        # neighbor classes of the first node of every class, links to the same class are merged into one weighted entry
+        class_lengths = lengths[reps]
+        class_rows = np.repeat(np.arange(K), class_lengths)
+        starts = np.repeat(indptr[reps] - np.cumsum(class_lengths) + class_lengths, class_lengths)
+        code = np.sort(class_rows * K + inverse[indices[starts + np.arange(len(class_rows))]])
+        new = np.ones(len(code), dtype=bool)
+        new[1:] = code[1:] != code[:-1]
+        weights = np.diff(np.append(np.flatnonzero(new), len(code))).astype(float)
+        code = code[new]
+        class_indptr = np.zeros(K + 1, dtype=np.int64)
+        np.cumsum(np.bincount(code // max(K, 1), minlength=K), out=class_indptr[1:])
+        class_csr = ([nodelist[r] for r in reps], class_indptr, code % max(K, 1), degree_value[reps])
+        return class_csr, weights, np.bincount(inverse, minlength=K), inverse
+
+    @staticmethod
+    def csr_update(alphas_value, rows, indices, degree_value, weights=None):
+        '''
+        csr_update(alphas_value,rows,indices,degree_value,weights=None)
+
+        One update of the alphas for all nodes, gathers the alphas of both ends of every pool link and scatter-adds 1/(alpha_j+1/alpha_i) to node i.
+
+        Parameters
+        ----------
+        alphas_value: Array of the current alphas.
+        rows: The source node of each entry in indices, i.e. np.repeat(arange(N),np.diff(indptr)).
+        indices: The pool neighbors from pool_csr.
+        degree_value: Array of the node degrees.
+        weights: The multiplicity of each entry in indices, e.g. from pool_classes, by default None, meaning 1.
+
+        Returns
+        -------
+        alphas_value: Array of the updated alphas.
+        '''
+        terms = 1 / (alphas_value[indices] + 1 / alphas_value[rows])
+        if weights is not None:
+            terms *= weights
+        Sigma = np.bincount(rows, weights=terms, minlength=len(alphas_value))
+        return Sigma / degree_value
+
+    @staticmethod
+    def csr_jacobian(alphas_value, rows, indices, weights=None):
+        '''
+        csr_jacobian(alphas_value,rows,indices,weights=None)
+
+        The sparse Jacobian of the expected node degrees with respect to the log-alphas, used by the newton solver.
+
+        Parameters
+        ----------
+        alphas_value: Array of the current alphas.
+        rows: The source node of each entry in indices.
+        indices: The pool neighbors from pool_csr.
+        weights: The multiplicity of each entry in indices, by default None, meaning 1. With the classes of pool_classes, J is the
+                 derivative of the expected degree of a node of class i with respect to the log-alpha of class j, it is not symmetric.
+
+        Returns
+        -------
+        J: scipy.sparse matrix, J[i][j] is the derivative of the expected degree of node i with respect to log(alpha_j).
+        '''
+        import scipy.sparse  # only the newton solver needs scipy
+
+        N = len(alphas_value)
+        P = 1 / (1 + alphas_value[rows] * alphas_value[indices])
+        W = P * (1 - P)
+        if weights is not None:
+            W *= weights
+        J = scipy.sparse.csr_matrix((W, (rows, indices)), shape=(N, N)) + scipy.sparse.diags(np.bincount(rows, weights=W, minlength=N))
+        return -J
+
+    @staticmethod
+    def iterate_alphas(csr, alphas_value, iters=1000, probeNode=None, solver="picard", tol=None):
+        '''
+        iterate_alphas(csr,alphas_value,iters=1000,probeNode=None,solver="picard",tol=None)
+
+        Update the alphas for the given iterations on the CSR pool built by pool_csr.
+
+        Parameters
+        ----------
+        csr: The output of pool_csr.
+        alphas_value: Array of the initial alphas following the order of nodelist.
+        iters: The number of iterations for updating alphas.
+        probeNode: The index of the probe node. The alpha history will be returned for the probe node, only recorded by the picard solver.
+        solver: "picard", "anderson" or "newton", see Solver.solve.
+        tol: Stop early when the maximum expected-degree residual is below tol. If None, run all iterations.
+
+        Returns
+        -------
+        alphas_value: Array of the updated alphas.
+        alpha_probe: A list contains the history alphas for the probleNode, empty if probeNode is None.
+        '''
+        _, indptr, indices, degree_value = csr
+        rows = np.repeat(np.arange(len(degree_value)), np.diff(indptr))
+        alphas_value = np.asarray(alphas_value, dtype=float)
+        alpha_probe = []
+        if solver != "picard" or tol is not None:
+            alphas_value, _, _ = RandomSubnetwork.solve_csr(csr, alphas_value, solver=solver, tol=tol, max_iters=iters)
+            return alphas_value, alpha_probe
+        for itering in range(iters):
+            alphas_value = RandomSubnetwork.csr_update(alphas_value, rows, indices, degree_value)
+            if probeNode != None:
+                alpha_probe.append([itering, alphas_value[probeNode]])
+        return alphas_value, alpha_probe
+
+    @staticmethod
+    def solve_csr(csr, alphas_value, solver="picard", tol=None, max_iters=1000):
+        '''
+        solve_csr(csr,alphas_value,solver="picard",tol=None,max_iters=1000)
+
+        Solve the alphas on the CSR pool built by pool_csr with the given solver, see Solver.solve.
+
+        Parameters
+        ----------
+        csr: The output of pool_csr.
+        alphas_value: Array of the initial alphas following the order of nodelist.
+        solver: "picard", "anderson" or "newton".
+        tol: Stop when the maximum expected-degree residual is below tol. If None, run max_iters iterations.
+        max_iters: The maximum number of iterations.
+
+        Returns
+        -------
+        alphas_value: Array of the solved alphas.
+        cur_iter: The number of iterations performed.
+        residual: The maximum absolute expected-degree residual.
+        '''
+        _, indptr, indices, degree_value = csr
+        rows = np.repeat(np.arange(len(degree_value)), np.diff(indptr))
+        return Solver.solve(lambda a: RandomSubnetwork.csr_update(a, rows, indices, degree_value), degree_value, alphas_value,
+                            solver=solver, tol=tol, max_iters=max_iters,
+                            jacobian=lambda a: RandomSubnetwork.csr_jacobian(a, rows, indices))
+
     def optimize_alpha(G0dict0, G1dict0, iters=1000, probeNode=0):
         '''
         optimize_alpha(G0dict,G1dict,iters=1000,probeNode=0
@@ -29,28 +249,16 @@ class RandomSubnetwork:
         # reference degree sequence generated from G1
         degrees = Helper.cal_node_degree(G1dict)
         # initialize alphas for all nodes to 1
-        alphas = {}.fromkeys(G1dict.keys(), 1)
-        alpha_probe = []
-        for itering in range(iters):
-            # save the new alphas, update alphas until the end of iteration.
-            alphas_tem = {}.fromkeys(G1dict.keys(), 1)
-            for i in G1dict:
-                Sigma = 0
-                # only the links exsit in G0 will be counted.
-                for j in G0dict[i]:
-                    if j in G1dict.keys():  # if node j also in G1
-                        Sigma += 1/(alphas[j]+1/alphas[i])
-                alphas_tem[i] = Sigma/degrees[i]
-            alphas.update(alphas_tem)
-            if probeNode != None:
-                alpha_probe.append(
-                    [itering, alphas[list(G1dict.keys())[probeNode]]])
-            #if itering+10>iters: print(alphas)
+        csr = RandomSubnetwork.pool_csr(G0dict, G1dict, degrees)
+        nodelist = csr[0]
+        alphas_value, alpha_probe = RandomSubnetwork.iterate_alphas(
+            csr, np.ones(len(nodelist)), iters=iters, probeNode=probeNode)
+        alphas = dict(zip(nodelist, alphas_value))
         return alphas, alpha_probe
 
-    def optimize_alpha_with_stop(G0dict0, G1dict0, max_iters=1000, stopping_criterion=-1):
+    def optimize_alpha_with_stop(G0dict0, G1dict0, max_iters=1000, stopping_criterion=-1, probeNode=0, callback=None):
         '''
-        optimize_alpha_with_stop(G0dict0,G1dict0,max_iters=1000,stopping_criterion = -1):
+        optimize_alpha_with_stop(G0dict0,G1dict0,max_iters=1000,stopping_criterion = -1,probeNode=0,callback=None):
 
         Optimize the alpha for nodes in G1dict.
 
@@ -60,6 +268,8 @@ class RandomSubnetwork:
         G1dict: Reference network in neighborhood format that provides the node degree constriants.
         max_iters: The maximum number of iterations for updating alphas.
         stopping_criterion: The stopping criterion for updating alphas. If the relative difference between the new alpha and the old alpha is smaller than the stopping_criterion, the updating process will stop.
+        probeNode: The index of the probe node. The alpha history will be returned for the probe node, None records no history.
+        callback: Function called with the metrics of every iteration, see Solver.metrics and Monitor. If None, nothing is reported.
 
         Returns
         -------
@@ -73,32 +283,159 @@ class RandomSubnetwork:
         # reference degree sequence generated from G1
         degrees = Helper.cal_node_degree(G1dict)
         # initialize alphas for all nodes to 1
-        alphas = {}.fromkeys(G1dict.keys(), 1)
+        csr = RandomSubnetwork.pool_csr(G0dict, G1dict, degrees)
+        nodelist, indptr, indices, degree_value = csr
+        rows = np.repeat(np.arange(len(nodelist)), np.diff(indptr))
+        alphas_value = np.ones(len(nodelist))
+        # the history only follows the probe node, the memory grows with the iterations and not with the network
         alphas_history = []
-        rel_change = {}.fromkeys(G1dict.keys(), 999)
-        alpha_probe = []
+        if probeNode is not None and not len(nodelist):
+            probeNode = None
+        if callback is not None:
+            start, alphas_reported = time.perf_counter(), None
+        rel_change = np.full(len(nodelist), 999.0)
         for itering in range(max_iters):
             cur_iter = itering
             # if the maximum relative change of alphas is smaller than the stopping criterion, stop updating alphas.
-            if max(rel_change.values()) < stopping_criterion:
+            if rel_change.max(initial=0) < stopping_criterion:
                 break
-            # save the new alphas to alphas_tem, update alphas until the end of iteration.
-            alphas_tem = {}.fromkeys(G1dict.keys(), 1)
-            for i in G1dict:
-                Sigma = 0
-                # only the links exsit in G0 will be counted.
-                for j in G0dict[i]:
-                    # if node j also in G1, otherwise degrees[j]=0
-                    if j in G1dict.keys():
-                        Sigma += 1 / (alphas[j] + 1 / alphas[i])
-                alphas_tem[i] = Sigma / degrees[i]
-                diff = (alphas_tem[i] - alphas[i])
-                rel_change[i] = abs(diff / alphas[i])
-            alphas.update(alphas_tem)
-            alphas_history.append(list(alphas.values()))
+            alphas_prev = alphas_value
+            alphas_value = RandomSubnetwork.csr_update(alphas_value, rows, indices, degree_value)
+            if probeNode is not None:
+                alphas_history.append([itering, alphas_value[probeNode]])
+            if callback is not None:
+                # the update gives the residual of the alphas before it
+                residual = np.abs(Solver.residual(alphas_prev, alphas_value, degree_value)).max(initial=0)
+                callback(Solver.metrics("optimize_alpha_with_stop", itering, residual, alphas_reported, alphas_prev, start))
+                alphas_reported = alphas_prev
+            rel_change = abs((alphas_value - alphas_prev) / alphas_prev)
+        alphas = dict(zip(nodelist, alphas_value))
 
         return alphas, alphas_history, cur_iter
 
+    def optimize_alpha_with_solver(G0dict0, G1dict0, solver="anderson", tol=1e-6, max_iters=1000):
+        '''
+        optimize_alpha_with_solver(G0dict0,G1dict0,solver="anderson",tol=1e-6,max_iters=1000)
+
+        Optimize the alpha for nodes in G1dict until the expected degrees match the reference degrees.
+
+        Parameters
+        ----------
+        G0dict: Complete network in neighborhood format. For example, N = {"A": {"B", "C"},"B":{"A"},"C":{"A"}}
+        G1dict: Reference network in neighborhood format that provides the node degree constriants.
+        solver: "picard", "anderson" or "newton", see Solver.solve.
+        tol: The stopping criterion on the maximum absolute difference between the expected and the reference degrees.
+        max_iters: The maximum number of iterations for updating alphas.
+
+        Returns
+        -------
+        alphas: A dictionary contains the optimized alphas for each node.
+        cur_iter: The number of iterations when stop updating alphas.
+        residual: The maximum absolute expected-degree residual of the alphas.
+        '''
+        G0dict = Helper.dict_remove_self(G0dict0)  # remove self-interactions
+        G1dict = Helper.dict_remove_self(G1dict0)  # remove self-interactions
+        degrees = Helper.cal_node_degree(G1dict)
+        csr = RandomSubnetwork.pool_csr(G0dict, G1dict, degrees)
+        nodelist = csr[0]
+        alphas_value, cur_iter, residual = RandomSubnetwork.solve_csr(
+            csr, np.ones(len(nodelist)), solver=solver, tol=tol, max_iters=max_iters)
+        alphas = dict(zip(nodelist, alphas_value))
+        return alphas, cur_iter, residual
+
+    @staticmethod
+    def link_index(G0elist, G1elist, nodelist):
+        '''
+        link_index(G0elist,G1elist,nodelist)
+
+        Index the links of G0elist once, so that link_probability can be evaluated for any alphas following nodelist without python loops.
+        The self-interactions are looked up in a set of G1elist built once.
+
+        Parameters
+        ----------
+        G0elist: The links in edgelist format, or a Graph.
+        G1elist: Reference network that determines whether a self-interaction is allowed, see cal_probability. A Graph if G0elist is a Graph.
+        nodelist: The nodes having an alpha, in the order of the alpha array.
+
+        Returns
+        -------
+        src: The index in nodelist of the first node of each link, -1 if the node has no alpha.
+        dst: The index in nodelist of the second node of each link, -1 if the node has no alpha.
+        self_probs: The probability of each self-interaction, 1 if it exists in G1elist else 0, NaN for the other links.
+        '''
+        if isinstance(G0elist, Graph):
+            node2idx = np.full(max(G0elist.n_nodes, G1elist.n_nodes), -1, dtype=np.int64)
+            node2idx[np.asarray(nodelist, dtype=np.int64)] = np.arange(len(nodelist))
+            src, dst = node2idx[G0elist.src], node2idx[G0elist.dst]
+            loop = G0elist.src == G0elist.dst
+            allowed = np.zeros(len(node2idx), dtype=bool)
+            allowed[G1elist.self_nodes] = True
+            self_probs = np.full(G0elist.n_edges, np.nan)
+            self_probs[loop] = allowed[G0elist.src[loop]]
+            return src, dst, self_probs
+        node2idx = {node: i for i, node in enumerate(nodelist)}
+        src = np.fromiter((node2idx.get(link[0], -1) for link in G0elist), dtype=np.int64, count=len(G0elist))
+        dst = np.fromiter((node2idx.get(link[1], -1) for link in G0elist), dtype=np.int64, count=len(G0elist))
+        self_probs = np.full(len(G0elist), np.nan)
+        loops = [e for e, link in enumerate(G0elist) if link[0] == link[1]]
+        if loops:
+            G1set = G1elist if isinstance(G1elist, (set, dict)) else set(G1elist)
+            self_probs[loops] = [G0elist[e] in G1set for e in loops]
+        return src, dst, self_probs
+
+    @staticmethod
+    def link_probability(alphas_value, src, dst, self_probs):
+        '''
+        link_probability(alphas_value,src,dst,self_probs)
+
+        Calculate the probability of the links indexed by link_index and its mean/variance reductions in one pass.
+
+        Parameters
+        ----------
+        alphas_value: Array of the alphas following nodelist of link_index.
+        src, dst, self_probs: The output of link_index.
+
+        Returns
+        -------
+        probs: Array of the connection probability of each link, 0 for the links with a node without alpha.
+        mean: The sum of probs, the expected overlap with the links.
+        variance: The sum of probs*(1-probs), the variance of the overlap.
+        '''
+        alphas_value = np.append(np.asarray(alphas_value, dtype=float), np.nan)  # index -1 gives NaN
+        probs = 1/(1+alphas_value[src]*alphas_value[dst])
+        probs = np.where(np.isnan(self_probs), probs, self_probs)
+        probs[np.isnan(probs)] = 0  # links with a node outside the alpha dict
+        return probs, probs.sum(), probs @ (1-probs)
+
+    @staticmethod
+    def cal_link_probability(G0elist, G1elist, alphas):
+        '''
+        cal_link_probability(G0elist,G1elist,alphas)
+
+        Vectorized cal_probability, returning arrays instead of a dictionary together with the mean/variance reductions.
+
+        Parameters
+        ----------
+        G0elist: The links in edgelist format, or a Graph.
+        G1elist: Reference network that determines whether a self-interaction is allowed, see cal_probability.
+        alphas: The optimized alphas for each node(of G1, the reference network). If G0elist is a Graph, may also be an array indexed by node id.
+
+        Returns
+        -------
+        probs: Array of the connection probability following the links of G0elist, 0 for the links without probability.
+        mean: The sum of probs.
+        variance: The sum of probs*(1-probs).
+        '''
+        if isinstance(alphas, dict):
+            nodelist = list(alphas.keys())
+            alphas_value = np.fromiter(alphas.values(), dtype=float, count=len(alphas))
+        else:
+            alphas_value = np.asarray(alphas, dtype=float)
+            nodelist = np.arange(len(alphas_value))
+        if not isinstance(G0elist, (list, Graph)):
+            G0elist = list(G0elist)
+        return RandomSubnetwork.link_probability(alphas_value, *RandomSubnetwork.link_index(G0elist, G1elist, nodelist))
+
     def cal_probability(G0elist, G1elist, alphas):
         '''
         cal_probability(G0elist,alphas)
@@ -107,53 +444,89 @@ class RandomSubnetwork:
 
         Parameters
         ----------
-        G0elist: The complete network in edgelist format. Example: G0elist = [('A', 'B'), ('A', 'C')]
+        G0elist: The complete network in edgelist format. Example: G0elist = [('A', 'B'), ('A', 'C')]. Or a Graph.
         G1elist: Reference network in neighborhood format that provides the node degree constriants. Here it is used to determine whether a self-interaction si allowed.
-                If (i,i) in G1elist, pii=1, else, pii=0.
-        alphas: The optimized alphas for each node(of G1, the reference network).
+                If (i,i) in G1elist, pii=1, else, pii=0. Must be a Graph if G0elist is a Graph.
+        alphas: The optimized alphas for each node(of G1, the reference network). If G0elist is a Graph, may also be an array indexed by node id.
 
         Returns
         -------
         probs: A dictionary contains the connection probability of the edges in G0elist.
+               If G0elist is a Graph, an array following the links of G0elist, 0 for the links without probability.
         '''
-
-        probs = {}
-        for link in G0elist:
-            if link[0] == link[1]:  # self-interactions
-                if link in G1elist:  # exsit in G1
-                    probs[link] = 1
-                else:  # self-interaction not exsit in G1
-                    probs[link] = 0
-            else:  # not self-interactions
-                # Only count links that both nodes in alpha dict
-                if link[0] in alphas.keys() and link[1] in alphas.keys():
-                    probs[link] = 1/(1+alphas[link[0]]*alphas[link[1]])
-        return probs
-
-    def construct_sample_network(probs):
+        G0elist = G0elist if isinstance(G0elist, (list, Graph)) else list(G0elist)
+        probs, _, _ = RandomSubnetwork.cal_link_probability(G0elist, G1elist, alphas)
+        if isinstance(G0elist, Graph):
+            return probs
+        # only links that are self-interactions or have both nodes in alpha dict
+        defined = np.array([link[0] == link[1] or (link[0] in alphas and link[1] in alphas) for link in G0elist], dtype=bool)
+        return {G0elist[e]: p for e, p in zip(np.flatnonzero(defined).tolist(), probs[defined].tolist())}
+
+    def construct_sample_network(probs, rng=None):
         '''
-        construct_sample_network(probs)
+        construct_sample_network(probs,rng=None)
 
-        Construct sample network according to the connection probability provided by probs.
+        Construct sample network according to the connection probability provided by probs, all the links are drawn at once.
 
         Parameters
         ----------
         probs: A dictionary contains the connection probability of the links(of G0, the complete network). Example: {(1, 3): 0.99, (1, 4): 0.96}.
+        rng: The seed or np.random.Generator of the draws, see Helper.get_rng.
 
         Returns
         -------
         Gsample: Constructed sample network according to probs in edgelist format.
         '''
-        Gsample = []
-        for i in probs:
-            prob = probs[i]
-            rand = random.random()
-            if prob >= rand:
-                Gsample.append(i)
-        return Gsample
+        links = list(probs.keys())
+        values = np.fromiter(probs.values(), dtype=float, count=len(links))
+        keep = values >= Helper.get_rng(rng).random(len(links))
+        return [links[e] for e in np.flatnonzero(keep).tolist()]
 
     @staticmethod
-    def alphas_iteration(G0dict, G1dict, degrees, alphas_init: dict = None, iters: int = 1000):
+    def construct_sample_graph(G0, probs, rng=None):
+        '''
+        construct_sample_graph(G0,probs,rng=None)
+
+        Construct sample network from the links of a Graph, keeping each link with its probability.
+
+        Parameters
+        ----------
+        G0: The complete network as a Graph.
+        probs: The connection probability of each link of G0, e.g. cal_probability(G0,G1,alphas).
+        rng: The seed or np.random.Generator of the draws, see Helper.get_rng.
+
+        Returns
+        -------
+        Gsample: Constructed sample network as a Graph with the node ids of G0.
+        '''
+        return G0.subgraph(Helper.get_rng(rng).random(G0.n_edges) < probs)
+
+    @staticmethod
+    def construct_sample_masks(probs, k, block_size=2**24, rng=None):
+        '''
+        construct_sample_masks(probs,k,block_size=2**24,rng=None)
+
+        Construct k sample networks at once, each link is drawn independently with the probability given by probs.
+
+        Parameters
+        ----------
+        probs: Array of the connection probability of the links.
+        k: The number of sample networks.
+        block_size: The maximum number of draws held in memory at once.
+        rng: The seed or np.random.Generator of the draws, see Helper.get_rng.
+
+        Yields
+        ------
+        mask: Boolean array of shape (rows, len(probs)), mask[s][e] is True if link e is in sample s. The rows of all blocks add up to k.
+        '''
+        rng = Helper.get_rng(rng)
+        probs = np.asarray(probs, dtype=float)
+        rows = max(1, block_size // max(len(probs), 1))
+        for start in range(0, k, rows):
+            yield rng.random((min(rows, k - start), len(probs))) < probs
+
+    @staticmethod
+    def alphas_iteration(G0dict, G1dict, degrees, alphas_init: dict = None, iters: int = 1000, solver: str = "picard", tol: float = None):
         """alphas_iteration iterate updating alphas for given iterations.
 
         Parameters
@@ -168,6 +541,10 @@ class RandomSubnetwork:
             _description_, by default None
         iters : int, optional
             _description_, by default 1000
+        solver : str, optional
+            "picard", "anderson" or "newton", see Solver.solve, by default "picard"
+        tol : float, optional
+            Stop early when the maximum expected-degree residual is below tol, by default None
 
         Returns
         -------
@@ -176,21 +553,82 @@ class RandomSubnetwork:
         """
         # initialize alphas
         alphas = {}.fromkeys(
-            G1dict.keys(), 1) if alphas_init == None else alphas_init
-        for itering in range(iters):
-            # save the new alphas, update alphas until the end of iteration.
-            alphas_tem = {}.fromkeys(G1dict.keys(), 1)
-            for i in G1dict:
-                Sigma = 0
-                # only the links exsit in G0 will be counted.
-                for j in G0dict[i]:
-                    # if node j also in G1, otherwise degrees[j]=0
-                    if j in G1dict.keys():
-                        Sigma += 1 / (alphas[j] + 1 / alphas[i])
-                alphas_tem[i] = Sigma / degrees[i]
-            alphas.update(alphas_tem)
+            G1dict.keys(), 1) if alphas_init == None else dict(alphas_init)
+        csr = RandomSubnetwork.pool_csr(G0dict, G1dict, degrees)
+        nodelist = csr[0]
+        alphas_value, _ = RandomSubnetwork.iterate_alphas(
+            csr, Helper.dict_values(alphas, nodelist), iters=iters, solver=solver, tol=tol)
+        alphas.update(zip(nodelist, alphas_value))
         return alphas
 
+    @staticmethod
+    def iteration_state(csr, solver="picard", compress=False, tol=None):
+        '''
+        iteration_state(csr,solver="picard",compress=False,tol=None)
+
+        Create the resumable iteration of the alphas on the CSR pool built by pool_csr, starting from all alphas equal to 1.
+
+        Parameters
+        ----------
+        csr: The output of pool_csr.
+        solver: "picard", "anderson" or "newton", see Solver.solve.
+        compress: If True, the state iterates one alpha per class of pool_classes, the alphas of the nodes are only expanded by
+                  values and snapshot.
+        tol: Stop advancing once the maximum absolute expected-degree residual is below tol, see IterationState.
+
+        Returns
+        -------
+        state: An IterationState with no sweeps done.
+        '''
+        nodelist = csr[0]
+        weights = inverse = None
+        if compress:
+            csr, weights, _, inverse = RandomSubnetwork.pool_classes(csr)
+        _, indptr, indices, degree_value = csr
+        rows = np.repeat(np.arange(len(degree_value)), np.diff(indptr))
+        return IterationState(lambda a: RandomSubnetwork.csr_update(a, rows, indices, degree_value, weights), degree_value,
+                              np.ones(len(degree_value)), nodelist, inverse=inverse, solver=solver, tol=tol,
+                              jacobian=lambda a: RandomSubnetwork.csr_jacobian(a, rows, indices, weights))
+
+    @staticmethod
+    def advance_state(state, iters, store=None, digests=None, checkpoint=()):
+        '''
+        advance_state(state,iters,store=None,digests=None,checkpoint=())
+
+        Advance the state by iters sweeps, looking up the resulting alphas in the store first.
+
+        Parameters
+        ----------
+        state: The IterationState created by iteration_state.
+        iters: The number of sweeps.
+        store: An AlphaStore or None.
+        digests: The edges_digest of the reference network and of the pool, part of the key.
+        checkpoint: A tuple identifying the iterations that led to the state, part of the key. The number of sweeps is added to it.
+
+        Returns
+        -------
+        state: The advanced state.
+        '''
+        if store is None:
+            return state.advance(iters)
+        sweeps = state.sweeps + iters
+        key = AlphaStore.pool_key(*digests, *checkpoint, sweeps)
+        value = store.get(key)
+        if value is not None:
+            table = AlphaStore.unpack_node_alphas(value)
+            alphas_value = np.array([table[node] for node in state.nodelist], dtype=float)
+            if state.inverse is not None:  # the nodes of a class share their alpha
+                class_alphas = np.empty(len(state.alphas_value))
+                class_alphas[state.inverse] = alphas_value
+                alphas_value = class_alphas
+            # the sweeps actually done and the convergence are stored too, a fit with a tol may stop before the checkpoint
+            return state.restore(alphas_value, int(value.get("sweeps", sweeps)), bool(value.get("converged", False)))
+        state.advance(iters)
+        value = AlphaStore.pack_node_alphas(state.snapshot())
+        value.update(sweeps=np.int64(state.sweeps), converged=np.bool_(state.converged))
+        store.put(key, value)
+        return state
+
     @staticmethod
     def cal_pos(a1elist: list, a2elist: list, alphas: dict):
         """cal_pos calculate the positive benchmark for a given alphas.
@@ -211,61 +649,104 @@ class RandomSubnetwork:
         """
         # alphas of a1elist
         # only calculate the probability if links also in a2elist, otherwise, it won't overlap with a1elist
-        P1 = RandomSubnetwork.cal_probability(a2elist, a1elist, alphas=alphas)
-        Pv1 = {link: P1[link]*(1-P1[link]) for link in P1}
-        pos1_mean = sum([P1.get(link, 0) for link in a2elist])
-        pos1_sigma = np.sqrt(sum([Pv1.get(link, 0) for link in a2elist]))
+        _, pos1_mean, pos1_var = RandomSubnetwork.cal_link_probability(a2elist, a1elist, alphas)
+        pos1_sigma = np.sqrt(pos1_var)
         return pos1_mean, pos1_sigma
 
     @staticmethod
-    def optimize_pos(a1elist, a2elist, iters_start=1000, pos_change_limit=1, iter_spacing=1000, max_iterations=20000):
+    def optimize_pos(a1elist, a2elist, iters_start=1000, pos_change_limit=1, iter_spacing=1000, max_iterations=20000, solver="picard", return_alphas=False, store=None, callback=None,
+                     mean_rtol=None, residual_atol=None, residual_rtol=None, return_status=False, compress=False):
         '''
         optimize_pos(a1elist,a2elist,iters_start=1000,pos_change_limit=1,iter_spacing=1000,max_iterations=20000)
 
-        Optimize the pos by stopping iterating alphas at a given criterion.
+        Optimize the pos by stopping iterating alphas at a given criterion, see Convergence.
 
         Parameters
         ----------
         a1elist: network1 represented in the edgelist format. network1 will be randomized and compared with network2.
         a2elist: network2 represented in the edgelist format.  
+                 Both networks may also be Graphs, the fitting then works on their arrays.
         iters_start: the minimum iteration of alphas, default = 1000
         pos_change_limit: the stopping criterion based on the absolute change of pos between iter_spacing iterations.
         iter_spacing: check the pos change every iter_spacing.
         max_iterations: The maximum iterations.
+        solver: "picard", "anderson" or "newton", the solver used for updating alphas, see Solver.solve.
+        return_alphas: if True, the fitted alphas are returned as well.
+        store: an AlphaStore. The alphas at every check only depend on network1 and the pool, so they are looked up in and saved to the store.
+        callback: function called with the metrics of every check, see Solver.metrics and Monitor. If None, nothing is reported.
+        mean_rtol: the stopping criterion on the change of pos relative to pos, added to pos_change_limit.
+        residual_atol: stop when the expected-degree residual of every node is within residual_atol + residual_rtol*degree.
+                       It is also the tol of the solver, which stops between the checks once the maximum residual is below it;
+                       by default Solver.TOL for the anderson and newton solvers, picard then always runs whole iter_spacing.
+        residual_rtol: see residual_atol. If both are None, the residual is not checked.
+        return_status: if True, the convergence status is returned as well.
+        compress: if True, the alphas are fitted per class of nodes with the same degree and the same pool neighbors, see pool_classes.
+                  The iterations scale with the number of classes. The picard sweeps give the same alphas up to rounding, the anderson
+                  and newton solvers take their steps on the classes and converge to the same alphas.
 
         Returns
         -------
-        cur_iter: the stopped iteration
+        cur_iter: the number of sweeps done when the iterations stopped
         pos_mean: the pos mean
         pos_sigma: the pos sigma
+        alphas: the fitted alphas of network1, only returned if return_alphas is True.
+        status: "residual", "mean" or "max_iterations", the test that stopped the iterations, only returned if return_status is True.
 
         '''
-        G1dict = Formatter.edgelist_to_neighborhood(a1elist)
-        a0elist = list(set(a1elist).union(a2elist))
-        G0dict = Formatter.edgelist_to_neighborhood(a0elist)
-
-        G0dict = Helper.dict_remove_self(G0dict)  # remove self-interactions
-        G1dict = Helper.dict_remove_self(G1dict)  # remove self-interactions
-        # reference degree sequence generated from G1
-        degrees = Helper.cal_node_degree(G1dict)
+        if isinstance(a1elist, Graph):
+            a0elist = Graph.union(a1elist, a2elist)
+            csr = RandomSubnetwork.pool_csr(a0elist, a1elist, None)
+        else:
+            G1dict = Formatter.edgelist_to_neighborhood(a1elist)
+            a0elist = list(set(a1elist).union(a2elist))
+            G0dict = Formatter.edgelist_to_neighborhood(a0elist)
+
+            G0dict = Helper.dict_remove_self(G0dict)  # remove self-interactions
+            G1dict = Helper.dict_remove_self(G1dict)  # remove self-interactions
+            # reference degree sequence generated from G1
+            degrees = Helper.cal_node_degree(G1dict)
+            # build the pool arrays once and reuse them for all iterations
+            csr = RandomSubnetwork.pool_csr(G0dict, G1dict, degrees)
+        digests = (AlphaStore.edges_digest(a1elist), AlphaStore.edges_digest(a0elist)) if store is not None else None
+        convergence = Convergence(pos_change_limit, mean_rtol, residual_atol, residual_rtol)
         # fisrt generate alphas for iters_start iterations
-        alphas_prev = RandomSubnetwork.alphas_iteration(
-            G0dict, G1dict, degrees, alphas_init=None, iters=iters_start)
-        pos_mean_prev, pos_sigma_prev = RandomSubnetwork.cal_pos(
-            a1elist, a2elist, alphas=alphas_prev)
-        # check pos for every iter_spacing
-        for i in range(iters_start+iter_spacing, max_iterations+iter_spacing, iter_spacing):
-            alphas = RandomSubnetwork.alphas_iteration(
-                G0dict, G1dict, degrees, alphas_init=alphas_prev, iters=iters_start)
-            # check the change in pos
-            pos_mean, pos_sigma = RandomSubnetwork.cal_pos(
-                a1elist, a2elist, alphas=alphas)
-            # check the absolute change in pos
-            if abs(pos_mean - pos_mean_prev) < pos_change_limit:
-                cur_iter = i  # record the stopped iter
-                break  # stop iteration
-            else:
-                alphas_prev = alphas
-                pos_mean_prev = pos_mean
-
-        return pos_mean, pos_sigma, cur_iter
+        # the anderson and newton solvers stop between the checks once the residual is below their tol, picard runs whole spacings
+        tol = residual_atol if residual_atol is not None else (None if solver == "picard" else Solver.TOL)
+        state = RandomSubnetwork.iteration_state(csr, solver=solver, compress=compress, tol=tol)
+        checkpoint = ("optimize_pos", solver, iters_start, iter_spacing) + (("classes",) if compress else ())
+        checkpoint += (("tol", tol),) if tol is not None else ()
+        if callback is not None:
+            start = time.perf_counter()
+        RandomSubnetwork.advance_state(state, iters_start, store, digests, checkpoint)
+        # index the links of network2 once, every check then only evaluates the probabilities on arrays
+        index = RandomSubnetwork.link_index(a2elist if isinstance(a2elist, Graph) else list(a2elist), a1elist, state.nodelist)
+        _, pos_mean, pos_var = RandomSubnetwork.link_probability(state.values(), *index)
+        cur_iter = state.sweeps
+        # the fit may already be converged after iters_start
+        residuals = state.residuals() if callback is not None or convergence.residual_test else None
+        status = convergence.check(residuals, state.degree_value, pos_mean, converged=state.converged)
+        if callback is not None:
+            callback(Solver.metrics("optimize_pos", state.sweeps, np.abs(residuals).max(initial=0), None, state.alphas_value, start, pos_mean))
+            alphas_prev = state.alphas_value
+        # check pos for every iter_spacing, each check continues the iterations of the previous one
+        while status is None and state.sweeps < max_iterations:
+            pos_mean_prev = pos_mean
+            RandomSubnetwork.advance_state(state, iter_spacing, store, digests, checkpoint)
+            _, pos_mean, pos_var = RandomSubnetwork.link_probability(state.values(), *index)
+            cur_iter = state.sweeps  # record the sweeps done so far
+            # check the expected-degree residual and the absolute change in pos
+            residuals = state.residuals() if callback is not None or convergence.residual_test else None
+            status = convergence.check(residuals, state.degree_value, pos_mean, pos_mean_prev, state.converged)
+            if callback is not None:
+                callback(Solver.metrics("optimize_pos", state.sweeps, np.abs(residuals).max(initial=0), alphas_prev, state.alphas_value, start, pos_mean, pos_mean_prev))
+                alphas_prev = state.alphas_value
+        if status is None:
+            status = "max_iterations"
+
+        pos_sigma = np.sqrt(pos_var)
+        result = (pos_mean, pos_sigma, cur_iter)
+        if return_alphas:
+            result += (state.snapshot(),)
+        if return_status:
+            result += (status,)
+        return result
@@ -0,0 +1,234 @@
+import time
+import numpy as np
+
+
+class Solver:
+    """ Solvers for the maximum-entropy degree-constraint equations.
+
+    Both RandomNetwork and RandomSubnetwork fit alphas so that the expected degree of every node equals its degree in the reference network.
+    The models provide the fixed-point update a_new = Sigma/degree, where Sigma/a is the expected degree, so the residual of the equations
+    can be read from every update without an extra pass.
+    """
+
+    SOLVERS = ("picard", "anderson", "newton")
+    # default tolerance on the maximum absolute expected-degree residual of the anderson and newton fits
+    TOL = 1e-6
+    # the alphas of saturated nodes tend to 0, e.g. with all their pool links in the reference network, or to infinity, e.g. with none
+    # of their extra pool links taken. The log-space solvers keep them within these bounds, where the probabilities of their links are
+    # already 1 or 0 in float and the product of two alphas cannot overflow
+    ALPHA_MIN = 1e-150
+    ALPHA_MAX = 1e150
+    # relative cutoff of the small singular values of the Anderson least-squares problem
+    RCOND = 1e-3
+
+    @staticmethod
+    def log_alphas(alphas_value):
+        '''
+        log_alphas(alphas_value)
+
+        The log-alphas iterated by the anderson and newton solvers, the alphas are clipped to [ALPHA_MIN, ALPHA_MAX].
+        '''
+        return np.log(np.clip(alphas_value, Solver.ALPHA_MIN, Solver.ALPHA_MAX))
+
+    @staticmethod
+    def clip_log_alphas(x):
+        '''
+        clip_log_alphas(x)
+
+        Clip the log-alphas of a solver step to [log(ALPHA_MIN), log(ALPHA_MAX)].
+        '''
+        return np.clip(x, np.log(Solver.ALPHA_MIN), np.log(Solver.ALPHA_MAX))
+
+    @staticmethod
+    def residual(alphas_value, alphas_new, degree_value):
+        '''
+        residual(alphas_value,alphas_new,degree_value)
+
+        Calculate the expected-degree residual E[k]-k of alphas_value from its fixed-point update alphas_new.
+
+        Parameters
+        ----------
+        alphas_value: Array of the current alphas.
+        alphas_new: Array of the alphas after one update of alphas_value.
+        degree_value: Array of the reference degrees.
+
+        Returns
+        -------
+        residual: Array of the expected degree minus the reference degree of each node.
+        '''
+        return alphas_new * degree_value / alphas_value - degree_value
+
+    @staticmethod
+    def metrics(kind, sweeps, residual, alphas_prev, alphas_value, start, mean=None, mean_prev=None):
+        '''
+        metrics(kind,sweeps,residual,alphas_prev,alphas_value,start,mean=None,mean_prev=None)
+
+        Build the report passed to the callbacks of the solvers, see Monitor.
+
+        Parameters
+        ----------
+        kind: The name of the reporting function.
+        sweeps: The number of sweeps done.
+        residual: The maximum absolute expected-degree residual of alphas_value.
+        alphas_prev: Array of the alphas at the previous report, None at the first report.
+        alphas_value: Array of the current alphas.
+        start: The time.perf_counter() when the fit started.
+        mean: The current benchmark mean, if any.
+        mean_prev: The benchmark mean at the previous check, if any.
+
+        Returns
+        -------
+        metrics: A dictionary with the keys of Monitor.FIELDS.
+        '''
+        max_rel_change = None
+        if alphas_prev is not None:
+            max_rel_change = float(np.abs((alphas_value - alphas_prev) / alphas_prev).max(initial=0))
+        return {"kind": kind, "sweeps": int(sweeps), "residual": float(residual), "max_rel_change": max_rel_change,
+                "mean": None if mean is None else float(mean),
+                "mean_delta": None if mean is None or mean_prev is None else float(mean - mean_prev),
+                "wall_time": time.perf_counter() - start}
+
+    @staticmethod
+    def solve(update, degree_value, alphas_value, solver="picard", tol=None, max_iters=1000, jacobian=None, memory=5, callback=None,
+              history=None):
+        '''
+        solve(update,degree_value,alphas_value,solver="picard",tol=None,max_iters=1000,jacobian=None,memory=5,callback=None,history=None)
+
+        Solve the degree-constraint equations starting from alphas_value.
+
+        Parameters
+        ----------
+        update: Function mapping an array of alphas to its fixed-point update.
+        degree_value: Array of the reference degrees.
+        alphas_value: Array of the initial alphas.
+        solver: "picard" for plain fixed-point updates, "anderson" for Anderson-accelerated updates in log-alpha space,
+                "newton" for damped Newton steps in log-alpha space, which requires jacobian.
+        tol: Stop when the maximum absolute expected-degree residual is below tol. If None, run exactly max_iters iterations.
+        max_iters: The maximum number of iterations.
+        jacobian: Function mapping an array of alphas to the Jacobian of the expected degrees with respect to log-alphas,
+                  either a dense array or a scipy.sparse matrix.
+        memory: The number of previous iterates used by Anderson acceleration.
+        callback: Function called with the metrics of every iteration, see Solver.metrics and Monitor. If None, nothing is reported.
+        history: A dictionary keeping the Anderson history and the last log-alphas, updated in place. Passing the same dictionary to
+                 the next call, started from the returned alphas, continues the iterations exactly as one longer call. If None, the
+                 history starts empty.
+
+        Returns
+        -------
+        alphas_value: Array of the solved alphas.
+        cur_iter: The number of iterations performed.
+        residual: The maximum absolute expected-degree residual of the returned alphas.
+        '''
+        if solver not in Solver.SOLVERS:
+            raise ValueError("solver should be one of %s, got %r" % (Solver.SOLVERS, solver))
+        if solver == "newton" and jacobian is None:
+            raise ValueError("The newton solver requires the jacobian of the expected degrees.")
+
+        x = np.asarray(alphas_value, dtype=float)
+        if history is None:
+            history = {}
+        if solver != "picard":
+            # continue from the log-alphas of the previous call, exp then log again would round them
+            x = history["x"] if "x" in history and np.array_equal(np.exp(history["x"]), x) else Solver.log_alphas(x)
+        dF, dG = history.setdefault("dF", []), history.setdefault("dG", [])
+        f_prev, g_prev = history.get("f"), history.get("g")
+        if callback is not None:
+            start, alphas_prev = time.perf_counter(), None
+        for cur_iter in range(max_iters + 1):
+            alphas_value = x if solver == "picard" else np.exp(x)
+            alphas_new = update(alphas_value)
+            r = Solver.residual(alphas_value, alphas_new, degree_value)
+            residual = np.abs(r).max(initial=0)
+            if callback is not None:
+                callback(Solver.metrics("solve", cur_iter, residual, alphas_prev, alphas_value, start))
+                alphas_prev = alphas_value
+            if cur_iter == max_iters or (tol is not None and residual < tol):
+                history["x"] = x
+                return alphas_value, cur_iter, residual
+
+            if solver == "picard":
+                x = alphas_new
+            elif solver == "anderson":
+                g = Solver.log_alphas(alphas_new)
+                f = g - x
+                norm = np.linalg.norm(r)
+                # an accelerated step that raised the residual is rejected for the plain update of the previous alphas, its
+                # differences stay in the history. Near-collinear differences, e.g. of saturated nodes sitting at the alpha bounds,
+                # are cut by rcond instead of extrapolating the step far past the bounds
+                rejected = history.get("accelerated") and norm > history["residual"]
+                g_last = g_prev
+                if f_prev is not None:
+                    dF.append(f - f_prev)
+                    dG.append(g - g_prev)
+                    if len(dF) > memory:
+                        dF.pop(0)
+                        dG.pop(0)
+                f_prev, g_prev = history["f"], history["g"] = f, g
+                history["accelerated"] = False
+                if rejected:
+                    x = g_last
+                    continue
+                history["residual"] = norm
+                x = g
+                if dF:
+                    gamma = np.linalg.lstsq(np.stack(dF, axis=1), f, rcond=Solver.RCOND)[0]
+                    x_acc = Solver.clip_log_alphas(g - np.stack(dG, axis=1) @ gamma)
+                    if np.all(np.isfinite(x_acc)):
+                        x = x_acc
+                        history["accelerated"] = True
+                    else:  # restart the history from the plain update
+                        dF.clear()
+                        dG.clear()
+            else:
+                x = Solver.newton_step(update, degree_value, x, r, residual, jacobian(alphas_value), alphas_new)
+
+    @staticmethod
+    def newton_step(update, degree_value, x, r, residual, J, alphas_new, max_halvings=30):
+        '''
+        newton_step(update,degree_value,x,r,residual,J,alphas_new,max_halvings=30)
+
+        One damped Newton step in log-alpha space. The step is halved until the maximum residual decreases;
+        if no such step is found, the plain fixed-point update is taken instead.
+
+        Parameters
+        ----------
+        update: Function mapping an array of alphas to its fixed-point update.
+        degree_value: Array of the reference degrees.
+        x: Array of the current log-alphas.
+        r: Array of the current expected-degree residual.
+        residual: The maximum absolute value of r.
+        J: The Jacobian of the expected degrees with respect to log-alphas at x.
+        alphas_new: The fixed-point update of the current alphas.
+        max_halvings: The maximum number of step halvings.
+
+        Returns
+        -------
+        x: Array of the next log-alphas.
+        '''
+        try:
+            if not isinstance(J, np.ndarray):
+                # an inexact Krylov solve is enough for the damped step: conjugate gradient if -J is symmetric positive semi-definite,
+                # else BiCGSTAB, e.g. for the Jacobians of the classes of RandomSubnetwork.pool_classes. The diagonal of -J spans
+                # orders of magnitude on heterogeneous degrees, without the Jacobi preconditioner the solves stall and so does newton
+                import scipy.sparse
+                import scipy.sparse.linalg
+                diagonal = -J.diagonal()
+                M = scipy.sparse.diags(np.divide(1, diagonal, out=np.ones_like(diagonal), where=diagonal > 0))
+                if (J != J.T).nnz == 0:
+                    dx, _ = scipy.sparse.linalg.cg(-J, r, maxiter=200, M=M)
+                else:
+                    dx, _ = scipy.sparse.linalg.bicgstab(-J, r, maxiter=200, M=M)
+            else:
+                dx = np.linalg.solve(J, -r)
+        except (np.linalg.LinAlgError, RuntimeError):
+            dx = None
+        if dx is not None and np.all(np.isfinite(dx)):
+            t = 1.0
+            for _ in range(max_halvings):
+                x_try = Solver.clip_log_alphas(x + t * dx)
+                alphas_try = np.exp(x_try)
+                r_try = Solver.residual(alphas_try, update(alphas_try), degree_value)
+                if np.abs(r_try).max(initial=0) < residual:
+                    return x_try
+                t /= 2
+        return Solver.log_alphas(alphas_new)
@@ -1,5 +1,5 @@
-import numpy as np
-import random
+# the modules are not imported here, so import normlap stays cheap and each module only loads what it needs,
+# e.g. from normlap.Pipeline import Pipeline
 # from .Formatter import Formatter
 # from .Helper import Helper
 # from .Pipeline import Pipeline
@@ -4,5 +4,5 @@ setup(
     version="0.0.2",
     description="A package enable normlize the overlap between networks. It also provides the method for randomizing network and randomizing subnetworks based on maximum entropy framework.",
     author="bingjie",
-    py_modules=["normlap.Formatter","normlap.Helper","normlap.Pipeline","normlap.RandomNetwork","normlap.RandomSubnetwork"]
+    py_modules=["normlap.Formatter","normlap.Helper","normlap.Pipeline","normlap.RandomNetwork","normlap.RandomSubnetwork","normlap.Solver","normlap.Batch","normlap.AlphaStore","normlap.IterationState","normlap.Graph","normlap.Loader","normlap.Model","normlap.Cli","normlap.Monitor","normlap.Convergence"]
 )
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from benchmarks.generators import make_pair
+from normlap.AlphaStore import AlphaStore
+from normlap.Graph import Graph
+from normlap.Pipeline import Pipeline
+
+
+@pytest.fixture(scope="module")
+def elists():
+    elist1, elist2, _, _ = make_pair("powerlaw", 500)
+    return [tuple(link) for link in elist1.tolist()], [tuple(link) for link in elist2.tolist()]
+
+
+def fit(elists, solver, store=None):
+    pipe = Pipeline(*elists, store=store)
+    settings = dict(iters_start=100, iter_spacing=100, solver=solver)
+    results = pipe.get_benchmarks(settings, settings)
+    return results, {key: dict(alphas) for key, alphas in pipe.benchmark_alphas.items()}
+
+
+def assert_same_alphas(alphas, expected):
+    assert alphas.keys() == expected.keys()
+    for key in expected:
+        assert alphas[key].keys() == expected[key].keys()
+        np.testing.assert_array_equal([alphas[key][node] for node in expected[key]], list(expected[key].values()))
+
+
+@pytest.mark.parametrize("solver", ["picard", "anderson"])
+def test_store_hits_return_the_fitted_alphas(tmp_path, elists, solver):
+    expected, expected_alphas = fit(elists, solver)
+    assert len(expected_alphas) == 4
+    store = AlphaStore(path=str(tmp_path))
+    first, first_alphas = fit(elists, solver, store)
+    misses = store.misses
+    memory, memory_alphas = fit(elists, solver, store)
+    assert store.misses == misses and store.hits > 0
+    disk_store = AlphaStore(path=str(tmp_path))
+    disk, disk_alphas = fit(elists, solver, disk_store)
+    assert disk_store.misses == 0
+    assert first == memory == disk == expected
+    for alphas in (first_alphas, memory_alphas, disk_alphas):
+        assert_same_alphas(alphas, expected_alphas)
+
+
+def test_edges_digest_same_for_list_and_graph(elists):
+    elist1 = elists[0]
+    digest = AlphaStore.edges_digest(Graph.from_edgelist(elist1))
+    assert AlphaStore.edges_digest(elist1) == digest
+    assert AlphaStore.edges_digest([(v, u) for u, v in elist1[::-1]] + elist1[:10]) == digest
+    assert AlphaStore.edges_digest(elists[1]) != digest
@@ -0,0 +1,28 @@
+import numpy as np
+
+from benchmarks.generators import make_pair
+from normlap.Batch import Batch
+
+
+FIT = dict(iters_start=100, iter_spacing=100)
+
+
+def pairs():
+    for seed in range(3):
+        elist1, elist2, _, _ = make_pair("er", 300, seed=seed)
+        yield [tuple(link) for link in elist1.tolist()], [tuple(link) for link in elist2.tolist()]
+
+
+def test_process_pool_matches_serial():
+    serial = Batch.score_pairs(pairs(), seed=1, pos_kwargs=FIT, neg_kwargs=FIT)
+    parallel = Batch.score_pairs(pairs(), n_jobs=2, chunksize=2, seed=1, pos_kwargs=FIT, neg_kwargs=FIT)
+    assert [row["Pair"] for row in parallel] == [0, 1, 2]
+    for row, expected in zip(parallel, serial):
+        assert row["Error"] is None
+        np.testing.assert_allclose([row[label] for label in Batch.LABELS], [expected[label] for label in Batch.LABELS], rtol=1e-12)
+
+
+def test_failed_pair_is_reported_in_its_row():
+    rows = Batch.score_pairs([[(1, 2)], ([(1, 2), (2, 3)], [(2, 3), (3, 4)])], pos_kwargs=FIT, neg_kwargs=FIT)
+    assert rows[0]["Error"] is not None and np.isnan(rows[0]["Normlap"])
+    assert rows[1]["Error"] is None
@@ -0,0 +1,18 @@
+import json
+
+import pytest
+
+from normlap.Cli import Cli
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_disjoint_pair_keeps_zero_means_and_clean_stdout(tmp_path, capsys):
+    path1, path2 = tmp_path / "net1.tsv", tmp_path / "net2.tsv"
+    path1.write_text("a\tb\nb\tc\nc\ta\n")
+    path2.write_text("d\te\ne\tf\nf\td\n")
+    assert Cli.main([str(path1), str(path2), "--format", "json"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 1
+    row = json.loads(lines[0])
+    assert row["Error"] is None
+    assert row["Observed overlap"] == row["Pos_mean"] == row["Neg_mean"] == 0
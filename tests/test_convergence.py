@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from benchmarks.generators import make_pair
+from normlap.Convergence import Convergence
+from normlap.Pipeline import Pipeline
+
+
+@pytest.fixture(scope="module")
+def elists():
+    elist1, elist2, _, _ = make_pair("powerlaw", 500)
+    return [tuple(link) for link in elist1.tolist()], [tuple(link) for link in elist2.tolist()]
+
+
+def statuses(elists, change_limit, **settings):
+    pipe = Pipeline(*elists)
+    pipe.get_pos_benchmark(iters_start=10, iter_spacing=10, pos_change_limit=change_limit, **settings)
+    pipe.get_neg_benchmark(iters_start=10, iter_spacing=10, neg_change_limit=change_limit, **settings)
+    return pipe, {pipe.status_pos1, pipe.status_pos2, pipe.status_neg1, pipe.status_neg2}
+
+
+@pytest.mark.parametrize("solver", ["picard", "anderson"])
+def test_residual_status(elists, solver):
+    _, status = statuses(elists, 0, solver=solver, residual_atol=1e-3)
+    assert status == {"residual"}
+
+
+def test_mean_status(elists):
+    pipe, status = statuses(elists, 1)
+    assert status == {"mean"}
+    assert pipe.cur_iter_pos1 < 20000 and pipe.cur_iter_neg1 < 20000
+
+
+def test_max_iterations_status(elists):
+    # a change limit of 0 is never met
+    pipe, status = statuses(elists, 0, max_iterations=30)
+    assert status == {"max_iterations"}
+    assert pipe.cur_iter_pos1 == pipe.cur_iter_neg1 == 30
+
+
+def test_check_prefers_residual():
+    degree_value = np.array([1.0, 10.0])
+    rule = Convergence(change_limit=1, residual_atol=0.1, residual_rtol=0.01)
+    assert rule.check(np.array([0.1, 0.2]), degree_value, 5.0, 5.5) == "residual"
+    assert rule.check(np.array([0.2, 0.2]), degree_value, 5.0, 5.5) == "mean"
+    assert rule.check(np.array([0.2, 0.2]), degree_value, 5.0) is None
+    assert Convergence().check(None, degree_value, 5.0, 7.0, converged=True) == "residual"
@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+from normlap.Graph import Graph
+from normlap.Pipeline import Pipeline
+
+
+def test_links_are_canonical_and_unique():
+    graph = Graph.from_edgelist([(2, 1), (1, 2), (3, 0), (1, 2), (2, 2), (0, 3)], n_nodes=4)
+    np.testing.assert_array_equal(graph.src, [0, 1, 2])
+    np.testing.assert_array_equal(graph.dst, [3, 2, 2])
+    np.testing.assert_array_equal(graph.degrees, [1, 1, 1, 1])
+    np.testing.assert_array_equal(graph.self_nodes, [2])
+
+
+def test_pipeline_counts_reversed_and_repeated_links_once():
+    elist1 = [(1, 2), (2, 3), (3, 5), (5, 1), (2, 4)]
+    elist2 = [(2, 3), (4, 5), (1, 2), (2, 4), (3, 4)]
+    canonical = Pipeline(elist1, elist2)
+    noisy = Pipeline(elist1 + [(2, 1), (3, 2), (1, 2)], [(v, u) for u, v in elist2])
+    assert noisy.obs == canonical.obs == 3
+    assert noisy.get_benchmarks() == pytest.approx(canonical.get_benchmarks())
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from normlap.Helper import Helper
+
+scipy_stats = pytest.importorskip("scipy.stats")
+
+
+@pytest.mark.parametrize("size", [7, Helper.ERFC_MIN_SIZE])
+def test_norm_sf_matches_scipy(size):
+    z = np.r_[np.random.default_rng(0).normal(scale=5, size=size), np.nan, np.inf, -np.inf]
+    sf = Helper.norm_sf(z)
+    assert sf.dtype == float
+    np.testing.assert_allclose(sf, scipy_stats.norm.sf(z), rtol=1e-12, atol=1e-300)
+    assert Helper.norm_sf(z[0]) == pytest.approx(scipy_stats.norm.sf(z[0]), rel=1e-12)
+
+
+def scalar_results(obs, neg_mean, neg_sigma, pos_mean, pos_sigma):
+    neg_z, pos_z = (obs - neg_mean) / neg_sigma, (obs - pos_mean) / pos_sigma
+    score = (obs - neg_mean) / (pos_mean - neg_mean)
+    score_sigma = np.sqrt((obs - pos_mean)**2 * neg_sigma**2 + (neg_mean - pos_mean)**2 * pos_sigma**2) / (pos_mean - neg_mean)**2
+    return [obs, neg_mean, neg_sigma, neg_z, scipy_stats.norm.sf(neg_z), pos_mean, pos_sigma, pos_z, scipy_stats.norm.cdf(pos_z),
+            score, score_sigma]
+
+
+@pytest.mark.parametrize("n_pairs", [5, Helper.ERFC_MIN_SIZE])
+def test_cal_results_matches_pair_by_pair(n_pairs):
+    rng = np.random.default_rng(1)
+    neg_mean, pos_mean = rng.uniform(0, 50, n_pairs), rng.uniform(60, 200, n_pairs)
+    columns = (rng.integers(0, 250, n_pairs), neg_mean, rng.uniform(0.5, 10, n_pairs), pos_mean, rng.uniform(0.5, 10, n_pairs))
+    results = Helper.cal_results(*columns)
+    assert results.shape == (n_pairs,) and list(results.dtype.names) == Helper.RESULT_FIELDS
+    for i in rng.choice(n_pairs, 5, replace=False):
+        np.testing.assert_allclose(results[i].tolist(), scalar_results(*(float(column[i]) for column in columns)), rtol=1e-12)
+
+
+def test_cal_score_broadcasts_and_marks_equal_benchmarks():
+    scores, score_sigmas = Helper.cal_score(5, [1, 3], 1.0, [9, 3], 2.0)
+    np.testing.assert_allclose(scores, [0.5, np.nan])
+    np.testing.assert_allclose(score_sigmas, [np.sqrt(16 + 64 * 4) / 64, np.nan])
+    scores, _ = Helper.cal_score(np.int64(5), 1, 1, 9, 2)
+    assert scores.shape == (1,) and scores[0] == 0.5
@@ -0,0 +1,39 @@
+import gzip
+
+import numpy as np
+import pytest
+
+from benchmarks.generators import make_pair
+from normlap.Loader import Loader
+from normlap.Pipeline import Pipeline
+
+
+@pytest.mark.parametrize("sep", [None, "\t"])
+def test_read_edges_skips_blank_comment_and_short_lines(tmp_path, sep):
+    path = tmp_path / "edges.tsv"
+    path.write_text("# header\n\na\tb\n\n#c\td\nb\tc\nlonely\n   \n#\nc\ta\textra\n")
+    edges, node2id = Loader.read_edges(str(path), sep=sep)
+    assert [tuple(map(list(node2id).__getitem__, link)) for link in edges.tolist()] == [("a", "b"), ("b", "c"), ("c", "a")]
+
+
+def test_read_edges_skips_rows_without_the_columns(tmp_path):
+    path = tmp_path / "edges.csv"
+    path.write_text("x,a,b\ny,b\nz,c,a\n")
+    edges, node2id = Loader.read_edges(str(path), columns=(1, 2))
+    assert list(node2id) == ["a", "b", "c"]
+    np.testing.assert_array_equal(edges, [[0, 1], [2, 0]])
+
+
+def test_load_pipeline_matches_list_pipeline(tmp_path):
+    elist1, elist2, _, _ = make_pair("powerlaw", 500)
+    named1 = [("n%d" % u, "n%d" % v) for u, v in elist1.tolist()]
+    named2 = [("n%d" % v, "n%d" % u) for u, v in elist2.tolist()]
+    path1, path2 = tmp_path / "net1.tsv", tmp_path / "net2.tsv.gz"
+    path1.write_text("".join("%s\t%s\n" % link for link in named1))
+    with gzip.open(path2, "wt") as f:
+        f.write("# reversed links\n" + "".join("%s\t%s\n" % link for link in named2))
+    settings = dict(iters_start=100, iter_spacing=100)
+    pipe, loaded = Pipeline(named1, named2), Loader.load_pipeline(str(path1), str(path2))
+    assert loaded.obs == pipe.obs
+    np.testing.assert_allclose(loaded.get_benchmarks(settings, settings), pipe.get_benchmarks(settings, settings), rtol=1e-9)
+    np.testing.assert_allclose(loaded.show_results(printOn=False)[1], pipe.show_results(printOn=False)[1], rtol=1e-9)
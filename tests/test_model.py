@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from benchmarks.generators import make_pair
+from normlap.Model import Model
+from normlap.Pipeline import Pipeline
+
+
+@pytest.fixture(scope="module")
+def pipe():
+    elist1, elist2, _, _ = make_pair("ppi", 500)
+    pipe = Pipeline([("n%d" % u, "n%d" % v) for u, v in elist1.tolist()], [("n%d" % u, "n%d" % v) for u, v in elist2.tolist()])
+    pipe.get_pos_benchmark(iters_start=100, iter_spacing=100, solver="anderson")
+    pipe.get_neg_benchmark(iters_start=100, iter_spacing=100)
+    pipe.show_results(printOn=False)
+    return pipe
+
+
+@pytest.mark.parametrize("mmap_mode", ["r", None])
+def test_round_trip_is_identical(tmp_path, pipe, mmap_mode):
+    path = str(tmp_path / "model.npz")
+    Model.save(pipe, path)
+    loaded = Model.load(path, mmap_mode=mmap_mode)
+    assert loaded.id2node == [pipe.id2node[i] for i in range(len(pipe.id2node))]
+    assert loaded.alphas_cache.keys() == pipe.alphas_cache.keys()
+    for key, entry in pipe.alphas_cache.items():
+        assert loaded.alphas_cache[key]["alphas"] == entry["alphas"]
+        assert loaded.alphas_cache[key]["cur_iter"] == entry["cur_iter"]
+        assert loaded.alphas_cache[key]["status"] == entry["status"]
+    assert loaded.show_results(printOn=False) == pipe.show_results(printOn=False)
+
+    resaved = str(tmp_path / "resaved.npz")
+    Model.save(loaded, resaved)
+    arrays, expected = Model.load_arrays(resaved, mmap_mode=None), Model.load_arrays(path, mmap_mode=None)
+    assert arrays.keys() == expected.keys()
+    for name in expected:
+        np.testing.assert_array_equal(arrays[name], expected[name])
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from normlap.Monitor import Monitor
+from normlap.Pipeline import Pipeline
+
+
+def report(monitor, n):
+    for sweeps in range(n):
+        monitor({"kind": "solve", "sweeps": sweeps, "residual": 1.0 / (sweeps + 1)})
+
+
+@pytest.mark.parametrize("every, maxlen, n", [(1, 10000, 50), (1, 4, 30), (3, 4, 30), (2, 5, 7), (5, 2, 100)])
+def test_records_are_the_multiples_of_every(every, maxlen, n):
+    monitor = Monitor(every=every, maxlen=maxlen)
+    report(monitor, n)
+    assert monitor.calls == n
+    assert len(monitor.records) <= maxlen
+    assert monitor.records == [{"kind": "solve", "sweeps": sweeps, "residual": 1.0 / (sweeps + 1)}
+                               for sweeps in range(0, n, monitor.every)]
+
+
+def test_decimation_cadence():
+    monitor = Monitor(every=3, maxlen=4)
+    report(monitor, 30)
+    assert monitor.every == 12
+    assert [record["sweeps"] for record in monitor.records] == [0, 12, 24]
+
+
+def test_columns_and_json():
+    monitor = Monitor()
+    report(monitor, 3)
+    monitor({"kind": "optimize_pos", "sweeps": 3, "mean": float("nan"), "idx": 1})
+    columns = monitor.columns()
+    assert list(columns)[:len(Monitor.FIELDS)] == Monitor.FIELDS and columns["idx"] == [None, None, None, 1]
+    exported = json.loads(monitor.to_json())
+    assert exported["calls"] == 4 and exported["every"] == 1
+    assert exported["records"][-1] == {"kind": "optimize_pos", "sweeps": 3, "mean": None, "idx": 1}
+
+
+def test_pipeline_reports_both_fits():
+    monitor = Monitor()
+    pipe = Pipeline([(1, 2), (2, 3), (3, 5)], [(2, 3), (4, 5), (1, 2), (2, 4)], callback=monitor)
+    pipe.show_results(printOn=False)
+    assert monitor.calls == len(monitor.records) > 0
+    assert {record["idx"] for record in monitor.records} == {0, 1}
+    assert {"optimize_pos", "optimize_neg"} <= {record["kind"] for record in monitor.records}
+    assert all(set(Monitor.FIELDS) <= set(record) for record in monitor.records if record["kind"] != "solve")
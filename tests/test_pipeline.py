@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from normlap.Loader import Loader
+from normlap.Pipeline import Pipeline
+
+
+ELIST1 = [("a", "b"), ("c", "b"), ("c", "d"), ("e", "a")]
+ELIST2 = [("b", "a"), ("b", "c"), ("d", "e"), ("a", "e"), ("f", "a")]
+
+
+def write_edges(path, elist):
+    path.write_text("".join("%s\t%s\n" % link for link in elist))
+    return str(path)
+
+
+def test_observed_overlap_ignores_link_orientation(tmp_path):
+    pipe = Pipeline(ELIST1, ELIST2)
+    loaded = Loader.load_pipeline(write_edges(tmp_path / "net1.tsv", ELIST1), write_edges(tmp_path / "net2.tsv", ELIST2))
+    assert pipe.obs == loaded.obs == 3
+
+
+def test_simulated_overlap_ignores_duplicate_and_reversed_links():
+    pipe = Pipeline(ELIST1 + [("b", "a"), ("c", "d")], ELIST2 + [("e", "a"), ("b", "a")])
+    clean = Pipeline(ELIST1, ELIST2)
+    for kind in ("pos", "neg"):
+        simulated = pipe.simulate_overlap(kind, 2000, rng=0)
+        np.testing.assert_array_equal(simulated, clean.simulate_overlap(kind, 2000, rng=0))
+    pipe.get_pos_benchmark()
+    pipe.get_neg_benchmark()
+    assert pipe.simulate_overlap("pos", 4000, rng=0).mean() == pytest.approx(pipe.pos_mean, abs=0.1)
+    assert pipe.simulate_overlap("neg", 4000, rng=0).mean() == pytest.approx(pipe.neg_mean, abs=0.1)
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from normlap.RandomNetwork import RandomNetwork
+
+
+ALPHAS = {node: alpha for node, alpha in enumerate([0.2, 0.2, 0.2, 1.0, 1.0, 3.0, 3.0, 3.0, 3.0, 8.0])}
+
+
+def link_frequency(sample, n, draws):
+    counts = np.zeros((n, n))
+    for _ in range(draws):
+        edges = np.array(sample(), dtype=np.int64).reshape(-1, 2)
+        counts[edges[:, 0], edges[:, 1]] += 1
+    return counts / draws
+
+
+@pytest.mark.parametrize("block_size", [1, 2**20])
+def test_streaming_sampler_matches_dense(block_size):
+    n, draws = len(ALPHAS), 4000
+    Pij, nodelist = RandomNetwork.cal_Pij(ALPHAS, [4])
+    rng = np.random.default_rng(0)
+    stream = link_frequency(lambda: RandomNetwork.sample_random_network(ALPHAS, [4], block_size=block_size, rng=rng), n, draws)
+    dense = link_frequency(lambda: RandomNetwork.construct_random_network(Pij, nodelist, [4], rng=rng), n, draws)
+    upper = np.triu(Pij, k=1)
+    bound = 5 * np.sqrt(upper * (1 - upper) / draws) + 1e-12
+    assert np.all(np.tril(stream, k=-1) == 0)
+    assert np.all(np.abs(np.triu(stream, k=1) - upper) <= bound)
+    assert np.all(np.abs(np.triu(dense, k=1) - upper) <= bound)
+    assert stream[4, 4] == dense[4, 4] == 1 and np.trace(stream) == 1
+
+
+def test_streaming_sampler_links_are_distinct():
+    alphas_value = np.repeat([0.05, 0.5, 2.0], 200)
+    for i, j in RandomNetwork.stream_random_edges(alphas_value, block_size=2, rng=1):
+        assert np.all(i < j)
+        codes = i * len(alphas_value) + j
+        assert len(np.unique(codes)) == len(codes)
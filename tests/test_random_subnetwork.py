@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from benchmarks.generators import make_pair
+from normlap.Graph import Graph
+from normlap.RandomSubnetwork import RandomSubnetwork
+
+
+@pytest.fixture(scope="module")
+def twins():
+    # an Erdos-Renyi pair where 40 nodes get 5 clones each, linked to the same nodes in both networks, the links between two cloned
+    # nodes are not copied: every cloned node and its clones are twins
+    elist1, elist2, _, n_nodes = make_pair("er", 2000)
+    clones = {node: range(n_nodes + 5 * node, n_nodes + 5 * node + 5) for node in range(40)}
+    elists = []
+    for elist in (elist1.tolist(), elist2.tolist()):
+        copies = [(clone, v) for u, v in elist if u in clones and v not in clones for clone in clones[u]]
+        copies += [(u, clone) for u, v in elist if v in clones and u not in clones for clone in clones[v]]
+        elists.append(elist + copies)
+    return Graph.from_edgelist(elists[0]), Graph.from_edgelist(elists[1])
+
+
+def test_pool_classes_group_twins(twins):
+    csr = RandomSubnetwork.pool_csr(Graph.union(*twins), twins[0], None)
+    nodelist, indptr, indices, degree_value = csr
+    _, _, counts, inverse = RandomSubnetwork.pool_classes(csr)
+    assert len(counts) <= len(nodelist) - 150 and counts.sum() == len(nodelist)
+    neighbors = [frozenset(nodelist[j] for j in indices[indptr[i]:indptr[i + 1]]) for i in range(len(nodelist))]
+    signature = {}
+    for i, k in enumerate(inverse.tolist()):
+        assert signature.setdefault(k, (degree_value[i], neighbors[i])) == (degree_value[i], neighbors[i])
+    assert len(set(signature.values())) == len(signature)
+
+
+@pytest.mark.parametrize("solver", ["picard", "anderson", "newton"])
+def test_compressed_fit_matches_optimize_pos(twins, solver):
+    settings = dict(iters_start=100, iter_spacing=100, solver=solver, return_alphas=True, return_status=True)
+    mean, sigma, cur_iter, alphas, status = RandomSubnetwork.optimize_pos(*twins, **settings)
+    c_mean, c_sigma, c_cur_iter, c_alphas, c_status = RandomSubnetwork.optimize_pos(*twins, compress=True, **settings)
+    assert (c_cur_iter, c_status) == (cur_iter, status)
+    # picard runs the same sweeps on the classes, anderson and newton take other steps to alphas within their residual tol
+    rel = 1e-12 if solver == "picard" else 1e-6
+    assert c_mean == pytest.approx(mean, rel=rel) and c_sigma == pytest.approx(sigma, rel=rel)
+    if solver == "picard":
+        nodes = list(alphas)
+        np.testing.assert_allclose([c_alphas[node] for node in nodes], [alphas[node] for node in nodes], rtol=1e-12)
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from benchmarks.generators import make_pair
+from normlap.Graph import Graph
+from normlap.RandomNetwork import RandomNetwork
+from normlap.RandomSubnetwork import RandomSubnetwork
+from normlap.Solver import Solver
+
+
+@pytest.fixture(scope="module")
+def pair():
+    elist1, elist2, _, n_nodes = make_pair("powerlaw", 15000)
+    return Graph.from_edgelist(elist1, n_nodes=n_nodes), Graph.from_edgelist(elist2, n_nodes=n_nodes)
+
+
+def states(pair, solver):
+    csr = RandomSubnetwork.pool_csr(Graph.union(*pair), pair[0], None)
+    return (RandomSubnetwork.iteration_state(csr, solver=solver, tol=Solver.TOL),
+            RandomNetwork.iteration_state(pair[0], None, solver=solver, tol=Solver.TOL))
+
+
+@pytest.mark.parametrize("optimize", [RandomSubnetwork.optimize_pos, RandomNetwork.optimize_neg])
+@pytest.mark.parametrize("solver", ["anderson", "newton"])
+def test_solver_fewer_sweeps_than_picard(pair, optimize, solver):
+    picard_mean, _, picard_iter, _ = optimize(*pair, solver="picard", return_status=True)
+    mean, _, cur_iter, status = optimize(*pair, solver=solver, return_status=True)
+    assert status == "residual"
+    assert cur_iter < picard_iter / 5
+    assert mean == pytest.approx(picard_mean, rel=1e-3)
+
+
+@pytest.mark.parametrize("solver", ["anderson", "newton"])
+def test_solver_reaches_tol(pair, solver):
+    for picard, state in zip(states(pair, "picard"), states(pair, solver)):
+        state.advance(2000)
+        picard.advance(state.sweeps)
+        assert state.converged and state.residual() < Solver.TOL
+        assert picard.residual() > state.residual()
+
+
+@pytest.mark.parametrize("solver", ["anderson", "newton"])
+def test_advance_continues_iterations(pair, solver):
+    csr = RandomSubnetwork.pool_csr(Graph.union(*pair), pair[0], None)
+    split = RandomSubnetwork.iteration_state(csr, solver=solver).advance(7).advance(13)
+    whole = RandomSubnetwork.iteration_state(csr, solver=solver).advance(20)
+    assert split.sweeps == whole.sweeps == 20
+    np.testing.assert_array_equal(split.alphas_value, whole.alphas_value)
+
+
+def test_advance_stops_at_tol(pair):
+    csr = RandomSubnetwork.pool_csr(Graph.union(*pair), pair[0], None)
+    state = RandomSubnetwork.iteration_state(csr, solver="anderson", tol=1e-6).advance(1000)
+    assert state.converged and state.sweeps < 1000
+    assert state.residual() < 1e-6
+    assert state.advance(100).sweeps == state.sweeps
+
+
+@pytest.mark.parametrize("solver", ["anderson", "newton"])
+def test_saturated_nodes_keep_finite_alphas(solver):
+    # every link of the leaves is in network1, their alphas tend to 0 and their links have probability 1
+    elist1 = [(hub, leaf) for leaf in range(3, 60) for hub in (leaf % 3, (leaf + 1) % 3)]
+    elist2 = [(0, 1), (1, 2)] + [(leaf % 3, leaf) for leaf in range(3, 60)]
+    mean, sigma, _, alphas, status = RandomSubnetwork.optimize_pos(elist1, elist2, solver=solver, iters_start=100, iter_spacing=100,
+                                                                  return_alphas=True, return_status=True)
+    assert np.all(np.isfinite(list(alphas.values()))) and np.isfinite(mean) and np.isfinite(sigma)
+    # the links between the hubs are not in network1 and get probability 0
+    assert status == "residual" and mean == pytest.approx(len(elist2) - 2, abs=1e-3)